@@ -8,13 +8,25 @@ from config import Config, FLASK_ENV
 
 db = SQLAlchemy()
 
-def create_app():
+def create_app(config_overrides=None):
     app = Flask(__name__)
     app.config.from_object(Config)
+    # Allow callers (tests, scripts) to point the app at another database
+    # before the engine is created by init_app.
+    if config_overrides:
+        app.config.update(config_overrides)
 
-    CORS(app)
+    # let browser clients read conditional-GET and pagination headers
+    CORS(app, expose_headers=["ETag", "X-Next-Cursor"])
     db.init_app(app)
 
+    # Validation errors raised by decorators (e.g. invalid pagination params)
+    from errors import ValidationError as AppValidationError
+
+    @app.errorhandler(AppValidationError)
+    def handle_validation_error(e):
+        return {"error": e.message}, e.status_code
+
     # In development, ensure tables exist so the dev server can start without running init_db.py manually
     try:
         if FLASK_ENV == 'development':
@@ -24,6 +36,14 @@ def create_app():
         # If DB not reachable or create_all fails, let the app continue so errors surface in requests
         pass
 
+    # Background result recomputation after mark writes
+    from services.recompute_queue import recompute_queue
+    recompute_queue.init_app(app)
+    from services.upload_jobs import upload_jobs
+    upload_jobs.init_app(app)
+    from services.artifact_cache import export_cache
+    export_cache.init_app(app)
+
     # ---------------- Blueprints ----------------
     from routes.teacher_routes import teacher_bp
     from routes.admin_routes import admin_bp
@@ -1,13 +1,20 @@
 # backend/auth.py
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from functools import wraps
 import jwt
 import datetime
+import os
+import secrets
+import tempfile
+import threading
+import time
+from collections import namedtuple
 from werkzeug.security import generate_password_hash, check_password_hash
 from config import Config
 from app import db
 from models import Teacher, TeacherSubjectAllocation, Subject, Admin
+from services.ttl_cache import TTLCache
 
 # Utility functions used by tests and other modules
 def hash_password(password: str) -> str:
@@ -42,6 +49,128 @@ def verify_token(token: str):
 
 auth_bp = Blueprint("auth", __name__, url_prefix="/auth")
 
+# ======================================================
+# AUTH CACHES
+# ======================================================
+# verified token payloads (keyed by the raw token) and resolved principals
+# (keyed by (role, user_id)), so authenticated requests normally skip both
+# the signature check and the user lookup. Kept per app so that apps bound
+# to different databases never share principals.
+#
+# Other worker processes learn about invalidations through a shared signal
+# file: `invalidate_principal` atomically replaces it, and each process stats
+# it per request and drops its principals when it changed (a new inode).
+Principal = namedtuple("Principal", ["user_id", "user_type"])
+
+_caches_lock = threading.Lock()
+
+
+def _auth_caches():
+    caches = current_app.extensions.get("auth_caches")
+    if caches is None:
+        with _caches_lock:
+            caches = current_app.extensions.get("auth_caches")
+            if caches is None:
+                maxsize = current_app.config.get("AUTH_CACHE_MAX_ENTRIES", 2048)
+                ttl = current_app.config.get("AUTH_CACHE_TTL_SECONDS", 60)
+                caches = {"tokens": TTLCache(maxsize, ttl), "principals": TTLCache(maxsize, ttl)}
+                current_app.extensions["auth_caches"] = caches
+                current_app.extensions["auth_signal"] = _signal_state()
+    return caches
+
+
+def _signal_path():
+    return current_app.config.get("AUTH_INVALIDATION_FILE") or os.path.join(
+        tempfile.gettempdir(), "auth_invalidation"
+    )
+
+
+def _signal_state():
+    """Identity of the current signal file (None while it does not exist)."""
+    try:
+        st = os.stat(_signal_path())
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns
+
+
+def _sync_invalidations():
+    """Drop this process's principals if another process signalled an invalidation."""
+    state = _signal_state()
+    if state != current_app.extensions.get("auth_signal"):
+        _auth_caches()["principals"].clear()
+        current_app.extensions["auth_signal"] = state
+
+
+def invalidate_principal(user_id):
+    """
+    Forget cached principals for ``user_id`` (teacher and admin ids may collide,
+    so every role is dropped). Call after changing a user's active flag or role;
+    other worker processes drop all their principals on their next request.
+    """
+    _auth_caches()["principals"].discard_where(lambda key: key[1] == user_id)
+
+    path = _signal_path()
+    tmp = f"{path}.{os.getpid()}.{secrets.token_hex(4)}.tmp"
+    with open(tmp, "w") as fh:
+        fh.write(str(user_id))
+    # our own cache is already up to date; the rename keeps inode and mtime
+    st = os.stat(tmp)
+    os.replace(tmp, path)
+    current_app.extensions["auth_signal"] = (st.st_ino, st.st_mtime_ns)
+
+
+def auth_cache_stats():
+    return {name: cache.stats() for name, cache in _auth_caches().items()}
+
+
+def _decode_token(token):
+    """Verified payload of ``token``; raises jwt errors like jwt.decode."""
+    token_cache = _auth_caches()["tokens"]
+    payload = token_cache.get(token)
+    if payload is not None:
+        exp = payload.get("exp")
+        if exp is not None and exp <= time.time():
+            raise jwt.ExpiredSignatureError("Signature has expired")
+        return payload
+
+    payload = jwt.decode(token, Config.SECRET_KEY, algorithms=["HS256"])
+    exp = payload.get("exp")
+    token_cache.set(token, payload, ttl=(exp - time.time()) if exp is not None else None)
+    return payload
+
+
+def _resolve_principal(role, user_id):
+    """Active user behind a token as a Principal, or None."""
+    principal_cache = _auth_caches()["principals"]
+    _sync_invalidations()
+    key = (role, user_id)
+    principal = principal_cache.get(key)
+    if principal is not None:
+        return principal
+
+    # Support tokens issued for both teachers and admins.
+    # Prefer Admin lookup when token indicates ADMIN role to avoid id collisions.
+    user = None
+    if role == "ADMIN":
+        user = db.session.get(Admin, user_id)
+        # If role was ADMIN but admin record not found, fallback to Teacher only if present
+        if user is None:
+            user = db.session.get(Teacher, user_id)
+    else:
+        user = db.session.get(Teacher, user_id)
+
+    if not user or not getattr(user, "active", True):
+        return None
+
+    principal = Principal(
+        user_id=getattr(user, "teacher_id", None) or getattr(user, "admin_id", None),
+        user_type=getattr(user, "role", role),
+    )
+    principal_cache.set(key, principal)
+    return principal
+
+
 # ======================================================
 # TOKEN DECORATOR
 # ======================================================
@@ -60,49 +189,20 @@ def token_required(f):
             return {"error": "Token missing"}, 401
 
         try:
-            data = jwt.decode(
-                token,
-                Config.SECRET_KEY,
-                algorithms=["HS256"]
-            )
-            # Support tokens issued for both teachers and admins.
-            # Prefer Admin lookup when token indicates ADMIN role to avoid id collisions.
+            data = _decode_token(token)
             role = (data.get("role") or data.get("user_type") or "").upper()
-            user = None
-            if role == "ADMIN":
-                user = Admin.query.get(data.get("user_id"))
-            else:
-                user = Teacher.query.get(data.get("user_id"))
-
-            # If role was ADMIN but admin record not found, fallback to Teacher only if present
-            if role == "ADMIN" and user is None:
-                user = Teacher.query.get(data.get("user_id"))
-
-            # Debug logging to assist with tracing token/user resolution during development
-            try:
-                print(f"[auth.token_required] token data={data}, role={role}, resolved_user={user}")
-            except Exception:
-                pass
-
-            # If teacher lookup failed and role indicates ADMIN, try Admin table
-            if user is None and role == "ADMIN":
-                user = Admin.query.get(data.get("user_id"))
-
-            if not user or not getattr(user, "active", True):
-                return {"error": "Invalid or inactive user"}, 401
-
+            principal = _resolve_principal(role, data.get("user_id"))
         except jwt.ExpiredSignatureError:
             return {"error": "Token expired"}, 401
         except Exception:
             return {"error": "Invalid token"}, 401
 
-        # extra-safety: ensure `user` is defined and not None for static checkers
-        if user is None:
+        if principal is None:
             return {"error": "Invalid or inactive user"}, 401
 
         return f(
-            user_id=getattr(user, "teacher_id", None) or getattr(user, "admin_id", None),
-            user_type=getattr(user, "role", role),
+            user_id=principal.user_id,
+            user_type=principal.user_type,
             *args,
             **kwargs
         )
@@ -179,20 +279,19 @@ def me(user_id=None, user_type=None):
     if not teacher:
         return {"error": "User not found"}, 404
 
-    allocations = TeacherSubjectAllocation.query.filter_by(
-        teacher_id=teacher.teacher_id
-    ).all()
-
-    allocation_data = []
-    for alloc in allocations:
-        subject = Subject.query.get(alloc.subject_id)
-        if subject:
-            allocation_data.append({
-                "subject_id": subject.subject_id,
-                "subject_code": subject.subject_code,
-                "subject_name": subject.subject_name,
-                "division": alloc.division
-            })
+    # allocations with their subjects in one joined query
+    allocations = db.session.execute(
+        db.select(
+            Subject.subject_id,
+            Subject.subject_code,
+            Subject.subject_name,
+            TeacherSubjectAllocation.division,
+        )
+        .join(Subject, Subject.subject_id == TeacherSubjectAllocation.subject_id)
+        .where(TeacherSubjectAllocation.teacher_id == teacher.teacher_id)
+        .order_by(TeacherSubjectAllocation.allocation_id)
+    )
+    allocation_data = [dict(row._mapping) for row in allocations]
 
     return jsonify({
         "teacher_id": teacher.teacher_id,
@@ -34,8 +34,79 @@ MASTER_EXCEL_PATH = os.getenv("MASTER_EXCEL_PATH", os.path.join(os.path.dirname(
 # Expected master sheet name
 MASTER_EXCEL_SHEET = os.getenv("MASTER_EXCEL_SHEET", "Marks")
 
+# Result recomputation after mark writes: queued to a background worker and
+# coalesced over a short quiet window (set RESULT_RECOMPUTE_ASYNC=false to run inline)
+RESULT_RECOMPUTE_ASYNC = os.getenv("RESULT_RECOMPUTE_ASYNC", "True").lower() == "true"
+RESULT_RECOMPUTE_DEBOUNCE_SECONDS = float(os.getenv("RESULT_RECOMPUTE_DEBOUNCE_SECONDS", 2))
+RESULT_RECOMPUTE_MAX_DELAY_SECONDS = float(os.getenv("RESULT_RECOMPUTE_MAX_DELAY_SECONDS", 10))
+
+# Division recomputes are serialised across worker processes with MySQL GET_LOCK,
+# or with lock files in RESULT_LOCK_DIR on other databases (defaults to the temp dir)
+RESULT_LOCK_TIMEOUT_SECONDS = int(os.getenv("RESULT_LOCK_TIMEOUT_SECONDS", 30))
+RESULT_LOCK_DIR = os.getenv("RESULT_LOCK_DIR")
+
+# In-process cache of verified tokens and resolved users for token_required.
+# Deactivations and role changes made through the API replace
+# AUTH_INVALIDATION_FILE (defaults to the temp dir), which every worker process
+# on the host checks per request to drop its cached users. Workers on other
+# hosts, and changes made outside the API, are only picked up after the TTL.
+AUTH_CACHE_TTL_SECONDS = int(os.getenv("AUTH_CACHE_TTL_SECONDS", 60))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", 2048))
+AUTH_INVALIDATION_FILE = os.getenv("AUTH_INVALIDATION_FILE")
+
+# Limits for teacher marks uploads (Excel): file size and number of data rows
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 10 * 1024 * 1024))
+MAX_UPLOAD_ROWS = int(os.getenv("MAX_UPLOAD_ROWS", 20000))
+
+# Background upload jobs (upload-apply?async=1): uploads and job status files
+# are stored in UPLOAD_JOB_DIR (defaults to the temp dir; must be shared by all
+# worker processes so any of them can answer a poll) and applied by a worker
+# thread (set UPLOAD_JOBS_ASYNC=false to process them inline)
+UPLOAD_JOBS_ASYNC = os.getenv("UPLOAD_JOBS_ASYNC", "True").lower() == "true"
+UPLOAD_JOB_DIR = os.getenv("UPLOAD_JOB_DIR")
+
+# Previewed uploads (from-excel) are staged in UPLOAD_STAGING_DIR (defaults to
+# the temp dir) so upload-apply can commit them by token without re-parsing
+UPLOAD_STAGING_TTL_SECONDS = int(os.getenv("UPLOAD_STAGING_TTL_SECONDS", 1800))
+UPLOAD_STAGING_DIR = os.getenv("UPLOAD_STAGING_DIR")
+
+# Generated Excel exports are kept in memory up to this size, then spooled to a temp file
+EXPORT_SPOOL_MAX_BYTES = int(os.getenv("EXPORT_SPOOL_MAX_BYTES", 8 * 1024 * 1024))
+
+# Division exports are cached on disk in EXPORT_CACHE_DIR (defaults to the temp
+# dir) keyed by data version; least recently used files are evicted beyond
+# EXPORT_CACHE_MAX_BYTES (0 disables the cache). Each worker process keeps its
+# own cache in a subdirectory, so the bound applies per process.
+EXPORT_CACHE_DIR = os.getenv("EXPORT_CACHE_DIR")
+EXPORT_CACHE_MAX_BYTES = int(os.getenv("EXPORT_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+# Worker processes for division batch PDF marksheets (0 = one per CPU)
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", 0))
+
+# Cache-Control max-age (seconds) for static master data such as /subjects
+MASTER_DATA_MAX_AGE_SECONDS = int(os.getenv("MASTER_DATA_MAX_AGE_SECONDS", 300))
+
 # Optional Config class (USES SAME URI)
 class Config:
     SECRET_KEY = SECRET_KEY
     SQLALCHEMY_DATABASE_URI = SQLALCHEMY_DATABASE_URI
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    RESULT_RECOMPUTE_ASYNC = RESULT_RECOMPUTE_ASYNC
+    RESULT_RECOMPUTE_DEBOUNCE_SECONDS = RESULT_RECOMPUTE_DEBOUNCE_SECONDS
+    RESULT_RECOMPUTE_MAX_DELAY_SECONDS = RESULT_RECOMPUTE_MAX_DELAY_SECONDS
+    RESULT_LOCK_TIMEOUT_SECONDS = RESULT_LOCK_TIMEOUT_SECONDS
+    RESULT_LOCK_DIR = RESULT_LOCK_DIR
+    MASTER_DATA_MAX_AGE_SECONDS = MASTER_DATA_MAX_AGE_SECONDS
+    AUTH_CACHE_TTL_SECONDS = AUTH_CACHE_TTL_SECONDS
+    AUTH_INVALIDATION_FILE = AUTH_INVALIDATION_FILE
+    MAX_UPLOAD_BYTES = MAX_UPLOAD_BYTES
+    MAX_UPLOAD_ROWS = MAX_UPLOAD_ROWS
+    UPLOAD_JOBS_ASYNC = UPLOAD_JOBS_ASYNC
+    UPLOAD_JOB_DIR = UPLOAD_JOB_DIR
+    UPLOAD_STAGING_TTL_SECONDS = UPLOAD_STAGING_TTL_SECONDS
+    UPLOAD_STAGING_DIR = UPLOAD_STAGING_DIR
+    EXPORT_SPOOL_MAX_BYTES = EXPORT_SPOOL_MAX_BYTES
+    EXPORT_CACHE_DIR = EXPORT_CACHE_DIR
+    EXPORT_CACHE_MAX_BYTES = EXPORT_CACHE_MAX_BYTES
+    PDF_RENDER_WORKERS = PDF_RENDER_WORKERS
+    AUTH_CACHE_MAX_ENTRIES = AUTH_CACHE_MAX_ENTRIES
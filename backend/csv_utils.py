@@ -1,46 +1,70 @@
 # backend/csv_utils.py
 """
 Utilities for exporting data to CSV format
+
+CSV responses are streamed: rows are consumed lazily and sent as encoded
+chunks, so an export can start downloading before (and without) the whole
+file being held in memory.
 """
 import csv
 from io import StringIO
-from flask import make_response
+from flask import Response, stream_with_context
 from datetime import datetime
 
+# rows encoded per streamed chunk
+CSV_CHUNK_ROWS = 500
+
+
+def iter_csv(headers, rows, chunk_rows=CSV_CHUNK_ROWS):
+    """
+    Yield a CSV file as UTF-8 encoded chunks: the header line first, then
+    ``chunk_rows`` rows at a time. ``rows`` may be any iterable of dicts
+    (keyed by header) or lists and is consumed lazily.
+    """
+    buf = StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(headers)
+    yield buf.getvalue().encode("utf-8")
+    buf.seek(0)
+    buf.truncate()
+
+    pending = 0
+    for row in rows:
+        if isinstance(row, dict):
+            row = [row.get(header, "") for header in headers]
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_rows:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+            pending = 0
+    if pending:
+        yield buf.getvalue().encode("utf-8")
+
+
 def generate_csv_response(filename, headers, rows):
     """
-    Generate a CSV response for download
+    Generate a streamed CSV response for download
     
     Args:
         filename: Name of the file to download
         headers: List of column headers
-        rows: List of rows, where each row is a dict or list
+        rows: Iterable of rows, where each row is a dict or list; it is
+            consumed while the response is sent, inside the request context
+            (so it may iterate a database cursor)
     
     Returns:
         Flask response with CSV file
     """
-    si = StringIO()
-    writer = csv.writer(si)
-    
-    # Write headers
-    writer.writerow(headers)
-    
-    # Write rows
-    if rows and isinstance(rows[0], dict):
-        for row in rows:
-            writer.writerow([row.get(header, "") for header in headers])
-    else:
-        writer.writerows(rows)
-    
-    output = make_response(si.getvalue())
+    output = Response(stream_with_context(iter_csv(headers, rows)), mimetype="text/csv")
     output.headers["Content-Disposition"] = f"attachment; filename={filename}"
-    output.headers["Content-Type"] = "text/csv"
     return output
 
 def export_teachers_csv(teachers):
-    """Export teachers list to CSV"""
+    """Export teachers list to CSV (``teachers`` may be a query; rows are streamed)"""
     headers = ["Teacher ID", "Name", "User ID", "Subject", "Email", "Active", "Created At"]
-    rows = [
+    rows = (
         [
             t.teacher_id,
             t.name,
@@ -51,7 +75,7 @@ def export_teachers_csv(teachers):
             t.created_at.isoformat() if t.created_at else ""
         ]
         for t in teachers
-    ]
+    )
     return generate_csv_response(
         f"teachers_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
         headers,
@@ -62,7 +86,7 @@ def export_teachers_csv(teachers):
 def export_marks_csv(marks_data):
     """Export marks data to CSV"""
     headers = ["Student ID", "Roll No", "Name", "Subject", "Exam Type", "Score", "Max Marks", "Entered By", "Entered At"]
-    rows = [
+    rows = (
         [
             m.get("student_id", ""),
             m.get("roll_no", ""),
@@ -75,7 +99,7 @@ def export_marks_csv(marks_data):
             m.get("entered_at", "")
         ]
         for m in marks_data
-    ]
+    )
     return generate_csv_response(
         f"marks_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
         headers,
@@ -85,7 +109,7 @@ def export_marks_csv(marks_data):
 def export_students_csv(students_data):
     """Export students list to CSV"""
     headers = ["Student ID", "Roll No", "Name", "DOB", "Class Year", "Section", "Created At"]
-    rows = [
+    rows = (
         [
             s.get("student_id", ""),
             s.get("roll_no", ""),
@@ -96,7 +120,7 @@ def export_students_csv(students_data):
             s.get("created_at", "")
         ]
         for s in students_data
-    ]
+    )
     return generate_csv_response(
         f"students_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
         headers,
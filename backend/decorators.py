@@ -13,20 +13,29 @@ from errors import ValidationError as AppValidationError
 pagination_schema = PaginationSchema()
 
 # ======================================================
-# PAGINATION DECORATOR (UNCHANGED)
+# PAGINATION DECORATOR
 # ======================================================
 def paginated(f):
-    """Decorator to add pagination to list endpoints."""
+    """
+    Decorator to add pagination to list endpoints.
+    Passes page/limit/search/cursor to the view; ``limit`` is None unless the
+    client asked for a page (limit or cursor given), so existing callers that
+    expect the full list keep getting it.
+    """
     @wraps(f)
     def decorated_function(*args, **kwargs):
         try:
             # Normalize query args to single (flat) values for marshmallow
             raw = request.args.to_dict(flat=False)
             args_map = {k: (v[0] if isinstance(v, list) and v else v) for k, v in raw.items()}
+            # only validate pagination fields; endpoints read their own filters
+            args_map = {k: v for k, v in args_map.items() if k in pagination_schema.fields}
             pagination_data = cast(Dict[str, Any], pagination_schema.load(args_map))
+            wants_page = "limit" in args_map or "cursor" in args_map
             kwargs["page"] = pagination_data.get("page", 1)
-            kwargs["limit"] = pagination_data.get("limit", 10)
-            kwargs["search"] = pagination_data.get("search")
+            kwargs["limit"] = pagination_data.get("limit", 10) if wants_page else None
+            kwargs["search"] = pagination_data.get("search") or None
+            kwargs["cursor"] = pagination_data.get("cursor") or None
             return f(*args, **kwargs)
         except ValidationError as err:
             raise AppValidationError(
@@ -0,0 +1,37 @@
+# backend/http_cache.py
+"""
+Helpers for conditional GET (ETag / If-None-Match) on read endpoints.
+
+Handlers compute a cheap validator (a division data version, or a max
+updated_at) before building any rows, return `not_modified()` when the
+client already holds that version, and tag the full response otherwise.
+"""
+import hashlib
+from flask import request, make_response
+
+
+def make_etag(*parts):
+    """Strong ETag value derived from the endpoint, its query string and the given version parts."""
+    raw = "|".join(str(p) for p in (request.endpoint, request.query_string.decode("utf-8", "replace"), *parts))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def not_modified(etag, cache_control="private, no-cache"):
+    """
+    Return a 304 response if the request's If-None-Match matches ``etag``,
+    otherwise None so the handler builds the full response.
+    """
+    if not request.if_none_match.contains(etag):
+        return None
+    response = make_response("", 304)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = cache_control
+    return response
+
+
+def with_etag(rv, etag, cache_control="private, no-cache"):
+    """Attach the ETag and Cache-Control headers to a handler's return value."""
+    response = make_response(rv)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = cache_control
+    return response
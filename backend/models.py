@@ -55,7 +55,7 @@ class Subject(db.Model):
 class Teacher(db.Model, UserMixin):
     __tablename__ = "teachers"
     teacher_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    name = db.Column(db.String(200), nullable=False)
+    name = db.Column(db.String(200), nullable=False, index=True)
     userid = db.Column(db.String(120), unique=True, nullable=False, index=True)
     password_hash = db.Column(db.String(255), nullable=False)
     email = db.Column(db.String(200))
@@ -152,6 +152,9 @@ class Student(db.Model):
 
     __table_args__ = (
         db.UniqueConstraint("roll_no", "division", name="uq_roll_division"),
+        # keyset pagination / prefix search within a division
+        db.Index("ix_students_division_roll", "division", "roll_no"),
+        db.Index("ix_students_division_name", "division", "name"),
     )
 
 # =====================================================
@@ -161,7 +164,7 @@ class Mark(db.Model):
     __tablename__ = "marks"
     mark_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     roll_no = db.Column(db.String(50), nullable=False, index=True)
-    division = db.Column(db.String(10), nullable=False)
+    division = db.Column(db.String(10), nullable=False, index=True)
     subject_id = db.Column(db.Integer, db.ForeignKey("subjects.subject_id", ondelete="CASCADE"), nullable=False)
 
     unit1 = db.Column(db.Float, default=0.0)
@@ -195,7 +198,7 @@ class Result(db.Model):
     result_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     roll_no = db.Column(db.String(50), nullable=False, index=True)
     name = db.Column(db.String(200))
-    division = db.Column(db.String(10), nullable=False)
+    division = db.Column(db.String(10), nullable=False, index=True)
 
     # Final subject averages (out of 100)
     eng_avg = db.Column(db.Float)
@@ -237,6 +240,24 @@ class Result(db.Model):
         return f"<Result roll={self.roll_no} div={self.division}>"
 
 
+# =====================================================
+# DIVISION DATA VERSIONS (RESULT STALENESS TRACKING)
+# =====================================================
+class DivisionVersion(db.Model):
+    __tablename__ = "division_versions"
+    division = db.Column(db.String(10), primary_key=True)
+
+    # Bumped whenever marks, students or allocations of the division change
+    data_version = db.Column(db.Integer, default=0, nullable=False)
+    # data_version the stored Result rows were last computed from
+    results_version = db.Column(db.Integer)
+
+    updated_at = db.Column(db.DateTime, default=now, onupdate=now, nullable=False)
+
+    def __repr__(self):
+        return f"<DivisionVersion div={self.division} data={self.data_version} results={self.results_version}>"
+
+
 # # =====================================================
 # # PERMISSIONS
 # # =====================================================
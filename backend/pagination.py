@@ -0,0 +1,89 @@
+# backend/pagination.py
+"""
+Keyset (cursor) pagination and prefix search for list endpoints.
+
+Pages are fetched with ``WHERE key > :last ORDER BY key LIMIT :n`` so the
+cost of a page does not grow with its position. The cursor handed back to
+clients (``X-Next-Cursor`` header) is the opaque, url-safe encoding of the
+last key on the page and the number of rows before the next page (so
+listings can number rows without counting them); the response body stays a
+plain JSON array.
+"""
+import base64
+import binascii
+import json
+from app import db
+from errors import ValidationError as AppValidationError
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(key, offset):
+    raw = json.dumps([key, offset], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def decode_cursor(cursor):
+    """
+    Return the (key, offset) encoded in ``cursor``, ((None, 0) when no cursor
+    was given). Anything but a string/integer key and a non-negative offset
+    is rejected.
+    """
+    if not cursor:
+        return None, 0
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, binascii.Error, UnicodeError):
+        raise AppValidationError("Invalid cursor")
+    if not isinstance(value, list) or len(value) != 2:
+        raise AppValidationError("Invalid cursor")
+    key, offset = value
+    if not (isinstance(key, str) or _is_int(key)) or not _is_int(offset) or offset < 0:
+        raise AppValidationError("Invalid cursor")
+    return key, offset
+
+
+def prefix_filter(search, *columns):
+    """``col LIKE 'search%'`` on any of ``columns`` (index-friendly prefix match)."""
+    escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return db.or_(*(c.like(f"{escaped}%", escape="\\") for c in columns))
+
+
+def keyset_page(query, column, cursor=None, limit=None, with_offset=False):
+    """
+    Order ``query`` by the unique ``column`` and return ``(items, next_cursor)``,
+    or ``(items, next_cursor, offset)`` with ``with_offset``, offset being the
+    number of rows before this page as carried by the cursor.
+    Without a limit every remaining row is returned and next_cursor is None.
+    """
+    after, offset = decode_cursor(cursor)
+    if after is not None:
+        # the key must match the column (e.g. no string cursor for an integer id)
+        if not isinstance(after, column.type.python_type):
+            raise AppValidationError("Invalid cursor")
+        query = query.filter(column > after)
+    query = query.order_by(column)
+    if limit is None:
+        items, next_cursor = query.all(), None
+    else:
+        # one extra row tells us whether another page exists
+        items = query.limit(limit + 1).all()
+        if len(items) <= limit:
+            next_cursor = None
+        else:
+            items = items[:limit]
+            next_cursor = encode_cursor(getattr(items[-1], column.key), offset + limit)
+    if with_offset:
+        return items, next_cursor, offset
+    return items, next_cursor
+
+
+def with_next_cursor(response, next_cursor):
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
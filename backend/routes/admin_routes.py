@@ -4,7 +4,7 @@ from flask import Blueprint, request, jsonify
 from sqlalchemy.exc import IntegrityError
 
 from app import db
-from typing import Any, Dict, Optional, cast
+from typing import Any, Dict, cast
 from auth import generate_token
 from models import (
     Teacher,
@@ -13,25 +13,29 @@ from models import (
     TeacherSubjectAllocation
 )
 from schemas import StudentSchema
-from auth import token_required
-from decorators import admin_required
-from services.result_service import generate_results_for_division
-from models import Result, Subject, Mark
-from flask import send_file
+from auth import token_required, invalidate_principal, auth_cache_stats
+from decorators import admin_required, paginated
+from http_cache import make_etag, not_modified, with_etag
+from csv_utils import generate_csv_response
+from pagination import keyset_page, prefix_filter, with_next_cursor
+from services.result_service import (
+    generate_results_for_division, ensure_results_current, grade_for_annual, RESULT_VALUE_FIELDS
+)
+from services.result_read_model import load_read_model, load_division_page
+from services.master_excel_index import master_excel_index
+from services.division_version import bump_data_version, get_data_version
+from services.recompute_queue import recompute_queue
+from services import excel_export
+from services.excel_export import (
+    new_workbook, styled, styled_row, merge, send_workbook, send_cached_export, send_cached_workbook
+)
+from services.export_data import load_export_data, export_version, iter_student_marks, iter_results
+from services.artifact_cache import export_cache
+from services import marksheet_pdf
+from models import Result
+from flask import send_file, current_app, Response
 from io import BytesIO
 
-letter: Optional[Any] = None
-canvas_module: Optional[Any] = None
-try:
-    import importlib
-    _rl_pages = importlib.import_module('reportlab.lib.pagesizes')
-    _rl_canvas = importlib.import_module('reportlab.pdfgen.canvas')
-    letter = getattr(_rl_pages, 'letter', None)
-    canvas_module = _rl_canvas
-except Exception:
-    letter = None
-    canvas_module = None
-
 from werkzeug.security import generate_password_hash
 
 
@@ -56,6 +60,7 @@ def add_student(user_id=None, user_type=None):
 
     try:
         db.session.add(student)
+        bump_data_version(student.division)
         db.session.commit()
     except IntegrityError:
         db.session.rollback()
@@ -70,22 +75,33 @@ def add_student(user_id=None, user_type=None):
 @admin_bp.route("/students", methods=["GET"])
 @token_required
 @admin_required
-def list_students(user_id=None, user_type=None):
+@paginated
+def list_students(user_id=None, user_type=None, page=1, limit=None, search=None, cursor=None):
     """
     List students by division (admin only)
+    Optional: search (roll_no/name prefix), limit + cursor (keyset pages by roll_no)
     """
     division = request.args.get("division")
     if not division:
         return {"error": "division is required"}, 400
 
-    students = (
-        Student.query
-        .filter_by(division=division)
-        .order_by(Student.roll_no)
-        .all()
+    # students can also be seeded outside the API, so validate on the rows themselves
+    count, last_updated = (
+        db.session.query(db.func.count(Student.student_id), db.func.max(Student.updated_at))
+        .filter(Student.division == division)
+        .one()
     )
+    etag = make_etag(division, count, last_updated)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    query = Student.query.filter_by(division=division)
+    if search:
+        query = query.filter(prefix_filter(search, Student.roll_no, Student.name))
+    students, next_cursor = keyset_page(query, Student.roll_no, cursor, limit)
 
-    return jsonify([
+    response = with_etag(jsonify([
         {
             "roll_no": s.roll_no,
             "name": s.name,
@@ -94,7 +110,8 @@ def list_students(user_id=None, user_type=None):
             "optional_subject_2": s.optional_subject_2
         }
         for s in students
-    ]), 200
+    ]), etag)
+    return with_next_cursor(response, next_cursor)
 
 
 # ======================================================
@@ -122,6 +139,7 @@ def allocate_teacher(user_id=None, user_type=None):
 
     try:
         db.session.add(allocation)
+        bump_data_version(division)
         db.session.commit()
     except IntegrityError:
         db.session.rollback()
@@ -141,6 +159,7 @@ def delete_allocation(allocation_id, user_id=None, user_type=None):
 
     try:
         db.session.delete(alloc)
+        bump_data_version(alloc.division)
         db.session.commit()
         return {"message": "Allocation deleted"}, 200
     except Exception as ex:
@@ -156,25 +175,36 @@ def delete_allocation(allocation_id, user_id=None, user_type=None):
 @admin_required
 def list_allocations(user_id=None, user_type=None):
     """
-    List all teacher-subject allocations (admin only)
+    List teacher-subject allocations (admin only)
+    Optional filters: teacher_id, division
     """
-    allocations = TeacherSubjectAllocation.query.all()
-
-    result = []
-    for a in allocations:
-        teacher = Teacher.query.get(a.teacher_id)
-        subj = Subject.query.get(a.subject_id)
-        result.append({
-            "allocation_id": a.allocation_id,
-            "teacher_id": a.teacher_id,
-            "teacher_name": teacher.name if teacher else None,
-            "subject_id": a.subject_id,
-            "subject_code": subj.subject_code if subj else None,
-            "subject_name": subj.subject_name if subj else None,
-            "division": a.division
-        })
+    teacher_id = request.args.get("teacher_id")
+    division = request.args.get("division")
+
+    # one joined query instead of a teacher + subject lookup per allocation
+    query = (
+        db.select(
+            TeacherSubjectAllocation.allocation_id,
+            TeacherSubjectAllocation.teacher_id,
+            Teacher.name.label("teacher_name"),
+            TeacherSubjectAllocation.subject_id,
+            Subject.subject_code,
+            Subject.subject_name,
+            TeacherSubjectAllocation.division,
+        )
+        .outerjoin(Teacher, Teacher.teacher_id == TeacherSubjectAllocation.teacher_id)
+        .outerjoin(Subject, Subject.subject_id == TeacherSubjectAllocation.subject_id)
+        .order_by(TeacherSubjectAllocation.allocation_id)
+    )
+    if teacher_id:
+        try:
+            query = query.where(TeacherSubjectAllocation.teacher_id == int(teacher_id))
+        except ValueError:
+            return {"error": "teacher_id must be an integer"}, 400
+    if division:
+        query = query.where(TeacherSubjectAllocation.division == division)
 
-    return jsonify(result), 200
+    return jsonify([dict(row._mapping) for row in db.session.execute(query)]), 200
 
 
 # ======================================================
@@ -196,6 +226,39 @@ def generate_results(user_id=None, user_type=None):
     return {"message": f"Results generated for division {division}"}, 200
 
 
+@admin_bp.route("/results/jobs", methods=["GET"])
+@token_required
+@admin_required
+def list_result_jobs(user_id=None, user_type=None):
+    """
+    Status of background result recomputation: pending divisions/students,
+    the running batch and recent jobs (admin only)
+    """
+    return jsonify(recompute_queue.status()), 200
+
+
+@admin_bp.route("/results/jobs/<int:job_id>", methods=["GET"])
+@token_required
+@admin_required
+def get_result_job(job_id, user_id=None, user_type=None):
+    job = recompute_queue.get_job(job_id)
+    if not job:
+        return {"error": "Job not found"}, 404
+    return jsonify(job), 200
+
+
+@admin_bp.route("/stats/caches", methods=["GET"])
+@token_required
+@admin_required
+def cache_stats(user_id=None, user_type=None):
+    """Size, build time and hit/miss counters of in-process caches (admin only)"""
+    return jsonify({
+        "master_excel": master_excel_index.stats(),
+        "exports": export_cache.stats(),
+        "auth": auth_cache_stats(),
+    }), 200
+
+
 # ======================================================
 # 6️⃣ Get available divisions (admin)
 # ======================================================
@@ -215,7 +278,8 @@ def list_divisions(user_id=None, user_type=None):
 @admin_bp.route("/results", methods=["GET"])
 @token_required
 @admin_required
-def fetch_results(user_id=None, user_type=None):
+@paginated
+def fetch_results(user_id=None, user_type=None, page=1, limit=None, search=None, cursor=None):
     roll_no = request.args.get("roll_no")
     division = request.args.get("division")
 
@@ -228,79 +292,29 @@ def fetch_results(user_id=None, user_type=None):
         if not students:
             return {"error": "Student not found"}, 404
 
-        # Ensure results are generated for involved divisions
-        for s in students:
+        # Ensure results are current for involved divisions
+        for d in {s.division for s in students}:
             try:
-                generate_results_for_division(s.division)
+                ensure_results_current(d)
             except Exception:
                 pass
 
         # Build rows for each matching student (usually one)
         rows = []
-        # Prefer master Excel file data if available
-        from config import MASTER_EXCEL_PATH, MASTER_EXCEL_SHEET
-        use_excel = False
-        try:
-            import os
-            if os.path.exists(MASTER_EXCEL_PATH):
-                use_excel = True
-        except Exception:
-            use_excel = False
+        view = load_read_model(students)
         for s in students:
-            # If a master Excel exists, try to read detailed marks from it for this roll
+            # If a master Excel exists, prefer its detailed marks for this roll
             excel_marks = None
-            if use_excel:
-                try:
-                    import openpyxl, io
-                    data = openpyxl.load_workbook(MASTER_EXCEL_PATH, data_only=True)
-                    if MASTER_EXCEL_SHEET in data.sheetnames:
-                        sh = data[MASTER_EXCEL_SHEET]
-                        # build header map
-                        it = sh.iter_rows(values_only=True)
-                        headers = [str(x).strip().lower() if x is not None else '' for x in next(it)]
-                        def idx_of(names):
-                            for n in names:
-                                if n in headers:
-                                    return headers.index(n)
-                            return None
-                        r_idx = idx_of(['roll_no', 'roll', 'rollno'])
-                        d_idx = idx_of(['division', 'div'])
-                        # subject column may be subject code
-                        subj_idx = idx_of(['subject', 'subject_code', 'subject_id'])
-                        u1_idx = idx_of(['unit1'])
-                        u2_idx = idx_of(['unit2'])
-                        term_idx = idx_of(['term'])
-                        annual_idx = idx_of(['annual'])
-                        grace_idx = idx_of(['grace'])
-                        for row in it:
-                            if not row or all(c is None for c in row):
-                                continue
-                            rv = row[r_idx] if r_idx is not None and r_idx < len(row) else None
-                            dv = row[d_idx] if d_idx is not None and d_idx < len(row) else None
-                            if rv is None:
-                                continue
-                            if str(rv).strip() == str(s.roll_no).strip() and (not division or (dv and str(dv).strip() == str(s.division).strip())):
-                                # found matching excel row
-                                excel_marks = {
-                                    'unit1': row[u1_idx] if u1_idx is not None and u1_idx < len(row) else None,
-                                    'unit2': row[u2_idx] if u2_idx is not None and u2_idx < len(row) else None,
-                                    'term': row[term_idx] if term_idx is not None and term_idx < len(row) else None,
-                                    'annual': row[annual_idx] if annual_idx is not None and annual_idx < len(row) else None,
-                                    'grace': row[grace_idx] if grace_idx is not None and grace_idx < len(row) else None,
-                                }
-                                break
-                except Exception:
-                    excel_marks = None
-
-            result = Result.query.filter_by(roll_no=s.roll_no, division=s.division).first()
+            try:
+                excel_row = master_excel_index.lookup(s.roll_no, s.division if division else None)
+                if excel_row is not None:
+                    excel_marks = excel_row._asdict()
+            except Exception:
+                excel_marks = None
+
+            result = view.result_for(s)
             # If result is missing, fall back to available Marks so UI can show partial data
-            marks = Mark.query.filter_by(roll_no=s.roll_no, division=s.division).all()
-            subjects_map = {sub.subject_id: sub.subject_code for sub in Subject.query.all()}
-            mark_map = {}
-            for m in marks:
-                code = subjects_map.get(m.subject_id)
-                if code:
-                    mark_map[code] = m
+            mark_map = view.marks_for(s)
 
             subject_entries = []
             total_avg = 0
@@ -353,43 +367,13 @@ def fetch_results(user_id=None, user_type=None):
                 })
 
             # EVS and PE (grade-only) — prefer grades from Result, fall back to marks
-            if result and getattr(result, 'evs_grade', None) is not None:
-                subject_entries.append({"code": "EVS", "grade": result.evs_grade})
-            else:
-                m = mark_map.get('EVS')
-                if m and m.annual is not None:
-                    a = m.annual
-                    grade = None
-                    if a >= 75:
-                        grade = 'A+'
-                    elif a >= 60:
-                        grade = 'A'
-                    elif a >= 50:
-                        grade = 'B'
-                    elif a >= 35:
-                        grade = 'C'
-                    else:
-                        grade = 'F'
-                    subject_entries.append({"code": "EVS", "grade": grade, "mark": {"annual": m.annual, "mark_id": m.mark_id, "unit1": m.unit1, "unit2": m.unit2, "term": m.term, "tot": m.tot, "sub_avg": m.sub_avg, "grace": m.grace}})
-
-            if result and getattr(result, 'pe_grade', None) is not None:
-                subject_entries.append({"code": "PE", "grade": result.pe_grade})
-            else:
-                m = mark_map.get('PE')
-                if m and m.annual is not None:
-                    a = m.annual
-                    grade = None
-                    if a >= 75:
-                        grade = 'A+'
-                    elif a >= 60:
-                        grade = 'A'
-                    elif a >= 50:
-                        grade = 'B'
-                    elif a >= 35:
-                        grade = 'C'
-                    else:
-                        grade = 'F'
-                    subject_entries.append({"code": "PE", "grade": grade, "mark": {"annual": m.annual, "mark_id": m.mark_id, "unit1": m.unit1, "unit2": m.unit2, "term": m.term, "tot": m.tot, "sub_avg": m.sub_avg, "grace": m.grace}})
+            for code, grade_field in (("EVS", "evs_grade"), ("PE", "pe_grade")):
+                if result and getattr(result, grade_field, None) is not None:
+                    subject_entries.append({"code": code, "grade": getattr(result, grade_field)})
+                else:
+                    m = mark_map.get(code)
+                    if m and m.annual is not None:
+                        subject_entries.append({"code": code, "grade": grade_for_annual(m.annual), "mark": {"annual": m.annual, "mark_id": m.mark_id, "unit1": m.unit1, "unit2": m.unit2, "term": m.term, "tot": m.tot, "sub_avg": m.sub_avg, "grace": m.grace}})
 
             for code, field in {"HINDI": "hindi", "IT": "it", "MATHS": "maths", "SP": "sp"}.items():
                 include = False
@@ -456,25 +440,26 @@ def fetch_results(user_id=None, user_type=None):
     if not division:
         return {"error": "division or roll_no is required"}, 400
 
-    # regenerate results for the division
+    # validator is read before any recompute/row building (see teacher complete-table)
+    etag = make_etag(division, get_data_version(division))
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    # recompute results only if the division's data changed
+    fresh = True
     try:
-        generate_results_for_division(division)
+        ensure_results_current(division)
     except Exception:
-        pass
+        fresh = False
 
-    # Build rows for entire division
-    students = Student.query.filter_by(division=division).order_by(Student.roll_no).all()
+    # Build rows for the division (or one keyset page of it) from one bulk-loaded read model
+    view, next_cursor, offset = load_division_page(division, search, cursor, limit)
     rows = []
-    for idx, s in enumerate(students, start=1):
-        result = Result.query.filter_by(roll_no=s.roll_no, division=s.division).first()
-        # Prepare mark map to allow partial display when Result row missing
-        marks = Mark.query.filter_by(roll_no=s.roll_no, division=s.division).all()
-        subjects_map = {sub.subject_id: sub.subject_code for sub in Subject.query.all()}
-        mark_map = {}
-        for m in marks:
-            code = subjects_map.get(m.subject_id)
-            if code:
-                mark_map[code] = m
+    for idx, s in enumerate(view.students, start=offset + 1):
+        result = view.result_for(s)
+        # mark map allows partial display when Result row missing
+        mark_map = view.marks_for(s)
 
         subject_entries = []
         total_avg = 0
@@ -535,43 +520,13 @@ def fetch_results(user_id=None, user_type=None):
 
                 subject_entries.append({"code": code, "avg": avg, "grace": grace, "final": final})
         # EVS and PE (grade-only) — append once after optional subjects
-        if result and getattr(result, 'evs_grade', None) is not None:
-            subject_entries.append({"code": "EVS", "grade": result.evs_grade})
-        else:
-            m = mark_map.get('EVS')
-            if m and m.annual is not None:
-                a = m.annual
-                grade = None
-                if a >= 75:
-                    grade = 'A+'
-                elif a >= 60:
-                    grade = 'A'
-                elif a >= 50:
-                    grade = 'B'
-                elif a >= 35:
-                    grade = 'C'
-                else:
-                    grade = 'F'
-                subject_entries.append({"code": "EVS", "grade": grade, "mark": {"annual": m.annual, "mark_id": m.mark_id, "unit1": m.unit1, "unit2": m.unit2, "term": m.term, "tot": m.tot, "sub_avg": m.sub_avg, "grace": m.grace}})
-
-        if result and getattr(result, 'pe_grade', None) is not None:
-            subject_entries.append({"code": "PE", "grade": result.pe_grade})
-        else:
-            m = mark_map.get('PE')
-            if m and m.annual is not None:
-                a = m.annual
-                grade = None
-                if a >= 75:
-                    grade = 'A+'
-                elif a >= 60:
-                    grade = 'A'
-                elif a >= 50:
-                    grade = 'B'
-                elif a >= 35:
-                    grade = 'C'
-                else:
-                    grade = 'F'
-                subject_entries.append({"code": "PE", "grade": grade, "mark": {"annual": m.annual, "mark_id": m.mark_id, "unit1": m.unit1, "unit2": m.unit2, "term": m.term, "tot": m.tot, "sub_avg": m.sub_avg, "grace": m.grace}})
+        for code, grade_field in (("EVS", "evs_grade"), ("PE", "pe_grade")):
+            if result and getattr(result, grade_field, None) is not None:
+                subject_entries.append({"code": code, "grade": getattr(result, grade_field)})
+            else:
+                m = mark_map.get(code)
+                if m and m.annual is not None:
+                    subject_entries.append({"code": code, "grade": grade_for_annual(m.annual), "mark": {"annual": m.annual, "mark_id": m.mark_id, "unit1": m.unit1, "unit2": m.unit2, "term": m.term, "tot": m.tot, "sub_avg": m.sub_avg, "grace": m.grace}})
 
         final_total = None
         if subject_entries:
@@ -590,7 +545,9 @@ def fetch_results(user_id=None, user_type=None):
             "percentage": getattr(result, "percentage", None) if result else None,
         })
 
-    return jsonify(rows), 200
+    if not fresh:
+        return with_next_cursor(jsonify(rows), next_cursor)
+    return with_next_cursor(with_etag((jsonify(rows), 200), etag), next_cursor)
 
 
 @admin_bp.route('/excel/master', methods=['GET'])
@@ -623,32 +580,19 @@ def download_student_excel(user_id=None, user_type=None):
     if not student:
         return {"error": "Student not found"}, 404
 
-    # Prepare per-subject rows: iterate through all subjects student takes
-    all_subjects = Subject.query.filter_by(active=True).order_by(Subject.subject_code).all()
-    include_codes = set()
-    for s in all_subjects:
-        if s.subject_type == 'CORE':
-            include_codes.add(s.subject_code)
-    if student.optional_subject:
-        include_codes.add(student.optional_subject)
-    if student.optional_subject_2:
-        include_codes.add(student.optional_subject_2)
-
-    subjects = [s for s in all_subjects if s.subject_code in include_codes]
+    # Subjects the student takes and their marks (one joined query)
+    data = load_export_data([student])
 
     # Build rows
     rows = []
-    for s in subjects:
-        m = Mark.query.filter_by(roll_no=roll_no, division=division, subject_id=s.subject_id).first()
-        teacher_name = None
-        if m and m.entered_by:
-            t = Teacher.query.get(m.entered_by)
-            teacher_name = t.name if t else None
+    for code in data.subject_codes_for(student):
+        m = data.mark(student, code)
+        teacher_name = m.teacher_name if m else None
 
         rows.append({
             'roll_no': roll_no,
             'student_name': student.name,
-            'subject': s.subject_code,
+            'subject': code,
             'division': division,
             'unit1': m.unit1 if m else None,
             'unit2': m.unit2 if m else None,
@@ -663,12 +607,10 @@ def download_student_excel(user_id=None, user_type=None):
 
     # Create Excel
     try:
-        from openpyxl import Workbook
-        wb = Workbook()
-        ws = cast(Any, wb.active)
-        ws.title = 'Marks'
+        wb = new_workbook()
+        ws = wb.create_sheet('Marks')
         headers = ['Roll', 'Student Name', 'Subject', 'Division', 'Unit1', 'Unit2', 'Term', 'Annual', 'Tot', 'Sub_Avg', 'Grace', 'Final', 'Entered By']
-        ws.append(headers)
+        ws.append(styled_row(ws, headers, excel_export.HEADER))
         for r in rows:
             ws.append([
                 r['roll_no'],
@@ -686,11 +628,8 @@ def download_student_excel(user_id=None, user_type=None):
                 r['entered_by'] or ''
             ])
 
-        bio = BytesIO()
-        wb.save(bio)
-        bio.seek(0)
         filename = f"student_{roll_no}_{division}.xlsx"
-        return send_file(bio, download_name=filename, as_attachment=True)
+        return send_workbook(wb, filename)
     except Exception as ex:
         return {"error": "Failed to generate Excel", "details": str(ex)}, 500
 
@@ -719,38 +658,26 @@ def download_complete_excel(user_id=None, user_type=None):
     else:
         if not division:
             return {"error": "division or roll_no is required"}, 400
+        # whole-division exports are served from the artifact cache while unchanged
+        cache_key = ('complete', division, *export_version(division))
+        cached = send_cached_export(cache_key, f'complete_results_{division}.xlsx')
+        if cached is not None:
+            return cached
         students = Student.query.filter_by(division=division).order_by(Student.roll_no).all()
         if not students:
             return {"error": "No students found for division"}, 404
 
-    all_subjects = Subject.query.filter_by(active=True).order_by(Subject.subject_code).all()
-
     rows = []
-    # Ensure results are generated for each involved division
-    try:
-        divisions = set(s.division for s in students)
-        for d in divisions:
-            try:
-                generate_results_for_division(d)
-            except Exception:
-                pass
-    except Exception:
-        pass
+    # Ensure results are current for each involved division
+    for d in set(s.division for s in students):
+        try:
+            ensure_results_current(d)
+        except Exception:
+            pass
+    data = load_export_data(students, division=None if roll_no else division)
     for s in students:
-        include_codes = set()
-        for sub in all_subjects:
-            if sub.subject_type == 'CORE':
-                include_codes.add(sub.subject_code)
-        if s.optional_subject:
-            include_codes.add(s.optional_subject)
-        if s.optional_subject_2:
-            include_codes.add(s.optional_subject_2)
-
-        for code in sorted(include_codes):
-            subj = next((x for x in all_subjects if x.subject_code == code), None)
-            if not subj:
-                continue
-            m = Mark.query.filter_by(roll_no=s.roll_no, division=s.division, subject_id=subj.subject_id).first()
+        for code in data.subject_codes_for(s):
+            m = data.mark(s, code)
 
             rows.append({
                 'Roll': s.roll_no,
@@ -777,24 +704,21 @@ def download_complete_excel(user_id=None, user_type=None):
     ]
 
     try:
-        from openpyxl import Workbook
-        wb = Workbook()
-        ws = cast(Any, wb.active)
-        ws.title = 'Complete Results'
-        ws.append(headers)
+        wb = new_workbook()
+        ws = wb.create_sheet('Complete Results')
+        ws.append(styled_row(ws, headers, excel_export.HEADER))
         for r in rows:
             ws.append([r.get(h, '') for h in headers])
 
-        bio = BytesIO()
-        wb.save(bio)
-        bio.seek(0)
         fn = 'complete_results'
         if division:
             fn += f'_{division}'
         if roll_no:
             fn += f'_roll_{roll_no}'
         fn += '.xlsx'
-        return send_file(bio, download_name=fn, as_attachment=True)
+        if roll_no:
+            return send_workbook(wb, fn)
+        return send_cached_workbook(wb, fn, cache_key)
     except Exception as ex:
         return {"error": "Failed to generate Excel", "details": str(ex)}, 500
 
@@ -807,34 +731,24 @@ def download_division_excel(user_id=None, user_type=None):
     if not division:
         return {"error": "division is required"}, 400
 
+    filename = f"division_{division}_marks.xlsx"
+    cache_key = ('division', division, *export_version(division))
+    cached = send_cached_export(cache_key, filename)
+    if cached is not None:
+        return cached
+
     # Build rows for all students in division
     students = Student.query.filter_by(division=division).order_by(Student.roll_no).all()
     if not students:
         return {"error": "No students found for division"}, 404
 
     rows = []
-    all_subjects = Subject.query.filter_by(active=True).order_by(Subject.subject_code).all()
-    subjects_codes = [s.subject_code for s in all_subjects]
+    data = load_export_data(students, division=division)
 
     for s in students:
-        include_codes = set()
-        for sub in all_subjects:
-            if sub.subject_type == 'CORE':
-                include_codes.add(sub.subject_code)
-        if s.optional_subject:
-            include_codes.add(s.optional_subject)
-        if s.optional_subject_2:
-            include_codes.add(s.optional_subject_2)
-
-        for code in sorted(include_codes):
-            subj = next((x for x in all_subjects if x.subject_code == code), None)
-            if not subj:
-                continue
-            m = Mark.query.filter_by(roll_no=s.roll_no, division=s.division, subject_id=subj.subject_id).first()
-            teacher_name = None
-            if m and m.entered_by:
-                t = Teacher.query.get(m.entered_by)
-                teacher_name = t.name if t else None
+        for code in data.subject_codes_for(s):
+            m = data.mark(s, code)
+            teacher_name = m.teacher_name if m else None
             rows.append({
                 'roll_no': s.roll_no,
                 'student_name': s.name,
@@ -850,12 +764,10 @@ def download_division_excel(user_id=None, user_type=None):
 
     # Create Excel file
     try:
-        from openpyxl import Workbook
-        wb = Workbook()
-        ws = cast(Any, wb.active)
-        ws.title = 'Marks'
+        wb = new_workbook()
+        ws = wb.create_sheet('Marks')
         headers = ['Roll', 'Student Name', 'Subject', 'Division', 'Unit1', 'Unit2', 'Term', 'Annual', 'Grace', 'Entered By']
-        ws.append(headers)
+        ws.append(styled_row(ws, headers, excel_export.HEADER))
         for r in rows:
             ws.append([
                 r['roll_no'], r['student_name'], r['subject'], r['division'],
@@ -866,11 +778,7 @@ def download_division_excel(user_id=None, user_type=None):
                 r['grace'] if r['grace'] is not None else '',
                 r['entered_by'] or ''
             ])
-        bio = BytesIO()
-        wb.save(bio)
-        bio.seek(0)
-        filename = f"division_{division}_marks.xlsx"
-        return send_file(bio, download_name=filename, as_attachment=True)
+        return send_cached_workbook(wb, filename, cache_key)
     except Exception as ex:
         return {"error": "Failed to generate Excel", "details": str(ex)}, 500
 
@@ -890,9 +798,16 @@ def download_marksheet(user_id=None, user_type=None):
     if not division:
         return {"error": "division is required"}, 400
 
-    # Ensure computed results exist
+    # Unchanged marksheets are served from the export artifact cache
+    filename = f'marksheet_div_{division}.xlsx'
+    cache_key = ('marksheet', division, *export_version(division))
+    cached = send_cached_export(cache_key, filename)
+    if cached is not None:
+        return cached
+
+    # Ensure computed results are current
     try:
-        generate_results_for_division(division)
+        ensure_results_current(division)
     except Exception:
         pass
 
@@ -910,9 +825,10 @@ def download_marksheet(user_id=None, user_type=None):
         ('B.K. & A/C', ['BK']),
     ]
 
+    # Active subjects and the division's marks (one joined query)
+    data = load_export_data(students, division=division)
     # Map subject_code -> Subject object
-    all_subjects = Subject.query.filter_by(active=True).all()
-    subjects_by_code = {s.subject_code.upper(): s for s in all_subjects}
+    subjects_by_code = {s.subject_code.upper(): s for s in data.subjects}
 
     def resolve_optional_subject(student, candidates):
         # Check student's optional_subject then optional_subject_2
@@ -925,78 +841,48 @@ def download_marksheet(user_id=None, user_type=None):
                 return subjects_by_code[c.upper()]
         return None
 
-    # Build workbook
+    # Build workbook (write-only: rows are emitted top to bottom, merges recorded up front)
     try:
-        from openpyxl import Workbook
-        from openpyxl.styles import Alignment, Font
-
-        wb = Workbook()
-        ws = cast(Any, wb.active)
-        ws.title = 'Marksheet'
+        wb = new_workbook()
+        ws = wb.create_sheet('Marksheet')
+        center = excel_export.CENTER
 
         # columns: 2 ID columns + 5 subjects * 8 internal cols
         total_cols = 2 + len(SUBJECT_ORDER) * 8
+        internal_headers = ['UNIT I', 'TERM I', 'UNIT II', 'INT', 'ANNUAL', 'TOT', 'AVG', 'GRACE']
 
         # Top headers (merged)
-        ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=total_cols)
-        ws.cell(row=1, column=1, value='SIES COLLEGE OF COMMERCE, NERUL')
-        ws.cell(row=1, column=1).font = Font(bold=True)
-        ws.cell(row=1, column=1).alignment = Alignment(horizontal='center')
+        merge(ws, 1, 1, 1, total_cols)
+        ws.append([styled(ws, 'SIES COLLEGE OF COMMERCE, NERUL', excel_export.TITLE)])
 
-        ws.merge_cells(start_row=2, start_column=1, end_row=2, end_column=total_cols)
+        merge(ws, 2, 1, 2, total_cols)
         title = f'FYJC (DIV {division}) MARKSHEET – 2024–2025'
-        ws.cell(row=2, column=1, value=title)
-        ws.cell(row=2, column=1).font = Font(bold=True)
-        ws.cell(row=2, column=1).alignment = Alignment(horizontal='center')
+        ws.append([styled(ws, title, excel_export.TITLE)])
 
         # Row 3 right-aligned stream text
-        ws.cell(row=3, column=total_cols, value='B.K. & A/C')
-        ws.cell(row=3, column=total_cols).alignment = Alignment(horizontal='right')
+        ws.append([None] * (total_cols - 1) + [styled(ws, 'B.K. & A/C', excel_export.RIGHT)])
 
         # Header rows: row4 merged subject headers, row5 internal headers
-        ws.merge_cells(start_row=4, start_column=1, end_row=5, end_column=1)
-        ws.cell(row=4, column=1, value='ROLL NO')
-        ws.cell(row=4, column=1).font = Font(bold=True)
-        ws.cell(row=4, column=1).alignment = Alignment(horizontal='center', vertical='center')
-
-        ws.merge_cells(start_row=4, start_column=2, end_row=5, end_column=2)
-        ws.cell(row=4, column=2, value='STUDENT NAME')
-        ws.cell(row=4, column=2).font = Font(bold=True)
-        ws.cell(row=4, column=2).alignment = Alignment(horizontal='center', vertical='center')
-
-        internal_headers = ['UNIT I', 'TERM I', 'UNIT II', 'INT', 'ANNUAL', 'TOT', 'AVG', 'GRACE']
+        merge(ws, 4, 1, 5, 1)
+        merge(ws, 4, 2, 5, 2)
+        subject_row = [styled(ws, 'ROLL NO', excel_export.HEADER), styled(ws, 'STUDENT NAME', excel_export.HEADER)]
+        internal_row = [None, None]
         col = 3
         for subj_label, candidates in SUBJECT_ORDER:
-            start = col
-            end = col + len(internal_headers) - 1
-            ws.merge_cells(start_row=4, start_column=start, end_row=4, end_column=end)
-            ws.cell(row=4, column=start, value=subj_label)
-            ws.cell(row=4, column=start).font = Font(bold=True)
-            ws.cell(row=4, column=start).alignment = Alignment(horizontal='center')
-            for i, h in enumerate(internal_headers):
-                c = ws.cell(row=5, column=start + i, value=h)
-                c.font = Font(bold=True)
-                c.alignment = Alignment(horizontal='center')
+            merge(ws, 4, col, 4, col + len(internal_headers) - 1)
+            subject_row += [styled(ws, subj_label, excel_export.HEADER)] + [None] * (len(internal_headers) - 1)
+            internal_row += styled_row(ws, internal_headers, excel_export.HEADER)
             col += len(internal_headers)
+        ws.append(subject_row)
+        ws.append(internal_row)
 
         # Row 6: Maximum marks
-        max_row = 6
-        ws.cell(row=max_row, column=1, value='')
-        ws.cell(row=max_row, column=2, value='')
         max_values = [25, 50, 25, 20, 80, 200, 100, '']
-        col = 3
-        for _ in SUBJECT_ORDER:
-            for mv in max_values:
-                ws.cell(row=max_row, column=col, value=mv)
-                ws.cell(row=max_row, column=col).alignment = Alignment(horizontal='center')
-                col += 1
-
-        # Student rows
-        row_idx = 7
+        ws.append(['', ''] + styled_row(ws, max_values * len(SUBJECT_ORDER), center))
+
+        # Student rows (from row 7)
         for s in students:
-            ws.cell(row=row_idx, column=1, value=s.roll_no)
-            ws.cell(row=row_idx, column=2, value=s.name)
-            col = 3
+            row = [s.roll_no, s.name]
             for subj_label, candidates in SUBJECT_ORDER:
                 # resolve subject
                 if subj_label == 'SP / MATHS':
@@ -1010,12 +896,10 @@ def download_marksheet(user_id=None, user_type=None):
 
                 if not subj_obj:
                     # leave 8 blank cells
-                    for i in range(8):
-                        ws.cell(row=row_idx, column=col + i, value='')
-                    col += 8
+                    row += [''] * 8
                     continue
 
-                m = Mark.query.filter_by(roll_no=s.roll_no, division=s.division, subject_id=subj_obj.subject_id).first()
+                m = data.mark(s, subj_obj.subject_code)
                 if m:
                     unit1 = m.unit1 if m.unit1 is not None else ''
                     term = m.term if m.term is not None else ''
@@ -1041,23 +925,59 @@ def download_marksheet(user_id=None, user_type=None):
                 else:
                     unit1 = term = unit2 = internal = annual = tot = avg = grace = ''
 
-                values = [unit1, term, unit2, internal, annual, tot, avg, grace]
-                for i, v in enumerate(values):
-                    cell = ws.cell(row=row_idx, column=col + i, value=v)
-                    cell.alignment = Alignment(horizontal='center')
-                col += 8
-
-            row_idx += 1
+                row += styled_row(ws, [unit1, term, unit2, internal, annual, tot, avg, grace], center)
+            ws.append(row)
 
-        bio = BytesIO()
-        wb.save(bio)
-        bio.seek(0)
-        filename = f'marksheet_div_{division}.xlsx'
-        return send_file(bio, download_name=filename, as_attachment=True)
+        return send_cached_workbook(wb, filename, cache_key)
     except Exception as ex:
         return {"error": "Failed to generate marksheet", "details": str(ex)}, 500
 
 
+# ======================================================
+# Streamed CSV exports (division or whole college)
+# ======================================================
+@admin_bp.route('/csv/results', methods=['GET'])
+@token_required
+@admin_required
+def download_results_csv(user_id=None, user_type=None):
+    """Result rows as CSV; ``division`` is optional (omit for every division)."""
+    division = request.args.get('division')
+    if division:
+        divisions = [division]
+    else:
+        divisions = [d for (d,) in db.session.query(Student.division).distinct()]
+    for d in divisions:
+        ensure_results_current(d)
+
+    filename = f"results_{division or 'all'}.csv"
+    return generate_csv_response(filename, RESULT_VALUE_FIELDS, iter_results(division or None))
+
+
+@admin_bp.route('/csv/complete', methods=['GET'])
+@token_required
+@admin_required
+def download_complete_csv(user_id=None, user_type=None):
+    """
+    The complete marks export as CSV, one row per student and subject;
+    ``division`` is optional (omit for every division).
+    """
+    division = request.args.get('division')
+    headers = ["Roll", "Student Name", "Subject", "Division", "Unit1", "Term", "Unit2", "Annual", "Grace", "Entered By"]
+
+    def rows():
+        for s, codes, marks in iter_student_marks(division or None):
+            for code in codes:
+                m = marks.get(code)
+                if m is None:
+                    yield [s.roll_no, s.name, code, s.division, '', '', '', '', '', '']
+                else:
+                    yield [s.roll_no, s.name, code, s.division,
+                           m.unit1, m.term, m.unit2, m.annual, m.grace, m.teacher_name]
+
+    filename = f"complete_marks_{division or 'all'}.csv"
+    return generate_csv_response(filename, headers, rows())
+
+
 # ======================================================
 # Download student marksheet PDF (admin only)
 # ======================================================
@@ -1071,7 +991,7 @@ def student_marksheet_pdf(roll_no, user_id=None, user_type=None):
 
     # ensure results are up-to-date
     try:
-        generate_results_for_division(division)
+        ensure_results_current(division)
     except Exception:
         pass
 
@@ -1079,69 +999,54 @@ def student_marksheet_pdf(roll_no, user_id=None, user_type=None):
     if not res:
         return {"error": "Result not found"}, 404
 
-    if canvas_module is None or letter is None:
+    if not marksheet_pdf.available():
         return {"error": "reportlab not installed on server. Install reportlab in requirements."}, 501
 
-    buf = BytesIO()
-    # canvas_module is the imported reportlab.pdfgen.canvas module
-    CanvasClass = getattr(canvas_module, 'Canvas', None)
-    if CanvasClass is None:
-        return {"error": "reportlab canvas API not available"}, 501
-    c = CanvasClass(buf, pagesize=cast(Any, letter))
-    width, height = cast(Any, letter)
-
-    # Header
-    c.setFont('Helvetica-Bold', 16)
-    c.drawString(40, height - 50, 'Official Marksheet')
-    c.setFont('Helvetica', 12)
-    c.drawString(40, height - 70, f'Name: {res.name}  |  Roll: {res.roll_no}  |  Division: {res.division}')
-
-    # Table header
-    y = height - 110
-    c.setFont('Helvetica-Bold', 11)
-    c.drawString(40, y, 'Subject')
-    c.drawString(260, y, 'Annual')
-    c.drawString(360, y, 'Grace')
-    c.drawString(460, y, 'Final')
-    c.setFont('Helvetica', 11)
-    y -= 18
-
-    # iterate known subjects and map to result fields
-    mapping = [
-        ('ENG', 'eng_avg', 'eng_grace'),
-        ('ECO', 'eco_avg', 'eco_grace'),
-        ('BK', 'bk_avg', 'bk_grace'),
-        ('OC', 'oc_avg', 'oc_grace'),
-        ('HINDI', 'hindi_avg', 'hindi_grace'),
-        ('IT', 'it_avg', 'it_grace'),
-        ('MATHS', 'maths_avg', 'maths_grace'),
-        ('SP', 'sp_avg', 'sp_grace')
-    ]
+    buf = BytesIO(marksheet_pdf.render_marksheet(marksheet_pdf.marksheet_data(res)))
+    return send_file(buf, mimetype='application/pdf', as_attachment=True, download_name=f'{roll_no}_marksheet.pdf')
 
-    total = 0
-    for code, avg_field, grace_field in mapping:
-        avg = getattr(res, avg_field, None)
-        grace = getattr(res, grace_field, 0) or 0
-        if avg is None:
-            continue
-        final = (avg or 0) + (grace or 0)
-        c.drawString(40, y, code)
-        c.drawRightString(320, y, f'{round(avg,2)}')
-        c.drawRightString(420, y, f'{round(grace,2)}')
-        c.drawRightString(520, y, f'{round(final,2)}')
-        total += final
-        y -= 16
-
-    y -= 8
-    c.setFont('Helvetica-Bold', 12)
-    c.drawString(40, y, f'Total: {round(res.percentage * (len(mapping) / len(mapping)),2) if res.percentage is not None else "-"}')
-    c.drawRightString(520, y, f'Percentage: {res.percentage or "-"}')
-
-    c.showPage()
-    c.save()
-    buf.seek(0)
 
-    return send_file(buf, mimetype='application/pdf', as_attachment=True, download_name=f'{roll_no}_marksheet.pdf')
+@admin_bp.route('/results/pdf', methods=['GET'])
+@token_required
+@admin_required
+def division_marksheets_pdf(user_id=None, user_type=None):
+    """Marksheets of a whole division from one bulk-loaded result set.
+
+    Query params:
+      - division (required)
+      - format: pdf (one multi-page PDF, default) or zip (one PDF per student, streamed)
+    """
+    division = request.args.get('division')
+    if not division:
+        return {"error": "division is required"}, 400
+    fmt = (request.args.get('format') or 'pdf').lower()
+    if fmt not in ('pdf', 'zip'):
+        return {"error": "format must be pdf or zip"}, 400
+    if not marksheet_pdf.available():
+        return {"error": "reportlab not installed on server. Install reportlab in requirements."}, 501
+
+    # ensure results are up-to-date
+    try:
+        ensure_results_current(division)
+    except Exception:
+        pass
+
+    datas = [
+        marksheet_pdf.marksheet_data(r)
+        for r in Result.query.filter_by(division=division).order_by(Result.roll_no)
+    ]
+    if not datas:
+        return {"error": "No results found for division"}, 404
+
+    if fmt == 'zip':
+        files = marksheet_pdf.render_each(datas, current_app.config.get('PDF_RENDER_WORKERS'))
+        return Response(
+            marksheet_pdf.stream_zip(files),
+            mimetype='application/zip',
+            headers={"Content-Disposition": f"attachment; filename=marksheets_div_{division}.zip"},
+        )
+    buf = BytesIO(marksheet_pdf.render_combined(datas, current_app.config.get('PDF_RENDER_WORKERS')))
+    return send_file(buf, mimetype='application/pdf', as_attachment=True, download_name=f'marksheets_div_{division}.pdf')
 
 
 
@@ -1151,12 +1056,16 @@ def student_marksheet_pdf(roll_no, user_id=None, user_type=None):
 
 @admin_bp.route("/teachers", methods=["GET"])
 @token_required
-def list_teachers(user_id=None, user_type=None):
+@paginated
+def list_teachers(user_id=None, user_type=None, page=1, limit=None, search=None, cursor=None):
     if user_type != "ADMIN":
         return {"error": "Unauthorized"}, 403
 
-    teachers = Teacher.query.all()
-    return jsonify([
+    query = Teacher.query
+    if search:
+        query = query.filter(prefix_filter(search, Teacher.name, Teacher.userid))
+    teachers, next_cursor = keyset_page(query, Teacher.teacher_id, cursor, limit)
+    return with_next_cursor(jsonify([
         {
             "teacher_id": t.teacher_id,
             "name": t.name,
@@ -1166,7 +1075,7 @@ def list_teachers(user_id=None, user_type=None):
             "role": t.role
         }
         for t in teachers
-    ]), 200
+    ]), next_cursor)
 
 
 @admin_bp.route("/teachers", methods=["POST"])
@@ -1216,6 +1125,8 @@ def update_teacher(teacher_id, user_id=None, user_type=None):
         teacher.password_hash = generate_password_hash(data["password"])
 
     db.session.commit()
+    # the active flag may have changed; don't let a cached principal outlive it
+    invalidate_principal(teacher_id)
     return {"message": "Teacher updated"}, 200
 
 
@@ -1226,8 +1137,12 @@ def delete_teacher(teacher_id, user_id=None, user_type=None):
         return {"error": "Unauthorized"}, 403
 
     teacher = Teacher.query.get_or_404(teacher_id)
+    # allocations are removed with the teacher, which changes required subjects
+    divisions = [a.division for a in teacher.subject_allocations]
     db.session.delete(teacher)
+    bump_data_version(*divisions)
     db.session.commit()
+    invalidate_principal(teacher_id)
 
     return {"message": "Teacher deleted"}, 200
 
@@ -1,18 +1,30 @@
 # routes/subject_routes.py
 
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, current_app
+from app import db
 from models import Subject
+from http_cache import make_etag, not_modified, with_etag
 
 subject_bp = Blueprint("subjects", __name__)
 
 @subject_bp.route("/subjects", methods=["GET"])
 def list_subjects():
+    # count catches deletes, max(updated_at) catches edits and (de)activation
+    count, last_updated = db.session.query(
+        db.func.count(Subject.subject_id), db.func.max(Subject.updated_at)
+    ).one()
+    etag = make_etag(count, last_updated)
+    cache_control = f"public, max-age={current_app.config.get('MASTER_DATA_MAX_AGE_SECONDS', 300)}"
+    cached = not_modified(etag, cache_control)
+    if cached is not None:
+        return cached
+
     subjects = Subject.query.filter_by(active=True).all()
-    return jsonify([
+    return with_etag((jsonify([
         {
             "subject_id": s.subject_id,
             "subject_code": s.subject_code,
             "subject_name": s.subject_name
         }
         for s in subjects
-    ]), 200
+    ]), 200), etag, cache_control)
@@ -1,6 +1,6 @@
 # backend/routes/teacher_routes.py
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, url_for
 
 from app import db
 from typing import Any, Dict, cast
@@ -10,21 +10,22 @@ from models import (
     Mark,
     TeacherSubjectAllocation
 )
-from services.result_service import generate_results_for_division
+from services.result_service import ensure_results_current
+from services.result_read_model import load_division_read_model
+from services.division_version import bump_data_version, get_data_version
+from services.recompute_queue import recompute_queue
+from services.upload_ingest import read_upload_sheet, UploadError
+from services.marks_upload import apply_upload, commit_marks, mark_values, validate_apply_rows
+from services.upload_staging import stage_upload, claim_staged, release_staged, discard_staged
+from services.upload_jobs import upload_jobs
+from services.upload_resolver import UploadResolver
+from services.mark_service import bulk_upsert_marks, mark_totals
 from schemas import EnterMarkSchema, UpdateMarkSchema
 from auth import token_required
+from decorators import paginated
+from http_cache import make_etag, not_modified, with_etag
+from pagination import keyset_page, prefix_filter, with_next_cursor
 from config import GRACE_MAX
-import io
-from typing import TYPE_CHECKING
-
-# Import openpyxl at runtime if available; expose name for runtime checks.
-if TYPE_CHECKING:
-    import openpyxl  # type: ignore
-else:
-    try:
-        import openpyxl
-    except Exception:
-        openpyxl = None  # type: ignore
 
 teacher_bp = Blueprint("teacher", __name__, url_prefix="/teacher")
 
@@ -206,8 +207,11 @@ def enter_marks(user_id=None, user_type=None):
     mark.entered_by = user_id
 
     db.session.add(mark)
+    versions = bump_data_version(mark.division)
     db.session.commit()
 
+    recompute_queue.schedule_student(data.get("roll_no"), data.get("division"), versions.get(mark.division))
+
     return {"message": "Marks entered successfully"}, 201
 
 
@@ -272,14 +276,11 @@ def update_marks(mark_id, user_id=None, user_type=None):
             return {"error": f"Grace must be between 0 and {GRACE_MAX}"}, 400
         mark.grace = g
 
+    versions = bump_data_version(mark.division)
     db.session.commit()
 
-    # regenerate results for the division to reflect changes immediately
-    try:
-        generate_results_for_division(mark.division)
-    except Exception:
-        # do not break the update if result generation fails; log in production
-        pass
+    # recompute only this student's result in the background
+    recompute_queue.schedule_student(mark.roll_no, mark.division, versions.get(mark.division))
 
     return {"message": "Marks updated successfully"}, 200
 
@@ -346,14 +347,13 @@ def delete_mark(mark_id, user_id=None, user_type=None):
     if user_type != "ADMIN" and mark.entered_by != user_id:
         return {"error": "Not authorized to delete this mark"}, 403
 
+    roll_no, division = mark.roll_no, mark.division
     db.session.delete(mark)
+    versions = bump_data_version(division)
     db.session.commit()
 
-    # regenerate results for the division
-    try:
-        generate_results_for_division(mark.division)
-    except Exception:
-        pass
+    # recompute the affected student's result in the background
+    recompute_queue.schedule_student(roll_no, division, versions.get(division))
 
     return {"message": "Marks deleted"}, 200
 
@@ -374,21 +374,26 @@ def view_complete_table(user_id=None, user_type=None):
     if not alloc and user_type != "ADMIN":
         return {"error": "Not authorized for this division"}, 403
 
-    # regenerate results to ensure latest values
+    # validator is read before any recompute/row building so a concurrent write
+    # can only make the tag older than the payload, never newer
+    etag = make_etag(division, get_data_version(division))
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    # recompute results only if marks/students/allocations changed since last run
+    fresh = True
     try:
-        generate_results_for_division(division)
+        ensure_results_current(division)
     except Exception:
-        pass
+        fresh = False
 
-    # fetch students in canonical order and build rows
-    students = Student.query.filter_by(division=division).order_by(Student.roll_no).all()
-    subjects = {s.subject_id: s.subject_code for s in Subject.query.all()}
+    # students in canonical order with their results, bulk-loaded
+    view = load_division_read_model(division)
 
     rows = []
-    for idx, s in enumerate(students, start=1):
-        result = None
-        from models import Result
-        result = Result.query.filter_by(roll_no=s.roll_no, division=s.division).first()
+    for idx, s in enumerate(view.students, start=1):
+        result = view.result_for(s)
 
         # build per-subject entries from Result columns
         subject_entries = []
@@ -446,7 +451,10 @@ def view_complete_table(user_id=None, user_type=None):
             "percentage": getattr(result, "percentage", None) if result else None
         })
 
-    return jsonify(rows), 200
+    if not fresh:
+        # don't let clients cache rows built from possibly stale results
+        return jsonify(rows), 200
+    return with_etag((jsonify(rows), 200), etag)
 
 
 @teacher_bp.route('/divisions', methods=['GET'])
@@ -462,55 +470,25 @@ def list_divisions(user_id=None, user_type=None):
 @token_required
 def marks_from_excel(user_id=None, user_type=None):
     """
-    Accept an uploaded Excel file (form-data 'file') and extract roll_no and division
+    Accept an uploaded Excel or CSV/TSV file (form-data 'file') and extract roll_no and division
     from the first sheet. Match students in DB by exact roll_no+division and return
     matched and missing lists. Optionally accept form fields 'division' and 'subject_id'
     to supply defaults.
+    Each matched row's 'mark' holds the values applying the returned staging_token
+    writes ('staged' is false for rows left out) and 'current' the stored mark.
     """
-    if openpyxl is None:
-        return {"error": "Server missing Excel parsing support (openpyxl)"}, 500
-
     f = request.files.get('file')
     if not f:
         return {"error": "No file uploaded (file)"}, 400
 
     default_division = request.form.get('division')
     subject_id_form = request.form.get('subject_id')
-    # helper: derive subject_id for this teacher+division when not provided
-    def derive_subject_id_for_division(div: str):
-        # prefer explicit form value
-        if subject_id_form:
-            try:
-                sid = int(subject_id_form)
-                return sid
-            except Exception:
-                return None
-        # find allocations for this teacher in the division
-        allocs = TeacherSubjectAllocation.query.filter_by(teacher_id=user_id, division=div).all()
-        if not allocs:
-            return None
-        if len(allocs) == 1:
-            return allocs[0].subject_id
-        # ambiguous if multiple allocations exist; require explicit subject_id in form
-        return None
 
+    # spooled to disk and streamed in read-only mode (size/row limits enforced)
     try:
-        data = io.BytesIO(f.read())
-        wb = openpyxl.load_workbook(data, data_only=True)
-    except Exception as e:
-        return {"error": "Failed to read Excel file", "details": str(e)}, 400
-
-    if not wb.sheetnames:
-        return {"error": "Excel contains no sheets"}, 400
-
-    # Use the first sheet (do not enforce exact sheet name). Validate by columns instead.
-    sheet_name = wb.sheetnames[0]
-    sheet = wb[sheet_name]
-    rows_iter = sheet.iter_rows(values_only=True)
-    try:
-        headers = [str(x).strip().lower() if x is not None else '' for x in next(rows_iter)]
-    except StopIteration:
-        return {"error": "Excel sheet is empty"}, 400
+        headers, rows_iter = read_upload_sheet(f)
+    except UploadError as e:
+        return e.body(), e.status_code
 
     if not any(headers):
         return {"error": "Excel header row is empty"}, 400
@@ -539,64 +517,75 @@ def marks_from_excel(user_id=None, user_type=None):
     if roll_idx is None or div_idx is None:
         return {"error": "Excel must include columns: Roll and Division (Name optional)"}, 400
     requested = []
-    for r in rows_iter:
-        if not r or all(c is None for c in r):
-            continue
-        roll_val = r[roll_idx] if roll_idx is not None and roll_idx < len(r) else None
-        if roll_val is None or str(roll_val).strip() == '':
-            continue
-        roll = str(roll_val).strip()
-        division = None
-        if div_idx is not None and div_idx < len(r):
-            dv = r[div_idx]
-            if dv is not None and str(dv).strip() != '':
-                division = str(dv).strip()
-        if not division and default_division:
-            division = default_division
-
-        name_val = r[name_idx] if name_idx is not None and name_idx < len(r) else None
-        name_val = str(name_val).strip() if name_val is not None else None
-
-        # optional subject cell
-        subject_val = None
-        if subj_idx is not None and subj_idx < len(r):
-            sv = r[subj_idx]
-            if sv is not None and str(sv).strip() != '':
-                subject_val = str(sv).strip()
-
-        # optional marks columns
-        def val_at_idx(ix):
-            return r[ix] if ix is not None and ix < len(r) else None
-
-        unit1_val = val_at_idx(u1_idx)
-        unit2_val = val_at_idx(u2_idx)
-        term_val = val_at_idx(term_idx)
-        annual_val = val_at_idx(annual_idx)
-        grace_val = val_at_idx(grace_idx)
-
-        # build requested entry; subject_id will be derived later (prefer form, then subject cell, then allocation)
-        requested.append({
-            "roll_no": roll,
-            "division": division,
-            "name": name_val,
-            "subject_val": subject_val,
-            "unit1": unit1_val,
-            "unit2": unit2_val,
-            "term": term_val,
-            "annual": annual_val,
-            "grace": grace_val,
-        })
+    # rows are parsed as they are read; the row limit can fail part way
+    try:
+        for r in rows_iter:
+            if not r or all(c is None for c in r):
+                continue
+            roll_val = r[roll_idx] if roll_idx is not None and roll_idx < len(r) else None
+            if roll_val is None or str(roll_val).strip() == '':
+                continue
+            roll = str(roll_val).strip()
+            division = None
+            if div_idx is not None and div_idx < len(r):
+                dv = r[div_idx]
+                if dv is not None and str(dv).strip() != '':
+                    division = str(dv).strip()
+            if not division and default_division:
+                division = default_division
+
+            name_val = r[name_idx] if name_idx is not None and name_idx < len(r) else None
+            name_val = str(name_val).strip() if name_val is not None else None
+
+            # optional subject cell
+            subject_val = None
+            if subj_idx is not None and subj_idx < len(r):
+                sv = r[subj_idx]
+                if sv is not None and str(sv).strip() != '':
+                    subject_val = str(sv).strip()
+
+            # optional marks columns
+            def val_at_idx(ix):
+                return r[ix] if ix is not None and ix < len(r) else None
+
+            unit1_val = val_at_idx(u1_idx)
+            unit2_val = val_at_idx(u2_idx)
+            term_val = val_at_idx(term_idx)
+            annual_val = val_at_idx(annual_idx)
+            grace_val = val_at_idx(grace_idx)
+
+            # build requested entry; subject_id will be derived later (prefer form, then subject cell, then allocation)
+            requested.append({
+                "roll_no": roll,
+                "division": division,
+                "name": name_val,
+                "subject_val": subject_val,
+                "unit1": unit1_val,
+                "unit2": unit2_val,
+                "term": term_val,
+                "annual": annual_val,
+                "grace": grace_val,
+            })
+    except UploadError as e:
+        return e.body(), e.status_code
 
     if not requested:
         return {"error": "No valid rows found in Excel"}, 400
 
-    matched = []
+    # students, subjects, allocations and existing marks in a few IN queries
+    resolver = UploadResolver(
+        user_id,
+        [(item['roll_no'], item['division']) for item in requested],
+        [item['subject_val'] for item in requested],
+    )
+
+    resolved = []
     missing = []
     for item in requested:
         if not item['division']:
             missing.append({"roll_no": item['roll_no'], "division": None, "reason": "division missing"})
             continue
-        student = Student.query.filter_by(roll_no=item['roll_no'], division=item['division']).first()
+        student = resolver.student(item['roll_no'], item['division'])
         if not student:
             missing.append({"roll_no": item['roll_no'], "division": item['division'], "reason": "student not found"})
             continue
@@ -611,60 +600,68 @@ def marks_from_excel(user_id=None, user_type=None):
                 sid = None
         # 2) subject cell in Excel
         if sid is None and item.get('subject_val'):
-            sv = item.get('subject_val')
-            try:
-                if str(sv).isdigit():
-                    sid = int(sv)
-                else:
-                    s = Subject.query.filter((Subject.subject_code == sv) | (Subject.subject_name == sv)).first()
-                    if s:
-                        sid = s.subject_id
-            except Exception:
-                sid = None
-        # 3) derive from teacher allocation for the division if still unresolved
-        if sid is None:
-            sid = derive_subject_id_for_division(item['division'])
+            sid = resolver.subject_id(item['subject_val'])
+        # 3) derive from teacher allocation for the division if still unresolved;
+        #    ambiguous with several allocations, and skipped when the form value was invalid
+        if sid is None and not subject_id_form:
+            sid = resolver.sole_allocated_subject(item['division'])
 
         if not sid:
             missing.append({"roll_no": item['roll_no'], "division": item['division'], "reason": "subject not resolved or ambiguous; provide subject_id"})
             continue
 
         # Ensure teacher is authorized for this subject+division
-        alloc = _check_teacher_allocation(user_id, int(sid), item['division'])
-        if not alloc and user_type != 'ADMIN':
+        if not resolver.is_allocated(sid, item['division']) and user_type != 'ADMIN':
             missing.append({"roll_no": item['roll_no'], "division": item['division'], "reason": "not authorized for this subject/division"})
             continue
 
-        # prepare mark object preferring excel values where present
-        def try_float(v):
-            try:
-                return float(v)
-            except Exception:
-                return None
+        resolved.append((item, student, sid))
 
-        u1 = try_float(item.get('unit1'))
-        u2 = try_float(item.get('unit2'))
-        t = try_float(item.get('term'))
-        a = try_float(item.get('annual'))
-        g = try_float(item.get('grace'))
+    resolver.load_marks((student.roll_no, student.division, sid) for _, student, sid in resolved)
+
+    def try_float(v):
+        try:
+            return float(v)
+        except Exception:
+            return None
 
+    matched = []
+    staged = []
+    staged_missing = []
+    for item, student, sid in resolved:
         row = {"roll_no": student.roll_no, "name": student.name, "division": student.division}
-        mark = Mark.query.filter_by(subject_id=sid, roll_no=student.roll_no, division=student.division).first()
-        # populate fields: prefer existing DB values, but override with uploaded excel where provided
-        row['mark'] = {
-            "mark_id": mark.mark_id if mark else None,
-            "unit1": u1 if u1 is not None else (mark.unit1 if mark else None),
-            "unit2": u2 if u2 is not None else (mark.unit2 if mark else None),
-            "term": t if t is not None else (mark.term if mark else None),
-            "annual": a if a is not None else (mark.annual if mark else None),
-            "tot": mark.tot if mark else ( ( (u1 or 0) + (u2 or 0) + (t or 0) + (a or 0)) if any(x is not None for x in (u1,u2,t,a)) else None ),
-            "sub_avg": mark.sub_avg if mark else None,
-            "grace": g if g is not None else (mark.grace if mark else 0),
-        }
+        mark = resolver.mark(student.roll_no, student.division, sid)
+
+        # show and stage exactly what applying writes: the uploaded values, blank
+        # cells as 0 (as when applying the file); apply validates them again
+        values, reason = mark_values(item)
+        if reason:
+            staged_missing.append({"roll_no": student.roll_no, "division": student.division, "reason": reason})
+            # not applied; show what was read
+            values = {f: try_float(item.get(f)) for f in ('unit1', 'unit2', 'term', 'annual', 'grace')}
+            tot = sub_avg = None
+        else:
+            staged.append({"roll_no": student.roll_no, "division": student.division, "subject_val": int(sid), **values})
+            tot, sub_avg = mark_totals(values['unit1'], values['unit2'], values['term'], values['annual'])
+
+        row['mark'] = {"mark_id": mark.mark_id if mark else None, **values, "tot": tot, "sub_avg": sub_avg}
+        row['staged'] = reason is None
+        # the stored mark the upload would replace
+        row['current'] = {
+            "unit1": mark.unit1,
+            "unit2": mark.unit2,
+            "term": mark.term,
+            "annual": mark.annual,
+            "tot": mark.tot,
+            "sub_avg": mark.sub_avg,
+            "grace": mark.grace,
+        } if mark else None
         row['subject_id'] = sid
         matched.append(row)
 
-    return jsonify({"matched": matched, "missing": missing}), 200
+    staging_token = stage_upload(staged, missing + staged_missing, user_id, user_type) if staged else None
+
+    return jsonify({"matched": matched, "missing": missing, "staging_token": staging_token, "staged": len(staged)}), 200
 
 
 @teacher_bp.route('/marks/batch', methods=['POST'])
@@ -675,9 +672,15 @@ def batch_upsert_marks(user_id=None, user_type=None):
     if not entries or not isinstance(entries, list):
         return {"error": "entries (array) is required"}, 400
 
+    # students and the uploader's allocations in a few IN queries
+    resolver = UploadResolver(
+        user_id,
+        [((e.get('roll_no') or e.get('roll')), e.get('division')) for e in entries if isinstance(e, dict)],
+    )
+
     errors = []
     saved = []
-    divisions_to_regen = set()
+    to_write = []
 
     for idx, e in enumerate(entries, start=1):
         roll = e.get('roll_no') or e.get('roll')
@@ -687,13 +690,12 @@ def batch_upsert_marks(user_id=None, user_type=None):
             errors.append({"index": idx, "error": "roll_no, division and subject_id are required"})
             continue
 
-        student = Student.query.filter_by(roll_no=str(roll), division=division).first()
+        student = resolver.student(roll, division)
         if not student:
             errors.append({"index": idx, "roll_no": roll, "division": division, "error": "student not found"})
             continue
 
-        alloc = _check_teacher_allocation(user_id, int(subject_id), division)
-        if not alloc and user_type != 'ADMIN':
+        if not resolver.is_allocated(int(subject_id), division) and user_type != 'ADMIN':
             errors.append({"index": idx, "roll_no": roll, "division": division, "error": "not authorized for subject/division"})
             continue
 
@@ -711,278 +713,100 @@ def batch_upsert_marks(user_id=None, user_type=None):
             errors.append({"index": idx, "roll_no": roll, "division": division, "error": "one or more marks out of allowed ranges"})
             continue
 
-        existing = Mark.query.filter_by(roll_no=str(roll), division=division, subject_id=int(subject_id)).first()
-        tot = unit1 + unit2 + term + annual
-        sub_avg = round(tot / 2, 2)
-        if existing:
-            existing.unit1 = unit1
-            existing.unit2 = unit2
-            existing.term = term
-            existing.annual = annual
-            existing.tot = tot
-            existing.sub_avg = sub_avg
-            existing.grace = grace
-        else:
-            m = Mark()
-            m.roll_no = str(roll)
-            m.division = division
-            m.subject_id = int(subject_id)
-            m.unit1 = unit1
-            m.unit2 = unit2
-            m.term = term
-            m.annual = annual
-            m.tot = tot
-            m.sub_avg = sub_avg
-            m.grace = grace
-            m.entered_by = user_id
-            db.session.add(m)
-
-        divisions_to_regen.add(division)
+        to_write.append({
+            "roll_no": str(roll),
+            "division": division,
+            "subject_id": int(subject_id),
+            "unit1": unit1,
+            "unit2": unit2,
+            "term": term,
+            "annual": annual,
+            "grace": grace,
+        })
         saved.append({"roll_no": str(roll), "division": division, "subject_id": int(subject_id)})
 
     if errors:
         return {"error": "Validation failed for some rows", "details": errors}, 400
 
     try:
+        inserted, updated = bulk_upsert_marks(to_write, entered_by=user_id)
+        versions = bump_data_version(*{row["division"] for row in saved})
         db.session.commit()
     except Exception as ex:
         db.session.rollback()
         return {"error": "Database commit failed", "details": str(ex)}, 500
 
-    for d in divisions_to_regen:
-        try:
-            generate_results_for_division(d)
-        except Exception:
-            pass
+    for row in saved:
+        recompute_queue.schedule_student(row["roll_no"], row["division"], versions.get(row["division"]))
 
-    return {"message": "Marks saved successfully", "saved": saved}, 200
+    return {"message": "Marks saved successfully", "saved": saved, "inserted": inserted, "updated": updated}, 200
 
 
 @teacher_bp.route('/marks/upload-apply', methods=['POST'])
 @token_required
 def upload_apply_excel(user_id=None, user_type=None):
-    """Accept master Excel, validate strict template and teacher allocation, then apply marks.
-    Returns saved and missing lists."""
-    if openpyxl is None:
-        return {"error": "Server missing Excel parsing support (openpyxl)"}, 500
+    """Accept master Excel (or CSV/TSV), validate strict template and teacher allocation, then apply marks.
+    Returns saved and missing lists.
+    Rows previewed by /marks/from-excel can be applied without the file by passing its staging_token."""
+    staging_token = request.form.get('staging_token') or (request.get_json(silent=True) or {}).get('staging_token')
+    if staging_token:
+        try:
+            items, staged_missing = claim_staged(staging_token, user_id, user_type)
+        except UploadError as e:
+            return e.body(), e.status_code
+        # students and allocations may have changed since the preview
+        to_apply, missing = validate_apply_rows(items, user_id, user_type)
+        body, status = commit_marks(to_apply, user_id, staged_missing + missing)
+        if status == 200:
+            discard_staged(staging_token)
+        else:
+            release_staged(staging_token)
+        return body, status
 
     f = request.files.get('file')
     if not f:
         return {"error": "No file uploaded (file)"}, 400
 
-    try:
-        data = io.BytesIO(f.read())
-        wb = openpyxl.load_workbook(data, data_only=True)
-    except Exception as e:
-        return {"error": "Failed to read Excel file", "details": str(e)}, 400
-
-    # Use first sheet and accept dynamic columns. Require Roll and Division at minimum.
-    sheet_name = wb.sheetnames[0] if wb.sheetnames else None
-    if not sheet_name:
-        return {"error": "Excel contains no sheets"}, 400
-
-    sheet = wb[sheet_name]
-    rows_iter = sheet.iter_rows(values_only=True)
-    try:
-        headers = [str(x).strip().lower() if x is not None else '' for x in next(rows_iter)]
-    except StopIteration:
-        return {"error": "Excel sheet is empty"}, 400
-
-    def find_header(name_variants):
-        for v in name_variants:
-            if v in headers:
-                return headers.index(v)
-        return None
-
-    indices = {
-        'roll': find_header(['roll', 'roll_no', 'rollno']),
-        'name': find_header(['student name', 'name', 'student_name']),
-        'subject': find_header(['subject', 'subject_code', 'subject_id']),
-        'division': find_header(['division', 'div']),
-        'unit1': find_header(['unit1', 'unit 1', 'unit_i']),
-        'unit2': find_header(['unit2', 'unit 2', 'unit_ii']),
-        'term': find_header(['term', 'terminal', 'term_i']),
-        'annual': find_header(['annual', 'annual marks', 'annual_marks']),
-        'grace': find_header(['grace'])
-    }
-
-    if indices['roll'] is None or indices['division'] is None:
-        return {"error": "Invalid Excel template. Missing required columns: roll and division"}, 400
-
-    requested = []
-    for r in rows_iter:
-        if not r or all(c is None for c in r):
-            continue
-        roll_val = r[indices['roll']] if indices['roll'] is not None and indices['roll'] < len(r) else None
-        if roll_val is None or str(roll_val).strip() == '':
-            continue
-        roll = str(roll_val).strip()
-        division = r[indices['division']] if indices['division'] is not None and indices['division'] < len(r) else None
-        division = str(division).strip() if division is not None else None
-
-        subj_val = r[indices['subject']] if indices['subject'] is not None and indices['subject'] < len(r) else None
-        subject_id = None
-        if subj_val is not None and str(subj_val).strip() != '':
-            sv = str(subj_val).strip()
-            try:
-                if sv.isdigit():
-                    subject_id = int(sv)
-                else:
-                    s = Subject.query.filter((Subject.subject_code == sv) | (Subject.subject_name == sv)).first()
-                    if s:
-                        subject_id = s.subject_id
-            except Exception:
-                subject_id = None
-
-        def val_at_key(k):
-            idx = indices.get(k)
-            return r[idx] if idx is not None and idx < len(r) else None
-
-        unit1 = val_at_key('unit1')
-        unit2 = val_at_key('unit2')
-        term = val_at_key('term')
-        annual = val_at_key('annual')
-        grace = val_at_key('grace')
-
-        requested.append({
-            'roll_no': roll,
-            'division': division,
-            'subject_id': subject_id,
-            'unit1': unit1,
-            'unit2': unit2,
-            'term': term,
-            'annual': annual,
-            'grace': grace
-        })
-
-    if not requested:
-        return {"error": "No valid rows found in Excel"}, 400
-
-    # validate and filter by teacher allocation; derive subject if needed
-    to_apply = []
-    missing = []
-    for item in requested:
-        if not item['division']:
-            missing.append({"roll_no": item['roll_no'], "division": None, "reason": "division missing"})
-            continue
-        student = Student.query.filter_by(roll_no=item['roll_no'], division=item['division']).first()
-        if not student:
-            missing.append({"roll_no": item['roll_no'], "division": item['division'], "reason": "student not found"})
-            continue
-
-        # resolve subject: prefer form, then subject cell, then derive from allocation
-        sid = None
-        sid_val = request.form.get('subject_id')
-        if sid_val:
-            try:
-                sid = int(sid_val)
-            except Exception:
-                sid = None
-        if sid is None and item.get('subject_id'):
-            try:
-                sid = int(item.get('subject_id'))
-            except Exception:
-                sid = None
-        if sid is None:
-            # derive via allocations for this teacher+division
-            allocs = TeacherSubjectAllocation.query.filter_by(teacher_id=user_id, division=item['division']).all()
-            if allocs and len(allocs) == 1:
-                sid = allocs[0].subject_id
-            else:
-                sid = None
-
-        if not sid:
-            missing.append({"roll_no": item['roll_no'], "division": item['division'], "reason": "subject not resolved or ambiguous; provide subject_id"})
-            continue
-
-        alloc = _check_teacher_allocation(user_id, int(sid), item['division'])
-        if not alloc and user_type != 'ADMIN':
-            missing.append({"roll_no": item['roll_no'], "division": item['division'], "reason": "not authorized for this subject/division"})
-            continue
-
-        # numeric conversions: treat missing values as 0
+    # large sheets can be processed in the background; poll /teacher/jobs/<job_id>
+    if (request.args.get('async') or request.form.get('async') or '').lower() in ('1', 'true', 'yes'):
         try:
-            u1 = float(item['unit1']) if item.get('unit1') not in (None, '') else 0
-            u2 = float(item['unit2']) if item.get('unit2') not in (None, '') else 0
-            t = float(item['term']) if item.get('term') not in (None, '') else 0
-            a = float(item['annual']) if item.get('annual') not in (None, '') else 0
-            g = float(item['grace']) if item.get('grace') not in (None, '') else 0
-        except Exception:
-            missing.append({"roll_no": item['roll_no'], "division": item['division'], "reason": "invalid numeric value"})
-            continue
+            job = upload_jobs.submit(f, user_id, user_type, request.form.get('subject_id'))
+        except UploadError as e:
+            return e.body(), e.status_code
+        return {
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "status_url": url_for("teacher.upload_job_status", job_id=job["job_id"]),
+        }, 202
 
-        # range checks
-        if u1 < 0 or u1 > 25 or u2 < 0 or u2 > 25 or t < 0 or t > 50 or a < 0 or a > 100 or g < 0 or g > GRACE_MAX:
-            missing.append({"roll_no": item['roll_no'], "division": item['division'], "reason": "marks out of allowed ranges"})
-            continue
-
-        to_apply.append({
-            'roll_no': item['roll_no'],
-            'division': item['division'],
-            'subject_id': int(sid),
-            'unit1': u1,
-            'unit2': u2,
-            'term': t,
-            'annual': a,
-            'grace': g
-        })
-
-    if not to_apply:
-        return {"error": "No rows authorized/valid to apply", "missing": missing}, 400
-
-    # Apply upserts in transaction
-    saved = []
-    divisions_to_regen = set()
+    # Use first sheet and accept dynamic columns. Require Roll and Division at minimum.
+    # spooled to disk and streamed in read-only mode (size/row limits enforced)
     try:
-        for e in to_apply:
-            existing = Mark.query.filter_by(roll_no=str(e['roll_no']), division=e['division'], subject_id=int(e['subject_id'])).first()
-            tot = e['unit1'] + e['unit2'] + e['term'] + e['annual']
-            sub_avg = round(tot / 2, 2)
-            if existing:
-                existing.unit1 = e['unit1']
-                existing.unit2 = e['unit2']
-                existing.term = e['term']
-                existing.annual = e['annual']
-                existing.tot = tot
-                existing.sub_avg = sub_avg
-                existing.grace = e['grace']
-            else:
-                m = Mark()
-                m.roll_no = str(e['roll_no'])
-                m.division = e['division']
-                m.subject_id = int(e['subject_id'])
-                m.unit1 = e['unit1']
-                m.unit2 = e['unit2']
-                m.term = e['term']
-                m.annual = e['annual']
-                m.tot = tot
-                m.sub_avg = sub_avg
-                m.grace = e['grace']
-                m.entered_by = user_id
-                db.session.add(m)
-            divisions_to_regen.add(e['division'])
-            saved.append({"roll_no": str(e['roll_no']), "division": e['division'], "subject_id": int(e['subject_id'])})
+        headers, rows_iter = read_upload_sheet(f)
+    except UploadError as e:
+        return e.body(), e.status_code
 
-        db.session.commit()
-    except Exception as ex:
-        db.session.rollback()
-        return {"error": "Database commit failed", "details": str(ex)}, 500
+    return apply_upload(headers, rows_iter, user_id, user_type, request.form.get('subject_id'))
 
-    for d in divisions_to_regen:
-        try:
-            generate_results_for_division(d)
-        except Exception:
-            pass
 
-    return {"message": "Marks applied successfully", "saved": saved, "missing": missing}, 200
+@teacher_bp.route('/jobs/<job_id>', methods=['GET'])
+@token_required
+def upload_job_status(job_id, user_id=None, user_type=None):
+    """Progress and outcome of a background upload job (visible to its uploader and admins)."""
+    job = upload_jobs.get_job(job_id)
+    if job is None or (user_type != 'ADMIN' and (job["owner_id"], job["owner_type"]) != (user_id, user_type)):
+        return {"error": "Job not found"}, 404
+    return jsonify(job), 200
 
 
 @teacher_bp.route("/students-by-division", methods=["GET"])
 @token_required
-def students_by_division(user_id=None, user_type=None):
+@paginated
+def students_by_division(user_id=None, user_type=None, page=1, limit=None, search=None, cursor=None):
     """
     Return list of students for a division. Teacher must have any allocation for that division.
     Query param: division
+    Optional: search (roll_no/name prefix), limit + cursor (keyset pages by roll_no)
     """
     division = request.args.get("division")
     if not division:
@@ -993,8 +817,11 @@ def students_by_division(user_id=None, user_type=None):
     if not alloc and user_type != "ADMIN":
         return {"error": "Not authorized for this division"}, 403
 
-    students = Student.query.filter_by(division=division).order_by(Student.roll_no).all()
-    return jsonify([{"roll_no": s.roll_no, "name": s.name} for s in students]), 200
+    query = Student.query.filter_by(division=division)
+    if search:
+        query = query.filter(prefix_filter(search, Student.roll_no, Student.name))
+    students, next_cursor = keyset_page(query, Student.roll_no, cursor, limit)
+    return with_next_cursor(jsonify([{"roll_no": s.roll_no, "name": s.name} for s in students]), next_cursor)
 
 
 @teacher_bp.route("/student-marks", methods=["GET"])
@@ -8,6 +8,7 @@ class PaginationSchema(Schema):
     page = fields.Int(load_default=1, validate=validate.Range(min=1))
     limit = fields.Int(load_default=10, validate=validate.Range(min=1, max=100))
     search = fields.Str(allow_none=True)
+    cursor = fields.Str(allow_none=True)
 
 # ------------------------------
 # Login
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+"""
+Benchmark the admin Excel exports for a large division.
+
+Seeds a throwaway SQLite database with one division of N students (2,000 by
+default, six marks each) and reports, each in a fresh process so peak RSS
+is measured separately:
+
+  * writer only: the division export rows written with a full in-memory
+    Workbook saved to BytesIO (the previous approach) and with the
+    write-only workbook + spooled temp file used by the exports now;
+  * end to end: /admin/excel/division and /admin/excel/marksheet requests.
+
+Usage:
+  python scripts/bench_export.py
+  python scripts/bench_export.py --students 5000
+"""
+import argparse
+import gc
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+from pathlib import Path
+
+# ensure backend directory is importable when script run from workspace root
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+HEADERS = ['Roll', 'Student Name', 'Subject', 'Division', 'Unit1', 'Unit2', 'Term', 'Annual', 'Grace', 'Entered By']
+CORE = ["ENG", "OC", "ECO", "BK"]
+OPTIONAL = ["HINDI", "IT", "MATHS", "SP"]
+
+
+def peak_rss_mib():
+    # VmHWM is reset by exec; ru_maxrss (KiB on Linux) would include the parent's peak
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def make_app(db_path):
+    from app import create_app
+    return create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}",
+        "RESULT_RECOMPUTE_ASYNC": False,
+    })
+
+
+def seed(db_path, n_students):
+    from app import db
+    from auth import hash_password
+    from models import Admin, Mark, Student, Subject, Teacher
+
+    app = make_app(db_path)
+    with app.app_context():
+        db.create_all()
+        subjects = {}
+        for code in CORE + OPTIONAL:
+            s = Subject()
+            s.subject_code = code
+            s.subject_name = code.title()
+            s.subject_type = "CORE" if code in CORE else "OPTIONAL"
+            subjects[code] = s
+        teacher = Teacher(name="Bench Teacher", userid="bench", password_hash="x")
+        admin = Admin(username="bench", password_hash=hash_password("x"), active=True)
+        db.session.add_all(list(subjects.values()) + [teacher, admin])
+        db.session.flush()
+
+        students, marks = [], []
+        for i in range(1, n_students + 1):
+            roll = f"{i:05d}"
+            opt1, opt2 = ("HINDI", "MATHS") if i % 2 else ("IT", "SP")
+            students.append({"roll_no": roll, "division": "A", "name": f"Student {i}",
+                             "optional_subject": opt1, "optional_subject_2": opt2})
+            for code in CORE + [opt1, opt2]:
+                annual = 40 + i % 60
+                marks.append({"roll_no": roll, "division": "A", "subject_id": subjects[code].subject_id,
+                              "unit1": 20, "unit2": 18, "term": 40, "annual": annual, "grace": 0,
+                              "tot": 78 + annual, "sub_avg": (78 + annual) / 2, "entered_by": teacher.teacher_id})
+        db.session.execute(db.insert(Student), students)
+        db.session.execute(db.insert(Mark), marks)
+        db.session.commit()
+        return admin.admin_id
+
+
+def synthetic_rows(n_students):
+    rows = []
+    for i in range(1, n_students + 1):
+        for code in CORE + ["HINDI", "MATHS"]:
+            rows.append([f"{i:05d}", f"Student {i}", code, "A", 20, 18, 40, 40 + i % 60, 0, "Bench Teacher"])
+    return rows
+
+
+def write_in_memory(rows):
+    from openpyxl import Workbook
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Marks'
+    ws.append(HEADERS)
+    for r in rows:
+        ws.append(r)
+    bio = BytesIO()
+    wb.save(bio)
+    return bio.getbuffer().nbytes
+
+
+def write_only(rows):
+    from services import excel_export
+    wb = excel_export.new_workbook()
+    ws = wb.create_sheet('Marks')
+    ws.append(excel_export.styled_row(ws, HEADERS, excel_export.HEADER))
+    for r in rows:
+        ws.append(r)
+    spool = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    with spool:
+        wb.save(spool)
+        return spool.tell()
+
+
+def child(mode, args):
+    """Run one measurement in this (fresh) process and print it as JSON."""
+    results = []
+    if mode in ("in-memory", "write-only"):
+        # import before measuring so only the writing itself is counted
+        import openpyxl  # noqa: F401
+        from services import excel_export  # noqa: F401
+        rows = synthetic_rows(args.students)
+        gc.collect()
+        baseline = peak_rss_mib()
+        fn = write_in_memory if mode == "in-memory" else write_only
+        started = time.perf_counter()
+        size = fn(rows)
+        results.append({"label": f"division rows, {mode}", "ms": (time.perf_counter() - started) * 1000,
+                        "bytes": size, "rss": peak_rss_mib() - baseline})
+    else:
+        from auth import generate_token
+        app = make_app(args.db)
+        client = app.test_client()
+        headers = {"Authorization": f"Bearer {generate_token(args.admin_id, 'ADMIN')}"}
+        client.get("/admin/divisions", headers=headers)
+        for url in ("/admin/excel/division?division=A", "/admin/excel/marksheet?division=A"):
+            gc.collect()
+            baseline = peak_rss_mib()
+            started = time.perf_counter()
+            response = client.get(url, headers=headers)
+            size = len(response.get_data())
+            results.append({"label": url.split("?")[0], "ms": (time.perf_counter() - started) * 1000,
+                            "bytes": size, "rss": peak_rss_mib() - baseline})
+    print(json.dumps(results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark admin Excel exports")
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    parser.add_argument("--admin-id", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args.child, args)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        admin_id = seed(db_path, args.students)
+        print(f"division of {args.students} students, {args.students * 6} marks")
+        for mode in ("in-memory", "write-only", "endpoint"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", mode, "--db", db_path,
+                 "--admin-id", str(admin_id), "--students", str(args.students)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            for r in json.loads(out.strip().splitlines()[-1]):
+                print(f"{r['label']:32s} time={r['ms']:8.1f} ms  size={r['bytes'] / 1024:7.0f} KiB"
+                      f"  peak RSS +{r['rss']:6.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+"""
+Benchmark `generate_results_for_division` against a synthetic division.
+
+Seeds an SQLite database (in-memory by default) with N students and a full
+set of marks, then reports SQL statements and wall time for a cold run
+(no Result rows yet) and a warm run (Result rows exist, nothing changed).
+
+Usage:
+  python scripts/bench_results.py                 # 30, 120, 480 students
+  python scripts/bench_results.py --sizes 120 1000 --db sqlite:////tmp/bench.db
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# ensure backend directory is importable when script run from workspace root
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import event
+
+from app import create_app, db
+from models import Subject, Student, Mark, Teacher, TeacherSubjectAllocation
+from services.result_service import generate_results_for_division
+
+CORE = ["ENG", "ECO", "BK", "OC", "EVS", "PE"]
+OPTIONAL = ["HINDI", "IT", "MATHS", "SP"]
+
+
+def seed(division, n_students):
+    subjects = {}
+    for code in CORE + OPTIONAL:
+        s = Subject()
+        s.subject_code = code
+        s.subject_name = code.title()
+        s.subject_type = "OPTIONAL" if code in OPTIONAL else "CORE"
+        db.session.add(s)
+        subjects[code] = s
+    teacher = Teacher(name="Bench", userid="bench", password_hash="x")
+    db.session.add(teacher)
+    db.session.flush()
+    for code in ("ENG", "ECO", "BK", "OC"):
+        a = TeacherSubjectAllocation()
+        a.teacher_id = teacher.teacher_id
+        a.subject_id = subjects[code].subject_id
+        a.division = division
+        db.session.add(a)
+
+    for i in range(1, n_students + 1):
+        roll = f"{division}-{i:04d}"
+        opt = "HINDI" if i % 2 else "IT"
+        opt2 = "MATHS" if i % 3 else "SP"
+        st = Student()
+        st.roll_no = roll
+        st.division = division
+        st.name = f"Student {roll}"
+        st.optional_subject = opt
+        st.optional_subject_2 = opt2
+        db.session.add(st)
+        for code in CORE + [opt, opt2]:
+            m = Mark()
+            m.roll_no = roll
+            m.division = division
+            m.subject_id = subjects[code].subject_id
+            m.unit1, m.unit2, m.term, m.annual = 20, 20, 40, 35 + (i % 60)
+            m.grace = 0
+            db.session.add(m)
+    db.session.commit()
+
+
+def measure(fn):
+    counter = {"n": 0}
+
+    def on_execute(*args, **kwargs):
+        counter["n"] += 1
+
+    event.listen(db.engine, "before_cursor_execute", on_execute)
+    try:
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+    finally:
+        event.remove(db.engine, "before_cursor_execute", on_execute)
+    return counter["n"], elapsed
+
+
+def run(size, db_uri):
+    app = create_app({"SQLALCHEMY_DATABASE_URI": db_uri})
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        seed("A", size)
+        cold = measure(lambda: generate_results_for_division("A"))
+        warm = measure(lambda: generate_results_for_division("A"))
+        db.session.remove()
+        db.drop_all()
+    return cold, warm
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[30, 120, 480])
+    parser.add_argument("--db", default="sqlite:///:memory:", help="SQLAlchemy URI of a scratch database")
+    args = parser.parse_args()
+
+    print(f"{'students':>8} | {'cold queries':>12} {'cold ms':>9} | {'warm queries':>12} {'warm ms':>9}")
+    for size in args.sizes:
+        (cq, ct), (wq, wt) = run(size, args.db)
+        print(f"{size:>8} | {cq:>12} {ct * 1000:>9.1f} | {wq:>12} {wt * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+"""
+Benchmark parsing of a teacher marks upload.
+
+Writes a synthetic workbook and the same data as CSV with N data rows
+(10,000 by default) and reports parse time, throughput and peak Python
+memory (tracemalloc) for the previous in-memory full-mode load, the
+streaming read-only workbook ingestion and the CSV path used by
+/teacher/marks/upload-apply and /teacher/marks/from-excel.
+
+Usage:
+  python scripts/bench_upload.py
+  python scripts/bench_upload.py --rows 50000
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# ensure backend directory is importable when script run from workspace root
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import openpyxl
+from werkzeug.datastructures import FileStorage
+
+from app import create_app
+from services.upload_ingest import read_upload_sheet
+
+HEADER = ["Roll", "Name", "Division", "Subject", "Unit1", "Unit2", "Term", "Annual", "Grace"]
+
+
+def write_workbook(path, n_rows):
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Marks")
+    ws.append(HEADER)
+    for i in range(1, n_rows + 1):
+        ws.append([i, f"Student {i}", "A", "ENG", 20, 18, 40, 70 + i % 30, 0])
+    wb.save(path)
+
+
+def write_csv(path, n_rows):
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(HEADER)
+        for i in range(1, n_rows + 1):
+            writer.writerow([i, f"Student {i}", "A", "ENG", 20, 18, 40, 70 + i % 30, 0])
+
+
+def parse_full_mode(path):
+    """The previous route code: whole upload in a BytesIO, full (non read-only) load."""
+    with open(path, "rb") as fh:
+        data = io.BytesIO(fh.read())
+    wb = openpyxl.load_workbook(data, data_only=True)
+    sheet = wb[wb.sheetnames[0]]
+    rows_iter = sheet.iter_rows(values_only=True)
+    next(rows_iter)
+    return sum(1 for r in rows_iter if r and not all(c is None for c in r))
+
+
+def parse_streaming(app, path):
+    with app.test_request_context(), open(path, "rb") as fh:
+        _, rows = read_upload_sheet(FileStorage(stream=fh, filename=os.path.basename(path)))
+        return sum(1 for _ in rows)
+
+
+def measure(fn, *args):
+    # timed and memory-traced separately: tracemalloc itself slows parsing down
+    started = time.perf_counter()
+    rows = fn(*args)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return rows, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark marks upload parsing")
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args()
+
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "MAX_UPLOAD_ROWS": args.rows,
+        "MAX_UPLOAD_BYTES": 1024 * 1024 * 1024,
+        "RESULT_RECOMPUTE_ASYNC": False,
+    })
+
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    fd, csv_path = tempfile.mkstemp(suffix=".csv")
+    os.close(fd)
+    try:
+        write_workbook(path, args.rows)
+        write_csv(csv_path, args.rows)
+        print(f"workbook: {args.rows} rows, {os.path.getsize(path) / 1024:.0f} KiB"
+              f"  csv: {os.path.getsize(csv_path) / 1024:.0f} KiB")
+        for label, fn, fn_args in (
+            ("full mode (before)", parse_full_mode, (path,)),
+            ("read-only stream", parse_streaming, (app, path)),
+            ("csv stream", parse_streaming, (app, csv_path)),
+        ):
+            rows, elapsed, peak = measure(fn, *fn_args)
+            print(f"{label:20s} rows={rows:6d}  time={elapsed * 1000:8.1f} ms"
+                  f"  rows/s={rows / elapsed:9.0f}  peak={peak / 1024 / 1024:7.1f} MiB")
+    finally:
+        os.remove(path)
+        os.remove(csv_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,162 @@
 #!/usr/bin/env python
 """
-Export all tables from the configured database to JSON files in `backend/db_exports/`.
+Export all tables from the configured database to gzip-compressed NDJSON
+files (one JSON object per row) in `backend/db_exports/`.
+
+Tables are exported in parallel threads, each on its own connection, and
+read through a server-side cursor in batches of BATCH_ROWS, so memory use
+does not grow with table size. Every run writes a manifest.json (start
+time; per table the row count and lower bound) next to its files.
+
+With --since only rows whose `updated_at` is at or after the given time
+(UTC, as stored) are exported, into `db_exports/since_<run start>/`;
+`--since last` continues, per table, from the start of the newest previous
+export that covered that table. Tables without `updated_at` are exported
+in full. Deleted rows are not part of an incremental export.
+
 Usage:
-  python scripts/export_db.py
+  python scripts/export_db.py                                  # full snapshot
+  python scripts/export_db.py --since last --tables marks results
+  python scripts/export_db.py --since 2025-01-31T00:00:00 --workers 8
 """
+import argparse
+import gzip
+import json
 import os
 import sys
-import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
 from pathlib import Path
+
 # ensure backend directory is importable when script run from workspace root
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+from sqlalchemy import MetaData, select
+
 from app import create_app, db
-from sqlalchemy import text
+from models import now
+
+OUT_DIR = ROOT / "db_exports"
+MANIFEST = "manifest.json"
+# rows fetched from the server-side cursor per round trip
+BATCH_ROWS = 2000
+# fast gzip level: ~30% quicker than 6 for ~12% larger files on marks data
+COMPRESS_LEVEL = 1
+
+
+def json_default(value):
+    """Dates as ISO 8601 (read back by restore_db), anything else as str."""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def export_table(engine, table, path, since=None):
+    """Stream ``table`` (rows updated since ``since``, if given) to ``path``; returns the row count."""
+    stmt = select(table).order_by(*table.primary_key.columns)
+    if since is not None and "updated_at" in table.c:
+        stmt = stmt.where(table.c.updated_at >= since)
+
+    tmp = path.with_name(path.name + ".part")
+    rows = 0
+    with engine.connect() as conn, gzip.open(tmp, "wt", encoding="utf-8", compresslevel=COMPRESS_LEVEL) as out:
+        result = conn.execution_options(stream_results=True).execute(stmt)
+        for batch in result.mappings().partitions(BATCH_ROWS):
+            out.writelines(
+                json.dumps(dict(row), default=json_default, separators=(",", ":")) + "\n"
+                for row in batch
+            )
+            rows += len(batch)
+    os.replace(tmp, path)
+    return rows
+
+
+def previous_starts(base):
+    """Map table name -> start time of the newest export (full or incremental) under ``base`` that covered it."""
+    starts = {}
+    for manifest in [base / MANIFEST, *base.glob(f"since_*/{MANIFEST}")]:
+        if not manifest.exists():
+            continue
+        data = json.loads(manifest.read_text())
+        started_at = datetime.fromisoformat(data["started_at"])
+        for table in data["tables"]:
+            if table not in starts or started_at > starts[table]:
+                starts[table] = started_at
+    return starts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export database tables to gzipped NDJSON")
+    parser.add_argument("--tables", nargs="+", help="tables to export (default: all)")
+    parser.add_argument("--since", help="ISO datetime (UTC) or 'last': only rows updated since then")
+    parser.add_argument("--workers", type=int, default=4, help="tables exported in parallel")
+    parser.add_argument("--out", type=Path, default=OUT_DIR, help="export directory (default backend/db_exports)")
+    parser.add_argument("--db", help="SQLAlchemy URI (default: the configured database)")
+    args = parser.parse_args()
+
+    since = datetime.fromisoformat(args.since) if args.since and args.since != "last" else None
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": args.db} if args.db else None)
+    with app.app_context():
+        engine = db.engine
 
-OUT_DIR = Path(__file__).resolve().parents[1] / "db_exports"
-OUT_DIR.mkdir(parents=True, exist_ok=True)
+    metadata = MetaData()
+    metadata.reflect(bind=engine, only=args.tables)
+    # reflection also pulls in tables referenced by foreign keys
+    tables = [t for t in metadata.sorted_tables if not args.tables or t.name in args.tables]
 
-app = create_app()
+    # per-table lower bound on updated_at (None: export in full)
+    if args.since == "last":
+        starts = previous_starts(args.out)
+        missing = [t.name for t in tables if t.name not in starts]
+        if missing:
+            parser.error(f"--since last: no previous export of {', '.join(missing)} in {args.out}")
+        table_since = {t.name: starts[t.name] for t in tables}
+    else:
+        table_since = {t.name: since for t in tables}
+    incremental = args.since is not None
 
-with app.app_context():
-    conn = db.engine.connect()
-    inspector = db.inspect(db.engine)
-    tables = inspector.get_table_names()
+    started_at = now()
+    out_dir = args.out / f"since_{started_at:%Y%m%dT%H%M%S}" if incremental else args.out
+    out_dir.mkdir(parents=True, exist_ok=True)
+    mode = f"rows updated since {args.since}" if incremental else "full"
+    print(f"Exporting {len(tables)} tables ({mode}) to {out_dir} with {args.workers} workers")
 
-    print(f"Found {len(tables)} tables: {tables}")
+    clock = time.perf_counter()
+    manifest = {"started_at": started_at.isoformat(), "tables": {}}
+    failed = []
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {
+            pool.submit(export_table, engine, table, out_dir / f"{table.name}.ndjson.gz", table_since[table.name]): table
+            for table in tables
+        }
+        for future in as_completed(futures):
+            table = futures[future]
+            try:
+                rows = future.result()
+            except Exception as e:
+                failed.append(table.name)
+                print(f"  ✗ Error exporting {table.name}: {e}")
+                continue
+            since = table_since[table.name]
+            manifest["tables"][table.name] = {
+                "file": f"{table.name}.ndjson.gz",
+                "rows": rows,
+                "since": since.isoformat() if since else None,
+            }
+            print(f"  -> {table.name}: {rows} rows")
 
-    for table in tables:
-        print(f"Exporting table: {table} ...")
-        try:
-            result = conn.execute(text(f"SELECT * FROM `{table}`"))
-            rows = [dict(row._mapping) for row in result]
-            out_file = OUT_DIR / f"{table}.json"
-            with open(out_file, "w", encoding="utf-8") as f:
-                json.dump(rows, f, default=str, indent=2)
-            print(f"  -> Wrote {len(rows)} rows to {out_file}")
-        except Exception as e:
-            print(f"  ✗ Error exporting {table}: {e}")
+    seconds = time.perf_counter() - clock
+    total = sum(t["rows"] for t in manifest["tables"].values())
+    if failed:
+        # no manifest: the next `--since last` must not skip these tables' changes
+        sys.exit(f"Failed tables: {', '.join(failed)}")
+    (out_dir / MANIFEST).write_text(json.dumps(manifest, indent=2))
+    print(f"Export complete: {total} rows in {seconds:.2f} s ({total / seconds:.0f} rows/s)")
 
-    conn.close()
 
-print("Export complete.")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+"""
+Render every marksheet of a division as PDF and report throughput.
+
+Loads the division's results in one query (recomputing them first if
+stale) and writes either one multi-page PDF or a ZIP of per-student PDFs,
+either way rendered across a process pool, printing pages per second.
+
+With --synthetic N no database is used: N generated marksheets are
+rendered as a combined PDF and as a ZIP for each --workers value, to
+compare throughput.
+
+Usage:
+  python scripts/render_marksheets.py --division A                   # marksheets_div_A.pdf
+  python scripts/render_marksheets.py --division A --format zip --workers 4
+  python scripts/render_marksheets.py --synthetic 2000 --workers 1 4
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# ensure backend directory is importable when script run from workspace root
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from services import marksheet_pdf
+
+
+def synthetic(n):
+    return [
+        {
+            "roll_no": f"{i:05d}",
+            "name": f"Student {i}",
+            "division": "A",
+            "subjects": [(code, 40 + (i + k) % 55, k % 3)
+                         for k, (code, _, _) in enumerate(marksheet_pdf.SUBJECT_FIELDS[:6])],
+            "percentage": 40 + i % 55,
+        }
+        for i in range(1, n + 1)
+    ]
+
+
+def render(datas, fmt, workers):
+    """Render to bytes; returns (bytes, seconds)."""
+    started = time.perf_counter()
+    if fmt == "zip":
+        data = b"".join(marksheet_pdf.stream_zip(marksheet_pdf.render_each(datas, workers)))
+    else:
+        data = marksheet_pdf.render_combined(datas, workers)
+    return data, time.perf_counter() - started
+
+
+def report(label, pages, size, seconds):
+    print(f"{label:24s} pages={pages:6d}  time={seconds:7.2f} s  pages/s={pages / seconds:8.1f}  size={size / 1024:8.0f} KiB")
+
+
+def load_division(division):
+    from app import create_app
+    from models import Result
+    from services.result_service import ensure_results_current
+
+    app = create_app()
+    with app.app_context():
+        ensure_results_current(division)
+        return [
+            marksheet_pdf.marksheet_data(r)
+            for r in Result.query.filter_by(division=division).order_by(Result.roll_no)
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render division marksheets as PDF")
+    parser.add_argument("--division")
+    parser.add_argument("--format", choices=("pdf", "zip"), default="pdf")
+    parser.add_argument("--workers", type=int, nargs="+", default=[0], help="pool size(s); 0 = CPU count")
+    parser.add_argument("--out", help="output file (default marksheets_div_<division>.<format>)")
+    parser.add_argument("--synthetic", type=int, metavar="N", help="benchmark N generated marksheets instead")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        datas = synthetic(args.synthetic)
+        # warm the pool(s) so process start-up is not counted
+        for workers in args.workers:
+            render(datas[:marksheet_pdf.POOL_MIN_PAGES], "zip", workers)
+        for workers in args.workers:
+            for fmt, label in (("pdf", "combined pdf"), ("zip", "zip")):
+                data, seconds = render(datas, fmt, workers)
+                report(f"{label}, workers={workers or 'cpu'}", len(datas), len(data), seconds)
+        return
+
+    if not args.division:
+        parser.error("--division or --synthetic is required")
+    datas = load_division(args.division)
+    if not datas:
+        sys.exit(f"No results found for division {args.division}")
+    data, seconds = render(datas, args.format, args.workers[0])
+    out = Path(args.out or f"marksheets_div_{args.division}.{args.format}")
+    out.write_bytes(data)
+    report(f"{args.format} -> {out}", len(datas), len(data), seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+"""
+Restore a `backend/db_exports/` snapshot (written by scripts/export_db.py)
+into the configured database and report rows per second.
+
+Tables are created from the models if missing and loaded parent-first in
+foreign-key order from `<table>.ndjson.gz` (or a legacy `<table>.json`),
+in chunked executemany INSERTs of CHUNK_ROWS rows. During a full restore
+foreign-key and unique checks are off (MySQL session variables, SQLite
+pragma) and the non-unique indexes of the loaded tables are dropped, then
+rebuilt once all rows are in. Unique constraints are kept.
+
+A full restore refuses to load into a table that already has rows unless
+--replace is given (its rows are deleted first). --upsert instead inserts
+or updates rows by primary key with indexes and checks left in place;
+use it to apply an incremental `since_*` export on top of a restore.
+
+Restart the API afterwards so in-process caches are rebuilt.
+
+Usage:
+  python scripts/restore_db.py                                  # backend/db_exports
+  python scripts/restore_db.py --dir /backups/db_exports --replace
+  python scripts/restore_db.py --dir db_exports/since_20250131T020000 --upsert
+  python scripts/restore_db.py --db sqlite:///restored.db --tables subjects marks
+"""
+import argparse
+import gzip
+import json
+import sys
+import time
+from datetime import date, datetime
+from itertools import islice
+from pathlib import Path
+
+# ensure backend directory is importable when script run from workspace root
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import Date, DateTime, func, select, text
+
+from app import create_app, db
+from services.db_bulk import upsert_rows
+
+SNAPSHOT_DIR = ROOT / "db_exports"
+# rows per executemany round trip
+CHUNK_ROWS = 2000
+
+
+def snapshot_file(directory, table):
+    for name in (f"{table}.ndjson.gz", f"{table}.json"):
+        path = directory / name
+        if path.exists():
+            return path
+    return None
+
+
+def read_snapshot(path):
+    """Yield the rows of a snapshot file as dicts."""
+    if path.name.endswith(".ndjson.gz"):
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        with open(path, encoding="utf-8") as fh:
+            yield from json.load(fh)
+
+
+def row_converter(table):
+    """
+    Function turning a snapshot row into insert parameters: unknown keys are
+    dropped and ISO date/datetime strings are parsed for the column type.
+    """
+    parsers = {}
+    for column in table.columns:
+        if isinstance(column.type, DateTime):
+            parsers[column.name] = datetime.fromisoformat
+        elif isinstance(column.type, Date):
+            parsers[column.name] = date.fromisoformat
+    names = [c.name for c in table.columns]
+
+    def convert(row):
+        values = {}
+        for name in names:
+            if name in row:
+                value = row[name]
+                parse = parsers.get(name)
+                values[name] = parse(value) if parse and isinstance(value, str) else value
+        return values
+
+    return convert
+
+
+def chunks(rows, size):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def set_checks(conn, enabled):
+    """Turn foreign-key (and on MySQL unique) checks on or off for this connection."""
+    dialect = conn.dialect.name
+    flag = 1 if enabled else 0
+    if dialect == "mysql":
+        conn.execute(text(f"SET FOREIGN_KEY_CHECKS={flag}"))
+        conn.execute(text(f"SET UNIQUE_CHECKS={flag}"))
+    elif dialect == "sqlite":
+        conn.execute(text(f"PRAGMA foreign_keys={'ON' if enabled else 'OFF'}"))
+    conn.commit()
+
+
+def drop_indexes(conn, table):
+    """Drop the table's non-unique indexes; returns those dropped (to rebuild later)."""
+    dropped = []
+    for index in table.indexes:
+        if index.unique:
+            continue
+        try:
+            index.drop(bind=conn)
+            conn.commit()
+            dropped.append(index)
+        except Exception as e:
+            # e.g. MySQL keeps an index a foreign key relies on
+            conn.rollback()
+            print(f"     (keeping index {index.name}: {e.__class__.__name__})")
+    return dropped
+
+
+def load_table(conn, table, rows):
+    """Insert ``rows`` in CHUNK_ROWS executemany batches; returns the row count."""
+    convert = row_converter(table)
+    count = 0
+    insert = table.insert()
+    for chunk in chunks(map(convert, rows), CHUNK_ROWS):
+        conn.execute(insert, chunk)
+        count += len(chunk)
+    conn.commit()
+    return count
+
+
+def upsert_table(table, rows):
+    """Insert or update ``rows`` by primary key through the model's table; returns the row count."""
+    convert = row_converter(table)
+    keys = [c.name for c in table.primary_key.columns]
+    model = next(m.class_ for m in db.Model.registry.mappers if m.local_table is table)
+    count = 0
+    for chunk in chunks(map(convert, rows), CHUNK_ROWS):
+        updates = [k for k in chunk[0] if k not in keys]
+        upsert_rows(model, chunk, key_columns=keys, update_columns=updates)
+        count += len(chunk)
+    db.session.commit()
+    return count
+
+
+def report(label, rows, seconds):
+    rate = rows / seconds if seconds else 0
+    print(f"  -> {label:32s} {rows:8d} rows  {seconds:7.2f} s  {rate:9.0f} rows/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Restore db_exports snapshots")
+    parser.add_argument("--dir", type=Path, default=SNAPSHOT_DIR, help="snapshot directory (default backend/db_exports)")
+    parser.add_argument("--tables", nargs="+", help="tables to restore (default: every table with a snapshot)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--replace", action="store_true", help="delete existing rows of restored tables first")
+    mode.add_argument("--upsert", action="store_true", help="insert or update by primary key (incremental exports)")
+    parser.add_argument("--db", help="SQLAlchemy URI (default: the configured database)")
+    args = parser.parse_args()
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": args.db} if args.db else None)
+    with app.app_context():
+        db.create_all()
+        # parents before children
+        plan = [
+            (table, path)
+            for table in db.metadata.sorted_tables
+            if (not args.tables or table.name in args.tables)
+            and (path := snapshot_file(args.dir, table.name)) is not None
+        ]
+        if not plan:
+            sys.exit(f"No snapshots to restore in {args.dir}")
+        print(f"Restoring {len(plan)} tables from {args.dir} ({'upsert' if args.upsert else 'bulk load'})")
+
+        clock = time.perf_counter()
+        total = 0
+        if args.upsert:
+            for table, path in plan:
+                started = time.perf_counter()
+                rows = upsert_table(table, read_snapshot(path))
+                report(table.name, rows, time.perf_counter() - started)
+                total += rows
+        else:
+            with db.engine.connect() as conn:
+                for table, _ in plan:
+                    if conn.execute(select(func.count()).select_from(table)).scalar() and not args.replace:
+                        sys.exit(f"Table {table.name} is not empty; use --replace or --upsert")
+
+                set_checks(conn, False)
+                dropped = []
+                try:
+                    if args.replace:
+                        for table, _ in reversed(plan):
+                            conn.execute(table.delete())
+                        conn.commit()
+
+                    for table, path in plan:
+                        dropped += drop_indexes(conn, table)
+                        started = time.perf_counter()
+                        rows = load_table(conn, table, read_snapshot(path))
+                        report(table.name, rows, time.perf_counter() - started)
+                        total += rows
+                finally:
+                    # rebuild even when a load failed, so no table is left without its indexes
+                    conn.rollback()
+                    started = time.perf_counter()
+                    for index in dropped:
+                        index.create(bind=conn)
+                    conn.commit()
+                    print(f"  -> rebuilt {len(dropped)} indexes in {time.perf_counter() - started:.2f} s")
+                    set_checks(conn, True)
+
+        seconds = time.perf_counter() - clock
+        print(f"Restore complete: {total} rows in {seconds:.2f} s ({total / seconds:.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+# /backend/services/artifact_cache.py
+"""
+Local-disk cache of generated export files.
+
+Exports are keyed by (export type, division, version...) where the version
+parts change whenever the exported data does, so a cached file never needs
+to be invalidated explicitly: a newer version simply misses and replaces
+the older entries of the same export. Files are stored under their SHA-256
+content hash, served with that hash as ETag and their creation time as
+Last-Modified, and evicted least-recently-used once the cache exceeds
+EXPORT_CACHE_MAX_BYTES (0 disables caching).
+
+The key index lives in memory, so each worker process keeps its own cache
+in a `p<pid>` subdirectory of EXPORT_CACHE_DIR and the size bound applies
+per process. A process only purges its own directory and those of
+processes that are no longer running, never files another live worker
+still serves or is writing.
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from flask import request, send_file
+
+COPY_CHUNK_BYTES = 64 * 1024
+# cached files are named by their hex digest; partial writes end in .tmp
+CACHE_FILE_RE = re.compile(r"^([0-9a-f]{64}|.+\.tmp)$")
+# per-process cache directories
+PROCESS_DIR_RE = re.compile(r"^p(\d+)$")
+
+Artifact = namedtuple("Artifact", ["digest", "size", "created_at"])
+
+
+class ArtifactCache:
+    """Size-bounded LRU of content-addressed files with an in-memory key index."""
+
+    def __init__(self):
+        self.root = None
+        self.directory = None
+        self.max_bytes = 0
+        self._pid = None
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._bytes_saved = 0
+        self._evictions = 0
+
+    def init_app(self, app):
+        self.root = app.config.get("EXPORT_CACHE_DIR") or os.path.join(
+            tempfile.gettempdir(), "export_cache"
+        )
+        self.max_bytes = app.config.get("EXPORT_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+        with self._lock:
+            self._pid = None
+        self._ensure_process()
+
+    def _ensure_process(self):
+        """
+        Bind the cache to this process's directory, starting empty. Runs again
+        after a fork, so workers forked from a preloaded app do not share files.
+        """
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._pid = pid
+            self.directory = os.path.join(self.root, f"p{pid}")
+            self._entries.clear()
+            self._hits = self._misses = self._bytes_saved = self._evictions = 0
+            # the index lives in memory; files left by an earlier process with this pid are unreachable
+            if os.path.isdir(self.directory):
+                for name in os.listdir(self.directory):
+                    if CACHE_FILE_RE.match(name):
+                        self._remove_file(name)
+            self._purge_dead_processes()
+
+    def _purge_dead_processes(self):
+        """Remove the directories of cache processes that are no longer running. Caller holds the lock."""
+        if not os.path.isdir(self.root):
+            return
+        for name in os.listdir(self.root):
+            match = PROCESS_DIR_RE.match(name)
+            if not match or int(match.group(1)) == self._pid:
+                continue
+            try:
+                os.kill(int(match.group(1)), 0)
+            except ProcessLookupError:
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+            except OSError:
+                # running under another user: alive
+                pass
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def _path(self, digest):
+        return os.path.join(self.directory, digest)
+
+    def _remove_file(self, name):
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except OSError:
+            pass
+
+    def _drop(self, key):
+        """Forget ``key``; remove its file unless another key has the same content. Caller holds the lock."""
+        entry = self._entries.pop(key)
+        if not any(e.digest == entry.digest for e in self._entries.values()):
+            self._remove_file(entry.digest)
+
+    def _total_bytes(self):
+        return sum(e.size for e in {e.digest: e for e in self._entries.values()}.values())
+
+    # ---------------- reads ----------------
+    def open(self, key):
+        """Return (Artifact, open binary file) for a cached key, or None on a miss."""
+        if not self.enabled:
+            return None
+        self._ensure_process()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                try:
+                    # opened under the lock so a concurrent eviction cannot remove it first
+                    fh = open(self._path(entry.digest), "rb")
+                except OSError:
+                    self._drop(key)
+                    entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            self._bytes_saved += entry.size
+            return entry, fh
+
+    # ---------------- writes ----------------
+    def store(self, key, fileobj):
+        """
+        Copy ``fileobj`` (read from its current position) into the cache under
+        ``key``, replacing older entries of the same export. Returns
+        (Artifact, open binary file) for sending the stored copy.
+        """
+        self._ensure_process()
+        os.makedirs(self.directory, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while True:
+                    chunk = fileobj.read(COPY_CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+            entry = Artifact(digest.hexdigest(), size, time.time())
+            with self._lock:
+                os.replace(tmp, self._path(entry.digest))
+                # the same export at an older version can no longer be requested
+                for old in [k for k in self._entries if k[:2] == key[:2] and k != key]:
+                    self._drop(old)
+                if key in self._entries:
+                    self._drop(key)
+                self._entries[key] = entry
+                fh = open(self._path(entry.digest), "rb")
+                while len(self._entries) > 1 and self._total_bytes() > self.max_bytes:
+                    self._drop(next(iter(self._entries)))
+                    self._evictions += 1
+            return entry, fh
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    # ---------------- responses ----------------
+    def send(self, entry, fh, filename, mimetype):
+        """Attachment response for a cached file (304 when the client's copy is current)."""
+        rv = send_file(
+            fh,
+            mimetype=mimetype,
+            download_name=filename,
+            as_attachment=True,
+            etag=entry.digest,
+            last_modified=entry.created_at,
+            conditional=False,
+        )
+        rv.content_length = entry.size
+        return rv.make_conditional(request.environ, complete_length=entry.size)
+
+    # ---------------- reporting ----------------
+    def stats(self):
+        self._ensure_process()
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes(),
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else None,
+                "bytes_saved": self._bytes_saved,
+                "evictions": self._evictions,
+            }
+
+
+export_cache = ArtifactCache()
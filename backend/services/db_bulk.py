@@ -0,0 +1,100 @@
+# /backend/services/db_bulk.py
+"""
+Bulk write helpers shared by the service layer.
+
+`upsert_rows` issues a native multi-row upsert (MySQL ``INSERT ... ON DUPLICATE
+KEY UPDATE``, SQLite/PostgreSQL ``INSERT ... ON CONFLICT DO UPDATE``) so that a
+whole batch is written with one statement per chunk instead of one SELECT +
+INSERT/UPDATE per row.
+"""
+
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from app import db
+
+UPSERT_CHUNK_SIZE = 500
+
+
+def chunked(items, size):
+    """Yield successive ``size``-long slices of ``items``."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def upsert_rows(model, rows, key_columns, update_columns, chunk_size=UPSERT_CHUNK_SIZE):
+    """
+    Insert ``rows`` into ``model``'s table, updating ``update_columns`` when a
+    row with the same ``key_columns`` (a unique constraint) already exists.
+
+    Every row must carry the same keys. Columns omitted from the rows fall back
+    to their Python-side defaults on insert. The caller owns the transaction.
+    Returns the number of rows sent to the database.
+    """
+    if not rows:
+        return 0
+
+    table = model.__table__
+    dialect = db.session.get_bind().dialect.name
+
+    for chunk in chunked(rows, chunk_size):
+        if dialect == "mysql":
+            stmt = mysql.insert(table)
+            stmt = stmt.on_duplicate_key_update(
+                {c: stmt.inserted[c] for c in update_columns}
+            )
+        elif dialect in ("sqlite", "postgresql"):
+            insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+            stmt = insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(key_columns),
+                set_={c: stmt.excluded[c] for c in update_columns},
+            )
+        else:
+            # No native upsert available: fall back to per-row ORM merge.
+            for row in chunk:
+                existing = model.query.filter_by(
+                    **{k: row[k] for k in key_columns}
+                ).first()
+                if existing is None:
+                    existing = model()
+                    db.session.add(existing)
+                    columns = row.keys()
+                else:
+                    columns = update_columns
+                for k in columns:
+                    setattr(existing, k, row[k])
+            db.session.flush()
+            continue
+
+        db.session.execute(stmt, chunk)
+
+    return len(rows)
+
+
+def insert_missing_rows(model, rows, key_columns):
+    """
+    Insert ``rows`` into ``model``'s table, silently skipping rows whose
+    ``key_columns`` already exist (MySQL ``INSERT IGNORE``, SQLite/PostgreSQL
+    ``ON CONFLICT DO NOTHING``). The caller owns the transaction.
+    """
+    if not rows:
+        return
+    table = model.__table__
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == "mysql":
+        stmt = mysql.insert(table).prefix_with("IGNORE")
+    elif dialect in ("sqlite", "postgresql"):
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = insert(table).on_conflict_do_nothing(index_elements=list(key_columns))
+    else:
+        keys = {
+            tuple(getattr(r, k) for k in key_columns)
+            for r in model.query.with_entities(*[getattr(model, k) for k in key_columns])
+        }
+        rows = [r for r in rows if tuple(r[k] for k in key_columns) not in keys]
+        if not rows:
+            return
+        stmt = table.insert()
+
+    db.session.execute(stmt, rows)
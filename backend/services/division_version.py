@@ -0,0 +1,76 @@
+# /backend/services/division_version.py
+"""
+Per-division data versions used to detect stale results.
+
+Every write that can change a division's results (marks, students, teacher
+allocations) calls `bump_data_version` inside its own transaction. Result
+generation records the data version it computed from, so readers only need
+to compare two integers to know whether the stored Result rows are current.
+"""
+
+from app import db
+from models import DivisionVersion, now
+from services.db_bulk import insert_missing_rows
+
+
+def _ensure_rows(divisions):
+    insert_missing_rows(
+        DivisionVersion,
+        [{"division": d, "data_version": 0} for d in divisions],
+        key_columns=("division",),
+    )
+
+
+def bump_data_version(*divisions):
+    """
+    Increment the data version of each division in the current transaction.
+    Must be called before the caller's commit so the bump and the data change
+    become visible together. Returns {division: new data version}; pass it to
+    `recompute_queue.schedule_student` once committed.
+    """
+    # sorted so concurrent writers lock version rows in the same order
+    divisions = sorted({d for d in divisions if d})
+    if not divisions:
+        return {}
+    _ensure_rows(divisions)
+    db.session.execute(
+        db.update(DivisionVersion)
+        .where(DivisionVersion.division.in_(divisions))
+        .values(data_version=DivisionVersion.data_version + 1, updated_at=now())
+    )
+    # the rows stay locked by this transaction, so these are our own bumps
+    return dict(
+        db.session.query(DivisionVersion.division, DivisionVersion.data_version)
+        .filter(DivisionVersion.division.in_(divisions))
+    )
+
+
+def get_versions(division):
+    """Return (data_version, results_version) of a division; (0, None) if never tracked."""
+    row = (
+        db.session.query(DivisionVersion.data_version, DivisionVersion.results_version)
+        .filter(DivisionVersion.division == division)
+        .first()
+    )
+    if row is None:
+        return 0, None
+    return row.data_version, row.results_version
+
+
+def get_data_version(division):
+    return get_versions(division)[0]
+
+
+def record_results_version(division, version):
+    """Remember that the division's results were computed from ``version``."""
+    _ensure_rows([division])
+    db.session.execute(
+        db.update(DivisionVersion)
+        .where(DivisionVersion.division == division)
+        .values(results_version=version, updated_at=now())
+    )
+
+
+def results_are_current(division):
+    data_version, results_version = get_versions(division)
+    return results_version is not None and results_version == data_version
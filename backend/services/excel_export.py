@@ -0,0 +1,110 @@
+# /backend/services/excel_export.py
+"""
+Write-only workbook helpers for the admin Excel exports.
+
+Workbooks are created in openpyxl write-only mode: rows are serialised as
+they are appended instead of being kept as cell objects, and styled cells
+all refer to a few named styles registered once per workbook. The finished
+file is saved to a spooled temp file (in memory up to
+EXPORT_SPOOL_MAX_BYTES, on disk beyond that) and sent in chunks.
+Exports that are keyed by data version can be kept in the artifact cache
+and served from disk while the data is unchanged.
+"""
+
+import tempfile
+
+from flask import current_app, send_file
+
+from services.artifact_cache import export_cache
+
+try:
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Font, NamedStyle
+    from openpyxl.worksheet.cell_range import CellRange
+except Exception:  # pragma: no cover - optional at import time, checked when exporting
+    Workbook = None
+
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# named styles shared by every styled cell of an export
+HEADER = "export_header"
+TITLE = "export_title"
+CENTER = "export_center"
+RIGHT = "export_right"
+
+
+def _named_styles():
+    return [
+        NamedStyle(name=HEADER, font=Font(bold=True), alignment=Alignment(horizontal="center", vertical="center")),
+        NamedStyle(name=TITLE, font=Font(bold=True), alignment=Alignment(horizontal="center")),
+        NamedStyle(name=CENTER, alignment=Alignment(horizontal="center")),
+        NamedStyle(name=RIGHT, alignment=Alignment(horizontal="right")),
+    ]
+
+
+def new_workbook():
+    """Write-only workbook with the export named styles registered."""
+    if Workbook is None:
+        raise RuntimeError("Server missing Excel support (openpyxl)")
+    wb = Workbook(write_only=True)
+    for style in _named_styles():
+        wb.add_named_style(style)
+    return wb
+
+
+def styled(ws, value, style):
+    """A write-only cell carrying one of the named styles."""
+    cell = WriteOnlyCell(ws, value=value)
+    cell.style = style
+    return cell
+
+
+def styled_row(ws, values, style):
+    return [styled(ws, v, style) for v in values]
+
+
+def merge(ws, start_row, start_column, end_row, end_column):
+    """Merge a range of a write-only sheet (written with the sheet's tail on save)."""
+    ws.merged_cells.add(CellRange(min_col=start_column, min_row=start_row, max_col=end_column, max_row=end_row))
+
+
+def save_workbook(wb):
+    """Save ``wb`` to a spooled temp file; returns (file positioned at 0, size)."""
+    max_bytes = current_app.config.get("EXPORT_SPOOL_MAX_BYTES", 8 * 1024 * 1024)
+    spool = tempfile.SpooledTemporaryFile(max_size=max_bytes)
+    try:
+        wb.save(spool)
+        size = spool.tell()
+        spool.seek(0)
+    except BaseException:
+        spool.close()
+        raise
+    return spool, size
+
+
+def send_workbook(wb, filename):
+    """Save ``wb`` to a spooled temp file and return it as an attachment response."""
+    spool, size = save_workbook(wb)
+    # the response closes the spool once it has been sent
+    rv = send_file(spool, mimetype=XLSX_MIMETYPE, download_name=filename, as_attachment=True)
+    rv.content_length = size
+    return rv
+
+
+def send_cached_export(cache_key, filename):
+    """Response for a cached export, or None when ``cache_key`` is not cached."""
+    hit = export_cache.open(cache_key)
+    if hit is None:
+        return None
+    return export_cache.send(*hit, filename, XLSX_MIMETYPE)
+
+
+def send_cached_workbook(wb, filename, cache_key):
+    """Like send_workbook, keeping the file in the artifact cache under ``cache_key``."""
+    if not export_cache.enabled:
+        return send_workbook(wb, filename)
+    spool, _ = save_workbook(wb)
+    with spool:
+        entry, fh = export_cache.store(cache_key, spool)
+    return export_cache.send(entry, fh, filename, XLSX_MIMETYPE)
@@ -0,0 +1,139 @@
+# /backend/services/export_data.py
+"""
+Bulk-loaded data for the admin Excel exports.
+
+The exports used to query the mark (and its teacher) for every
+student x subject cell. `load_export_data` fetches the active subjects and,
+in one query, every mark of the exported students joined to its subject
+code and entering teacher, so the workbook builders only do dict lookups.
+
+The CSV exports can cover the whole college, so instead of loading they
+iterate a single ordered query with `yield_per` (a server-side cursor on
+MySQL) and keep only the current student's rows in memory.
+"""
+
+from itertools import groupby
+
+from sqlalchemy import and_, func, select
+
+from app import db
+from models import Mark, Result, Student, Subject, Teacher
+from services.result_service import RESULT_VALUE_FIELDS
+from services.division_version import get_data_version
+
+# rows fetched per round trip when streaming an export
+STREAM_BATCH_ROWS = 1000
+
+
+class ExportData:
+    """Active subjects and a (roll_no, division, subject_code) -> mark row map."""
+
+    def __init__(self, subjects, marks):
+        self.subjects = subjects
+        self.subjects_by_code = {s.subject_code: s for s in subjects}
+        self.marks = marks
+
+    def subject_codes_for(self, student):
+        """Sorted codes of the active subjects a student takes (all CORE plus their optionals)."""
+        codes = {s.subject_code for s in self.subjects if s.subject_type == 'CORE'}
+        for opt in (student.optional_subject, student.optional_subject_2):
+            if opt in self.subjects_by_code:
+                codes.add(opt)
+        return sorted(codes)
+
+    def mark(self, student, subject_code):
+        """Mark row (mark columns plus ``teacher_name``) or None."""
+        return self.marks.get((student.roll_no, student.division, subject_code))
+
+
+def export_version(division):
+    """
+    Version parts identifying a division export's content: the division's data
+    version (marks, students, allocations) plus a fingerprint of the subjects.
+    """
+    count, last_update = db.session.query(func.count(Subject.subject_id), func.max(Subject.updated_at)).one()
+    return get_data_version(division), count, last_update.isoformat() if last_update else None
+
+
+def load_export_data(students, division=None):
+    """
+    Load subjects and marks for the given students. Pass ``division`` when
+    the students are the whole division so marks are selected by division alone.
+    """
+    subjects = Subject.query.filter_by(active=True).order_by(Subject.subject_code).all()
+    if not students:
+        return ExportData(subjects, {})
+
+    query = (
+        db.session.query(
+            Mark.roll_no, Mark.division, Subject.subject_code,
+            Mark.unit1, Mark.unit2, Mark.term, Mark.internal, Mark.annual,
+            Mark.tot, Mark.sub_avg, Mark.grace,
+            Teacher.name.label('teacher_name'),
+        )
+        .join(Subject, Subject.subject_id == Mark.subject_id)
+        .outerjoin(Teacher, Teacher.teacher_id == Mark.entered_by)
+    )
+    if division is not None:
+        query = query.filter(Mark.division == division)
+    else:
+        query = query.filter(
+            Mark.division.in_({s.division for s in students}),
+            Mark.roll_no.in_({s.roll_no for s in students}),
+        )
+
+    keys = {(s.roll_no, s.division) for s in students}
+    marks = {}
+    for row in query:
+        if (row.roll_no, row.division) in keys:
+            marks.setdefault((row.roll_no, row.division, row.subject_code), row)
+    return ExportData(subjects, marks)
+
+
+def iter_student_marks(division=None):
+    """
+    Yield (student, subject_codes, marks_by_code) for every student of a
+    division (or of all divisions), ordered by division and roll number.
+    ``student`` has the Student columns, the marks (mark columns plus
+    ``teacher_name``) are keyed by subject code.
+    """
+    data = ExportData(Subject.query.filter_by(active=True).order_by(Subject.subject_code).all(), {})
+    stmt = (
+        select(
+            Student.student_id, Student.roll_no, Student.name, Student.division,
+            Student.optional_subject, Student.optional_subject_2,
+            Subject.subject_code,
+            Mark.unit1, Mark.unit2, Mark.term, Mark.internal, Mark.annual,
+            Mark.tot, Mark.sub_avg, Mark.grace,
+            Teacher.name.label('teacher_name'),
+        )
+        .outerjoin(Mark, and_(Mark.roll_no == Student.roll_no, Mark.division == Student.division))
+        .outerjoin(Subject, Subject.subject_id == Mark.subject_id)
+        .outerjoin(Teacher, Teacher.teacher_id == Mark.entered_by)
+        .order_by(Student.division, Student.roll_no, Student.student_id)
+        .execution_options(yield_per=STREAM_BATCH_ROWS)
+    )
+    if division is not None:
+        stmt = stmt.where(Student.division == division)
+
+    for _, rows in groupby(db.session.execute(stmt), key=lambda row: row.student_id):
+        rows = list(rows)
+        marks = {}
+        for row in rows:
+            if row.subject_code is not None:
+                marks.setdefault(row.subject_code, row)
+        student = rows[0]
+        yield student, data.subject_codes_for(student), marks
+
+
+def iter_results(division=None):
+    """Yield Result rows (RESULT_VALUE_FIELDS) of a division or of all divisions, by division and roll."""
+    columns = [getattr(Result, f) for f in RESULT_VALUE_FIELDS]
+    stmt = (
+        select(*columns)
+        .order_by(Result.division, Result.roll_no)
+        .execution_options(yield_per=STREAM_BATCH_ROWS)
+    )
+    if division is not None:
+        stmt = stmt.where(Result.division == division)
+    yield from db.session.execute(stmt)
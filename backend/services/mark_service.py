@@ -0,0 +1,84 @@
+# /backend/services/mark_service.py
+"""
+Bulk writes of Mark rows.
+
+`bulk_upsert_marks` writes a batch of marks with the native upsert in
+`db_bulk.upsert_rows`, keyed on the ``uq_roll_div_subject`` constraint, so a
+batch costs one existence query plus one statement per chunk instead of a
+SELECT and an ORM flush per row.
+"""
+
+from app import db
+from models import Mark, now
+from services.db_bulk import upsert_rows, chunked
+
+MARK_KEY_COLUMNS = ("roll_no", "division", "subject_id")
+# columns refreshed when a mark already exists (entered_by is kept from the first entry)
+MARK_UPDATE_COLUMNS = ["unit1", "unit2", "term", "annual", "tot", "sub_avg", "grace", "updated_at"]
+
+LOOKUP_CHUNK_SIZE = 1000
+
+
+def mark_totals(unit1, unit2, term, annual):
+    """Return (tot, sub_avg) for the four mark components."""
+    tot = unit1 + unit2 + term + annual
+    return tot, round(tot / 2, 2)
+
+
+def _norm_key(roll_no, division, subject_id):
+    # compared case-insensitively, as the unique key is under the MySQL collation
+    return str(roll_no).strip().lower(), str(division).strip().lower(), int(subject_id)
+
+
+def _count_existing(rows):
+    """How many of ``rows`` already have a mark (for inserted/updated reporting)."""
+    wanted = {_norm_key(r["roll_no"], r["division"], r["subject_id"]) for r in rows}
+    divisions = sorted({r["division"] for r in rows})
+    subject_ids = sorted({r["subject_id"] for r in rows})
+    found = set()
+    for rolls in chunked(sorted({r["roll_no"] for r in rows}), LOOKUP_CHUNK_SIZE):
+        query = db.session.query(Mark.roll_no, Mark.division, Mark.subject_id).filter(
+            Mark.roll_no.in_(rolls),
+            Mark.division.in_(divisions),
+            Mark.subject_id.in_(subject_ids),
+        )
+        found.update(_norm_key(*key) for key in query)
+    return len(wanted & found)
+
+
+def bulk_upsert_marks(entries, entered_by=None):
+    """
+    Insert or update marks in bulk.
+
+    ``entries`` are dicts with roll_no, division, subject_id and numeric
+    unit1/unit2/term/annual/grace; tot and sub_avg are computed here and
+    ``entered_by`` is only recorded on insert. When a key repeats, the last
+    entry wins. The caller owns the transaction.
+    Returns (inserted, updated).
+    """
+    stamp = now()
+    rows = {}
+    for e in entries:
+        tot, sub_avg = mark_totals(e["unit1"], e["unit2"], e["term"], e["annual"])
+        row = {
+            "roll_no": str(e["roll_no"]),
+            "division": e["division"],
+            "subject_id": int(e["subject_id"]),
+            "unit1": e["unit1"],
+            "unit2": e["unit2"],
+            "term": e["term"],
+            "annual": e["annual"],
+            "tot": tot,
+            "sub_avg": sub_avg,
+            "grace": e["grace"],
+            "entered_by": entered_by,
+            "updated_at": stamp,
+        }
+        rows[_norm_key(row["roll_no"], row["division"], row["subject_id"])] = row
+    if not rows:
+        return 0, 0
+
+    rows = list(rows.values())
+    updated = _count_existing(rows)
+    upsert_rows(Mark, rows, key_columns=MARK_KEY_COLUMNS, update_columns=MARK_UPDATE_COLUMNS)
+    return len(rows) - updated, updated
@@ -0,0 +1,190 @@
+# /backend/services/marks_upload.py
+"""
+Validate-and-apply pipeline for teacher marks uploads (the upload-apply step).
+
+Shared by the synchronous `/teacher/marks/upload-apply` request and the
+background upload jobs: parsed sheet rows are mapped to marks, validated in
+chunks against bulk-resolved students/subjects/allocations, and written with
+one bulk upsert in a single transaction.
+"""
+
+from app import db
+from config import GRACE_MAX
+from services.division_version import bump_data_version
+from services.mark_service import bulk_upsert_marks
+from services.recompute_queue import recompute_queue
+from services.upload_ingest import UploadError
+from services.upload_resolver import UploadResolver
+
+# rows validated per resolver round trip (and per progress report)
+UPLOAD_CHUNK_ROWS = 500
+
+APPLY_COLUMNS = {
+    'roll': ['roll', 'roll_no', 'rollno'],
+    'name': ['student name', 'name', 'student_name'],
+    'subject': ['subject', 'subject_code', 'subject_id'],
+    'division': ['division', 'div'],
+    'unit1': ['unit1', 'unit 1', 'unit_i'],
+    'unit2': ['unit2', 'unit 2', 'unit_ii'],
+    'term': ['term', 'terminal', 'term_i'],
+    'annual': ['annual', 'annual marks', 'annual_marks'],
+    'grace': ['grace'],
+}
+
+
+def parse_apply_rows(headers, rows):
+    """
+    Map sheet rows to upload items using the header row.
+    Raises UploadError when roll/division columns are missing or no row has a roll number.
+    """
+    def find_header(name_variants):
+        for v in name_variants:
+            if v in headers:
+                return headers.index(v)
+        return None
+
+    indices = {key: find_header(names) for key, names in APPLY_COLUMNS.items()}
+    if indices['roll'] is None or indices['division'] is None:
+        raise UploadError("Invalid Excel template. Missing required columns: roll and division")
+
+    def val_at_key(r, k):
+        idx = indices.get(k)
+        return r[idx] if idx is not None and idx < len(r) else None
+
+    requested = []
+    for r in rows:
+        if not r or all(c is None for c in r):
+            continue
+        roll_val = val_at_key(r, 'roll')
+        if roll_val is None or str(roll_val).strip() == '':
+            continue
+        division = val_at_key(r, 'division')
+        requested.append({
+            'roll_no': str(roll_val).strip(),
+            'division': str(division).strip() if division is not None else None,
+            # subject cell (id, code or name) is resolved in bulk during validation
+            'subject_val': val_at_key(r, 'subject'),
+            'unit1': val_at_key(r, 'unit1'),
+            'unit2': val_at_key(r, 'unit2'),
+            'term': val_at_key(r, 'term'),
+            'annual': val_at_key(r, 'annual'),
+            'grace': val_at_key(r, 'grace'),
+        })
+
+    if not requested:
+        raise UploadError("No valid rows found in Excel")
+    return requested
+
+
+def mark_values(item):
+    """
+    Numeric mark fields of an upload item (missing values count as 0).
+    Returns (values, None), or (None, reason) when a value is invalid or out of range.
+    """
+    try:
+        u1 = float(item['unit1']) if item.get('unit1') not in (None, '') else 0
+        u2 = float(item['unit2']) if item.get('unit2') not in (None, '') else 0
+        t = float(item['term']) if item.get('term') not in (None, '') else 0
+        a = float(item['annual']) if item.get('annual') not in (None, '') else 0
+        g = float(item['grace']) if item.get('grace') not in (None, '') else 0
+    except Exception:
+        return None, "invalid numeric value"
+
+    # range checks
+    if u1 < 0 or u1 > 25 or u2 < 0 or u2 > 25 or t < 0 or t > 50 or a < 0 or a > 100 or g < 0 or g > GRACE_MAX:
+        return None, "marks out of allowed ranges"
+    return {'unit1': u1, 'unit2': u2, 'term': t, 'annual': a, 'grace': g}, None
+
+
+def _validate_chunk(items, user_id, user_type, form_subject_id, to_apply, missing):
+    # students, subjects and allocations in a few IN queries
+    resolver = UploadResolver(
+        user_id,
+        [(item['roll_no'], item['division']) for item in items],
+        [item['subject_val'] for item in items],
+    )
+
+    for item in items:
+        if not item['division']:
+            missing.append({"roll_no": item['roll_no'], "division": None, "reason": "division missing"})
+            continue
+        student = resolver.student(item['roll_no'], item['division'])
+        if not student:
+            missing.append({"roll_no": item['roll_no'], "division": item['division'], "reason": "student not found"})
+            continue
+
+        # resolve subject: prefer form, then subject cell, then derive from allocation
+        sid = None
+        if form_subject_id:
+            try:
+                sid = int(form_subject_id)
+            except Exception:
+                sid = None
+        if sid is None:
+            sid = resolver.subject_id(item.get('subject_val'))
+        if sid is None:
+            # derive via allocations for this teacher+division
+            sid = resolver.sole_allocated_subject(item['division'])
+
+        if not sid:
+            missing.append({"roll_no": item['roll_no'], "division": item['division'], "reason": "subject not resolved or ambiguous; provide subject_id"})
+            continue
+
+        if not resolver.is_allocated(sid, item['division']) and user_type != 'ADMIN':
+            missing.append({"roll_no": item['roll_no'], "division": item['division'], "reason": "not authorized for this subject/division"})
+            continue
+
+        values, reason = mark_values(item)
+        if reason:
+            missing.append({"roll_no": item['roll_no'], "division": item['division'], "reason": reason})
+            continue
+
+        to_apply.append({'roll_no': item['roll_no'], 'division': item['division'], 'subject_id': int(sid), **values})
+
+
+def validate_apply_rows(requested, user_id, user_type, form_subject_id=None, progress=None):
+    """
+    Validate upload items against students, subjects and the uploader's allocations.
+    Returns (to_apply, missing). ``progress(rows_done)`` is called after each chunk.
+    """
+    to_apply = []
+    missing = []
+    for start in range(0, len(requested), UPLOAD_CHUNK_ROWS):
+        chunk = requested[start:start + UPLOAD_CHUNK_ROWS]
+        _validate_chunk(chunk, user_id, user_type, form_subject_id, to_apply, missing)
+        if progress is not None:
+            progress(start + len(chunk))
+    return to_apply, missing
+
+
+def commit_marks(to_apply, user_id, missing=()):
+    """Write validated marks in one transaction and queue result recomputes. Returns (body, status)."""
+    if not to_apply:
+        return {"error": "No rows authorized/valid to apply", "missing": list(missing)}, 400
+
+    saved = [
+        {"roll_no": str(e['roll_no']), "division": e['division'], "subject_id": int(e['subject_id'])}
+        for e in to_apply
+    ]
+    try:
+        inserted, updated = bulk_upsert_marks(to_apply, entered_by=user_id)
+        versions = bump_data_version(*{row["division"] for row in saved})
+        db.session.commit()
+    except Exception as ex:
+        db.session.rollback()
+        return {"error": "Database commit failed", "details": str(ex)}, 500
+
+    for row in saved:
+        recompute_queue.schedule_student(row["roll_no"], row["division"], versions.get(row["division"]))
+
+    return {"message": "Marks applied successfully", "saved": saved, "missing": list(missing), "inserted": inserted, "updated": updated}, 200
+
+
+def apply_upload(headers, rows, user_id, user_type, form_subject_id=None, progress=None):
+    """Parse, validate and apply one uploaded sheet. Returns (body, status)."""
+    try:
+        requested = parse_apply_rows(headers, rows)
+    except UploadError as e:
+        return e.body(), e.status_code
+    to_apply, missing = validate_apply_rows(requested, user_id, user_type, form_subject_id, progress)
+    return commit_marks(to_apply, user_id, missing)
@@ -0,0 +1,284 @@
+# /backend/services/marksheet_pdf.py
+"""
+PDF marksheets rendered with reportlab.
+
+Result rows are first reduced to plain dicts (`marksheet_data`) so pages can
+be rendered in worker processes. Each page is drawn from PDF operators: the
+static frame (title and column captions) is rendered once per process, a
+student's values once per page. For a division's per-student PDFs (ZIP,
+streamed in roll order) the pool renders whole documents; for the single
+multi-page PDF it renders each page's operators, which are then assembled
+in order on one canvas where the frame is a form XObject drawn once and
+referenced by every page. This module must stay free of app/database
+imports, as pool workers import it.
+"""
+
+import atexit
+import functools
+import io
+import multiprocessing
+import os
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    from reportlab.pdfgen.canvas import Canvas
+except Exception:  # pragma: no cover - optional, checked by callers via available()
+    letter = None
+    stringWidth = None
+    Canvas = None
+
+# subject code -> (average field, grace field) on Result
+SUBJECT_FIELDS = [
+    ('ENG', 'eng_avg', 'eng_grace'),
+    ('ECO', 'eco_avg', 'eco_grace'),
+    ('BK', 'bk_avg', 'bk_grace'),
+    ('OC', 'oc_avg', 'oc_grace'),
+    ('HINDI', 'hindi_avg', 'hindi_grace'),
+    ('IT', 'it_avg', 'it_grace'),
+    ('MATHS', 'maths_avg', 'maths_grace'),
+    ('SP', 'sp_avg', 'sp_grace'),
+]
+
+# below this many pages a pool costs more than it saves
+POOL_MIN_PAGES = 32
+
+_pool = None
+_pool_workers = None
+_pool_lock = threading.Lock()
+
+
+def available():
+    return Canvas is not None
+
+
+def marksheet_data(res):
+    """Plain (picklable) marksheet content of a Result row."""
+    subjects = []
+    for code, avg_field, grace_field in SUBJECT_FIELDS:
+        avg = getattr(res, avg_field, None)
+        if avg is None:
+            continue
+        subjects.append((code, avg, getattr(res, grace_field, 0) or 0))
+    return {
+        "roll_no": res.roll_no,
+        "name": res.name,
+        "division": res.division,
+        "subjects": subjects,
+        "percentage": res.percentage,
+    }
+
+
+def pdf_filename(data):
+    return f"{data['roll_no']}_marksheet.pdf"
+
+
+# name of the form XObject holding the static marksheet frame
+FRAME_FORM = 'marksheetFrame'
+# Fonts registered, in this order, on every canvas: PDF operators rendered on
+# one canvas name fonts by registration order (/F1, /F2), so they are valid on
+# any other canvas from _new_canvas
+FONTS = ('Helvetica', 'Helvetica-Bold')
+
+
+@functools.lru_cache(maxsize=None)
+def _layout():
+    """
+    Page geometry, computed once per process: static frame strings as
+    (font, size, x, y, text) and the y of the first subject row.
+    """
+    width, height = letter
+    header_y = height - 110
+    return {
+        "frame": (
+            ('Helvetica-Bold', 16, 40, height - 50, 'Official Marksheet'),
+            ('Helvetica-Bold', 11, 40, header_y, 'Subject'),
+            ('Helvetica-Bold', 11, 260, header_y, 'Annual'),
+            ('Helvetica-Bold', 11, 360, header_y, 'Grace'),
+            ('Helvetica-Bold', 11, 460, header_y, 'Final'),
+        ),
+        "identity_y": height - 70,
+        "first_row_y": header_y - 18,
+    }
+
+
+def _new_canvas(buf):
+    c = Canvas(buf, pagesize=letter)
+    for font in FONTS:
+        c.setFont(font, 12)
+    return c
+
+
+@functools.lru_cache(maxsize=None)
+def _scratch_canvas():
+    """Per-process canvas that text objects are built on (never saved)."""
+    return _new_canvas(io.BytesIO())
+
+
+@functools.lru_cache(maxsize=None)
+def _frame_code():
+    """PDF operators drawing the static frame, rendered once per process as one text object."""
+    text = _scratch_canvas().beginText()
+    for font, size, x, y, caption in _layout()["frame"]:
+        text.setFont(font, size)
+        text.setTextOrigin(x, y)
+        text.textOut(caption)
+    return text.getCode()
+
+
+def _ensure_frame(c):
+    """Define the static frame as a form XObject, once per document."""
+    if not c.hasForm(FRAME_FORM):
+        c.beginForm(FRAME_FORM)
+        c.addLiteral(_frame_code())
+        c.endForm()
+
+
+def _page_code(data):
+    """PDF operators drawing one student's values (everything but the frame) as one text object."""
+    layout = _layout()
+    text = _scratch_canvas().beginText()
+    current = [None]
+
+    def put(x, y, value, font, size, right=False):
+        if current[0] != (font, size):
+            text.setFont(font, size)
+            current[0] = (font, size)
+        text.setTextOrigin(x - stringWidth(value, font, size) if right else x, y)
+        text.textOut(value)
+
+    put(40, layout["identity_y"], f"Name: {data['name']}  |  Roll: {data['roll_no']}  |  Division: {data['division']}", 'Helvetica', 12)
+
+    y = layout["first_row_y"]
+    for code, avg, grace in data['subjects']:
+        final = (avg or 0) + (grace or 0)
+        put(40, y, code, 'Helvetica', 11)
+        put(320, y, f'{round(avg,2)}', 'Helvetica', 11, right=True)
+        put(420, y, f'{round(grace,2)}', 'Helvetica', 11, right=True)
+        put(520, y, f'{round(final,2)}', 'Helvetica', 11, right=True)
+        y -= 16
+
+    y -= 8
+    percentage = data['percentage']
+    put(40, y, f'Total: {round(percentage, 2) if percentage is not None else "-"}', 'Helvetica-Bold', 12)
+    put(520, y, f'Percentage: {percentage or "-"}', 'Helvetica-Bold', 12, right=True)
+    return text.getCode()
+
+
+def draw_marksheet(c, data, shared_frame=False, code=None):
+    """
+    Draw one marksheet page on canvas ``c`` (from _new_canvas; ends the
+    page). The static frame is copied in from operators rendered once per
+    process. With ``shared_frame`` it is a form XObject defined once per
+    document and referenced by each page instead; a one-page document
+    copies it inline, as the form's extra objects would only add size.
+    ``code`` is the page's _page_code, when already rendered (by the pool).
+    """
+    if shared_frame:
+        _ensure_frame(c)
+        c.doForm(FRAME_FORM)
+    else:
+        c.addLiteral(_frame_code())
+    c.addLiteral(code if code is not None else _page_code(data))
+    c.showPage()
+
+
+def render_marksheet(data):
+    """PDF bytes of one student's marksheet."""
+    buf = io.BytesIO()
+    c = _new_canvas(buf)
+    draw_marksheet(c, data)
+    c.save()
+    return buf.getvalue()
+
+
+def render_combined(datas, workers=None):
+    """
+    PDF bytes with one marksheet page per student, in the given order. Page
+    operators are rendered across a process pool of ``workers`` (default:
+    CPU count) for larger batches and assembled here.
+    """
+    buf = io.BytesIO()
+    c = _new_canvas(buf)
+    for data, code in zip(datas, _map(_page_code, datas, workers)):
+        draw_marksheet(c, data, shared_frame=True, code=code)
+    c.save()
+    return buf.getvalue()
+
+
+def _shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+# stop pool workers with the web process instead of leaving them to be reaped
+atexit.register(_shutdown_pool)
+
+
+def _get_pool(workers):
+    """Process pool reused across batches (spawned: workers inherit no threads or DB connections)."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+def _map(fn, datas, workers=None):
+    """``fn`` over ``datas`` in order, across the process pool for larger batches."""
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(datas) < POOL_MIN_PAGES:
+        return map(fn, datas)
+    chunksize = max(1, len(datas) // (workers * 4))
+    return _get_pool(workers).map(fn, datas, chunksize=chunksize)
+
+
+def render_each(datas, workers=None):
+    """
+    Yield (filename, pdf bytes) per student in order, rendering across a
+    process pool of ``workers`` (default: CPU count) for larger batches.
+    """
+    for data, pdf in zip(datas, _map(render_marksheet, datas, workers)):
+        yield pdf_filename(data), pdf
+
+
+class _ZipSink(io.RawIOBase):
+    """Unseekable sink collecting what ZipFile writes so it can be streamed."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(files):
+    """Yield a ZIP archive of (name, bytes) pairs chunk by chunk, as each file becomes available."""
+    sink = _ZipSink()
+    # PDF page streams are already compressed
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as zf:
+        for name, data in files:
+            zf.writestr(name, data)
+            yield sink.drain()
+    yield sink.drain()
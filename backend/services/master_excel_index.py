@@ -0,0 +1,161 @@
+# /backend/services/master_excel_index.py
+"""
+Process-wide index of the master marks workbook (config.MASTER_EXCEL_PATH).
+
+The workbook is streamed once in read-only mode into a dict keyed by
+(roll_no, division) and rebuilt only when the file's mtime or size changes,
+so lookups from request handlers are a stat() plus a dict access.
+"""
+
+import os
+import threading
+import time
+from collections import namedtuple
+
+try:
+    import openpyxl
+except Exception:  # pragma: no cover - optional at import time, checked when the workbook is read
+    openpyxl = None
+
+from config import MASTER_EXCEL_PATH, MASTER_EXCEL_SHEET
+
+ExcelMark = namedtuple("ExcelMark", ["subject", "unit1", "unit2", "term", "annual", "grace"])
+
+# accepted header spellings for each column
+COLUMN_ALIASES = {
+    "roll_no": ("roll_no", "roll", "rollno"),
+    "division": ("division", "div"),
+    "subject": ("subject", "subject_code", "subject_id"),
+    "unit1": ("unit1",),
+    "unit2": ("unit2",),
+    "term": ("term",),
+    "annual": ("annual",),
+    "grace": ("grace",),
+}
+
+
+def _text(value):
+    return str(value).strip() if value is not None else None
+
+
+def _number(value):
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).strip())
+    except ValueError:
+        return None
+
+
+def _column_indexes(header_row):
+    headers = [_text(h).lower() if h is not None else "" for h in header_row]
+    indexes = {}
+    for column, aliases in COLUMN_ALIASES.items():
+        indexes[column] = next((headers.index(a) for a in aliases if a in headers), None)
+    return indexes
+
+
+def _cell(row, idx):
+    return row[idx] if idx is not None and idx < len(row) else None
+
+
+class MasterExcelIndex:
+    """Lazily built, file-signature invalidated index of master workbook rows."""
+
+    def __init__(self, path, sheet):
+        self.path = path
+        self.sheet = sheet
+        self._lock = threading.Lock()
+        self._signature = None
+        self._by_key = {}
+        self._by_roll = {}
+        self._build_seconds = None
+        self._built_at = None
+        self._builds = 0
+
+    def _file_signature(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _build(self):
+        if openpyxl is None:
+            raise RuntimeError("Server missing Excel support (openpyxl)")
+        by_key, by_roll = {}, {}
+        wb = openpyxl.load_workbook(self.path, read_only=True, data_only=True)
+        try:
+            if self.sheet not in wb.sheetnames:
+                return by_key, by_roll
+            rows = wb[self.sheet].iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return by_key, by_roll
+            cols = _column_indexes(header)
+            for row in rows:
+                if not row or all(c is None for c in row):
+                    continue
+                roll_no = _text(_cell(row, cols["roll_no"]))
+                if not roll_no:
+                    continue
+                division = _text(_cell(row, cols["division"]))
+                mark = ExcelMark(
+                    subject=_text(_cell(row, cols["subject"])),
+                    unit1=_number(_cell(row, cols["unit1"])),
+                    unit2=_number(_cell(row, cols["unit2"])),
+                    term=_number(_cell(row, cols["term"])),
+                    annual=_number(_cell(row, cols["annual"])),
+                    grace=_number(_cell(row, cols["grace"])),
+                )
+                # first row for a student wins, as the old per-request scan did
+                by_key.setdefault((roll_no, division), mark)
+                by_roll.setdefault(roll_no, mark)
+        finally:
+            wb.close()
+        return by_key, by_roll
+
+    def _refresh(self):
+        signature = self._file_signature()
+        if signature == self._signature:
+            return
+        with self._lock:
+            signature = self._file_signature()
+            if signature == self._signature:
+                return
+            started = time.perf_counter()
+            if signature is None:
+                by_key, by_roll = {}, {}
+            else:
+                by_key, by_roll = self._build()
+            self._by_key, self._by_roll = by_key, by_roll
+            self._signature = signature
+            self._build_seconds = time.perf_counter() - started
+            self._built_at = time.time()
+            self._builds += 1
+
+    def lookup(self, roll_no, division=None):
+        """
+        Return the ExcelMark of a student, or None. Without ``division`` the
+        first row for the roll number in any division is returned.
+        """
+        self._refresh()
+        roll_no = _text(roll_no)
+        if division is None:
+            return self._by_roll.get(roll_no)
+        return self._by_key.get((roll_no, _text(division)))
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "exists": self._signature is not None,
+            "entries": len(self._by_key),
+            "builds": self._builds,
+            "build_ms": round(self._build_seconds * 1000, 2) if self._build_seconds is not None else None,
+            "built_at": self._built_at,
+        }
+
+
+master_excel_index = MasterExcelIndex(MASTER_EXCEL_PATH, MASTER_EXCEL_SHEET)
@@ -0,0 +1,218 @@
+# /backend/services/recompute_queue.py
+"""
+In-process, debounced result recomputation queue.
+
+Mark writes only record which divisions / students became dirty and return.
+A single worker thread waits until no new work arrived for a short window
+(capped by a maximum delay), then recomputes every dirty division once.
+Batches are recorded as jobs so admins can see what ran and what failed.
+
+Dirty students are recomputed on their own when the data versions their
+writes produced account for every change to the division since its results
+were last computed; the division is then recorded as current, so reads do
+not run a full recompute of their own. Otherwise (e.g. writes in another
+process) the whole division is recomputed.
+"""
+
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from app import db
+from services.result_service import generate_results_for_division, generate_results_for_students
+
+# Number of finished jobs kept for the admin status endpoint
+JOB_HISTORY = 50
+
+
+def _stamp():
+    return datetime.utcnow().isoformat()
+
+
+class RecomputeQueue:
+    """Coalescing queue of dirty divisions / students, drained by one worker thread."""
+
+    def __init__(self):
+        self.app = None
+        self.async_mode = True
+        self.debounce_seconds = 2.0
+        self.max_delay_seconds = 10.0
+
+        self._cond = threading.Condition()
+        # division -> None (whole division) or set of roll_nos
+        self._pending = {}
+        # division -> data versions produced by the pending student writes
+        self._versions = {}
+        self._first_dirty_at = 0.0
+        self._last_dirty_at = 0.0
+        self._worker = None
+        self._job_ids = itertools.count(1)
+        self._jobs = OrderedDict()
+        self._running_job = None
+
+    def init_app(self, app):
+        self.app = app
+        self.async_mode = app.config.get("RESULT_RECOMPUTE_ASYNC", True)
+        self.debounce_seconds = app.config.get("RESULT_RECOMPUTE_DEBOUNCE_SECONDS", 2.0)
+        self.max_delay_seconds = app.config.get("RESULT_RECOMPUTE_MAX_DELAY_SECONDS", 10.0)
+
+    # ---------------- producers ----------------
+    def schedule_division(self, division):
+        """Mark a whole division dirty."""
+        self._schedule(division, None)
+
+    def schedule_student(self, roll_no, division, version=None):
+        """
+        Mark one student of a division dirty after a committed write.
+        ``version`` is the division data version that write produced (from
+        `bump_data_version`); without it the division is recomputed whole.
+        """
+        self._schedule(division, roll_no, version)
+
+    def _schedule(self, division, roll_no, version=None):
+        if not division:
+            return
+        with self._cond:
+            now = time.monotonic()
+            if not self._pending:
+                self._first_dirty_at = now
+            self._last_dirty_at = now
+            if version is not None:
+                self._versions.setdefault(division, set()).add(version)
+
+            if division in self._pending:
+                rolls = self._pending[division]
+                if rolls is not None:
+                    if roll_no is None:
+                        self._pending[division] = None
+                    else:
+                        rolls.add(roll_no)
+            else:
+                self._pending[division] = None if roll_no is None else {roll_no}
+
+            if self.async_mode:
+                self._ensure_worker()
+                self._cond.notify()
+                return
+
+        # synchronous mode (tests / scripts): drain right away
+        self.flush()
+
+    # ---------------- worker ----------------
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(
+                target=self._run, name="result-recompute", daemon=True
+            )
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                # debounce: wait for a quiet window, but never longer than max delay
+                while True:
+                    now = time.monotonic()
+                    quiet_for = now - self._last_dirty_at
+                    waited = now - self._first_dirty_at
+                    if quiet_for >= self.debounce_seconds or waited >= self.max_delay_seconds:
+                        break
+                    self._cond.wait(timeout=min(
+                        self.debounce_seconds - quiet_for,
+                        self.max_delay_seconds - waited,
+                    ))
+                batch, versions = self._take_pending()
+            self._process(batch, versions)
+
+    def _take_pending(self):
+        batch, versions = self._pending, self._versions
+        self._pending = {}
+        self._versions = {}
+        self._first_dirty_at = 0.0
+        return batch, versions
+
+    def flush(self):
+        """Recompute everything pending in the calling thread."""
+        with self._cond:
+            batch, versions = self._take_pending()
+        if batch:
+            self._process(batch, versions)
+
+    def _process(self, batch, versions):
+        job = {
+            "job_id": next(self._job_ids),
+            "status": "running",
+            "divisions": {
+                d: ("all" if rolls is None else sorted(rolls)) for d, rolls in batch.items()
+            },
+            "started_at": _stamp(),
+            "finished_at": None,
+            "rows_written": 0,
+            "errors": [],
+        }
+        self._start(job)
+
+        app = self.app
+        try:
+            with app.app_context():
+                for division, rolls in batch.items():
+                    try:
+                        if rolls is None:
+                            written = generate_results_for_division(division)
+                        else:
+                            written = generate_results_for_students(
+                                division, rolls, versions.get(division, ())
+                            )
+                    except Exception as ex:
+                        db.session.rollback()
+                        app.logger.exception(f"Result recompute failed for division {division}")
+                        with self._cond:
+                            job["errors"].append({"division": division, "error": str(ex)})
+                    else:
+                        with self._cond:
+                            job["rows_written"] += written
+                db.session.remove()
+        finally:
+            with self._cond:
+                job["status"] = "failed" if job["errors"] else "done"
+                job["finished_at"] = _stamp()
+                self._running_job = None
+
+    def _start(self, job):
+        with self._cond:
+            self._jobs[job["job_id"]] = job
+            self._running_job = job
+            while len(self._jobs) > JOB_HISTORY:
+                self._jobs.popitem(last=False)
+
+    # ---------------- reporting ----------------
+    @staticmethod
+    def _copy(job):
+        # the worker keeps updating its job; callers get a snapshot (lock held)
+        return None if job is None else {**job, "errors": list(job["errors"])}
+
+    def get_job(self, job_id):
+        with self._cond:
+            return self._copy(self._jobs.get(job_id))
+
+    def status(self):
+        with self._cond:
+            pending = {
+                d: ("all" if rolls is None else sorted(rolls))
+                for d, rolls in self._pending.items()
+            }
+            jobs = [self._copy(job) for job in reversed(self._jobs.values())]
+            running = self._copy(self._running_job)
+        return {
+            "async": self.async_mode,
+            "debounce_seconds": self.debounce_seconds,
+            "pending": pending,
+            "running": running,
+            "jobs": jobs,
+        }
+
+
+recompute_queue = RecomputeQueue()
@@ -0,0 +1,91 @@
+# /backend/services/result_read_model.py
+"""
+Bulk-loaded read model for result listings.
+
+Loads students, their Result rows, their marks and the subject map with a
+fixed number of queries, so result views can assemble rows in memory
+instead of querying per student.
+"""
+
+from app import db
+from models import Student, Result, Mark, Subject
+from pagination import keyset_page, prefix_filter
+
+
+class ResultReadModel:
+    """In-memory view of students with their results and marks keyed by (roll_no, division)."""
+
+    def __init__(self, students, results, marks_by_key, subject_codes):
+        self.students = students
+        self.results = results
+        self.marks_by_key = marks_by_key
+        self.subject_codes = subject_codes
+
+    def result_for(self, student):
+        return self.results.get((student.roll_no, student.division))
+
+    def marks_for(self, student):
+        """Map subject_code -> Mark for a student."""
+        return self.marks_by_key.get((student.roll_no, student.division), {})
+
+
+def _scope(query, model, students, division):
+    """Restrict a Result/Mark query to a whole division or to the given students."""
+    if division is not None:
+        return query.filter(model.division == division)
+    return query.filter(
+        model.division.in_({s.division for s in students}),
+        model.roll_no.in_({s.roll_no for s in students}),
+    )
+
+
+def load_read_model(students, division=None):
+    """
+    Load results, marks and subjects for an already-fetched list of students.
+    Pass ``division`` when the students are the whole division so rows are
+    loaded by division alone instead of by roll number.
+    """
+    subject_codes = {
+        sid: code for sid, code in db.session.query(Subject.subject_id, Subject.subject_code)
+    }
+    if not students:
+        return ResultReadModel([], {}, {}, subject_codes)
+
+    keys = {(s.roll_no, s.division) for s in students}
+
+    results = {}
+    for r in _scope(Result.query, Result, students, division):
+        if (r.roll_no, r.division) in keys:
+            results[(r.roll_no, r.division)] = r
+
+    marks_by_key = {}
+    for m in _scope(Mark.query, Mark, students, division):
+        key = (m.roll_no, m.division)
+        code = subject_codes.get(m.subject_id)
+        if key in keys and code:
+            marks_by_key.setdefault(key, {})[code] = m
+
+    return ResultReadModel(students, results, marks_by_key, subject_codes)
+
+
+def load_division_read_model(division):
+    """Load a whole division (students ordered by roll_no) in four queries."""
+    students = Student.query.filter_by(division=division).order_by(Student.roll_no).all()
+    return load_read_model(students, division=division)
+
+
+def load_division_page(division, search=None, cursor=None, limit=None):
+    """
+    Keyset page of a division's students (by roll_no, optionally filtered by a
+    roll_no/name prefix) as a read model. Returns (model, next_cursor, offset)
+    where offset is the number of matching students before the page, carried
+    in the cursor rather than counted.
+    """
+    if search is None and cursor is None and limit is None:
+        return load_division_read_model(division), None, 0
+
+    query = Student.query.filter_by(division=division)
+    if search:
+        query = query.filter(prefix_filter(search, Student.roll_no, Student.name))
+    students, next_cursor, offset = keyset_page(query, Student.roll_no, cursor, limit, with_offset=True)
+    return load_read_model(students), next_cursor, offset
@@ -1,7 +1,280 @@
 # /backend/services/result_service.py
 
-from models import Student, Mark, Result, Subject, TeacherSubjectAllocation
+from models import Student, Mark, Result, Subject, TeacherSubjectAllocation, now
 from app import db
+from services.db_bulk import upsert_rows
+from services.division_version import get_data_version, get_versions, record_results_version, results_are_current
+from services.single_flight import SingleFlight, cross_process_lock
+
+# Coalesces concurrent recomputes of the same division within this process
+_division_flights = SingleFlight()
+
+# Grade-only subjects never count towards the percentage
+GRADING_ONLY_CODES = {"EVS", "PE"}
+OPTIONAL_CODES = {"HINDI", "IT", "MATHS", "SP"}
+# Fallback required subjects when a division has no teacher allocations yet
+DEFAULT_REQUIRED_CODES = ["ENG", "ECO", "BK", "OC"]
+
+CORE_FIELDS = {
+    "ENG": "eng",
+    "ECO": "eco",
+    "BK": "bk",
+    "OC": "oc",
+}
+
+# Result columns owned by the engine (everything except ids and timestamps)
+RESULT_VALUE_FIELDS = [
+    "roll_no", "name", "division",
+    "eng_avg", "eng_grace",
+    "hindi_avg", "hindi_grace",
+    "it_avg", "it_grace",
+    "bk_avg", "bk_grace",
+    "oc_avg", "oc_grace",
+    "maths_avg", "maths_grace",
+    "sp_avg", "sp_grace",
+    "total_grace", "percentage", "is_published",
+    "evs_grade", "pe_grade",
+]
+
+GRACE_FIELDS = [
+    "eng_grace",
+    "hindi_grace",
+    "it_grace",
+    "maths_grace",
+    "sp_grace",
+    "bk_grace",
+    "oc_grace",
+]
+
+
+def grade_for_annual(annual):
+    """Convert an annual mark of a grade-only subject (EVS / PE) to a grade."""
+    if annual >= 75:
+        return 'A+'
+    if annual >= 60:
+        return 'A'
+    if annual >= 50:
+        return 'B'
+    if annual >= 35:
+        return 'C'
+    return 'F'
+
+
+def _new_result_values(student):
+    """Column values of a Result row that does not exist yet (model defaults)."""
+    values = {f: None for f in RESULT_VALUE_FIELDS}
+    values.update({f: 0.0 for f in GRACE_FIELDS})
+    values.update({
+        "roll_no": student.roll_no,
+        "name": student.name,
+        "division": student.division,
+        "total_grace": 0.0,
+        "percentage": 0.0,
+        "is_published": False,
+    })
+    return values
+
+
+def _load_subject_codes():
+    """Map subject_id -> subject_code for every subject."""
+    return {
+        sid: code
+        for sid, code in db.session.query(Subject.subject_id, Subject.subject_code)
+    }
+
+
+def _base_required_codes(division, subjects):
+    """
+    Required non-optional subject codes for a division.
+
+    Derived from teacher allocations for the division, excluding grading-only
+    and optional subjects; falls back to sensible defaults without allocations.
+    """
+    alloc_subject_ids = [
+        sid for (sid,) in db.session.query(TeacherSubjectAllocation.subject_id)
+        .filter(TeacherSubjectAllocation.division == division)
+    ]
+    if not alloc_subject_ids:
+        return list(DEFAULT_REQUIRED_CODES)
+
+    base_required = []
+    for sid in alloc_subject_ids:
+        code = subjects.get(sid)
+        if not code:
+            continue
+        if code in GRADING_ONLY_CODES or code in OPTIONAL_CODES:
+            continue
+        if code not in base_required:
+            base_required.append(code)
+    return base_required
+
+
+def _existing_result_values(division, roll_nos=None):
+    """Map roll_no -> current Result column values for a division (or some of its students)."""
+    stmt = db.select(Result.__table__).where(Result.division == division)
+    if roll_nos is not None:
+        stmt = stmt.where(Result.roll_no.in_(roll_nos))
+    return {
+        row["roll_no"]: {f: row[f] for f in RESULT_VALUE_FIELDS}
+        for row in db.session.execute(stmt).mappings()
+    }
+
+
+def compute_result_values(student, mark_map, base_required, existing=None):
+    """
+    Compute the Result column values for one student, in memory.
+
+    ``mark_map`` maps subject_code -> mark (any object with ``annual`` and
+    ``grace``), ``existing`` holds the student's current Result values if a
+    row exists. Returns the values to store, or None when the student has no
+    Result row and is still missing required Annual marks.
+    """
+    required_codes = list(base_required)
+    if student.optional_subject in ("HINDI", "IT"):
+        required_codes.append(student.optional_subject)
+    if student.optional_subject_2 in ("MATHS", "SP"):
+        required_codes.append(student.optional_subject_2)
+
+    # If any required subject is missing Annual marks, do not compute percentage
+    missing_required = any(
+        mark_map.get(code) is None or mark_map[code].annual is None
+        for code in required_codes
+    )
+    if missing_required:
+        if existing is None:
+            return None
+        # Clear percentage of an existing Result to avoid showing stale values
+        values = dict(existing)
+        values["percentage"] = None
+        return values
+
+    values = dict(existing) if existing is not None else _new_result_values(student)
+
+    # total sums Annual marks only (used for percentage calculation)
+    total = 0.0
+    count = 0
+
+    # ---------------- CORE SUBJECTS ----------------
+    for code, field in CORE_FIELDS.items():
+        m = mark_map.get(code)
+        if m:
+            annual = m.annual if m.annual is not None else 0.0
+            # Store Annual in the result avg fields (avg kept only for compatibility/display).
+            # ECO has no Result columns but still counts towards the percentage.
+            if f"{field}_avg" in values:
+                values[f"{field}_avg"] = annual
+                values[f"{field}_grace"] = m.grace or 0.0
+            total += annual
+            count += 1
+
+    # ---------------- OPTIONAL GROUPS ----------------
+    for chosen, allowed in (
+        (student.optional_subject, ("HINDI", "IT")),
+        (student.optional_subject_2, ("MATHS", "SP")),
+    ):
+        if chosen not in allowed:
+            continue
+        m = mark_map.get(chosen)
+        field = chosen.lower()
+        annual = m.annual if m and m.annual is not None else 0.0
+        values[f"{field}_avg"] = annual
+        values[f"{field}_grace"] = m.grace if m and m.grace is not None else 0.0
+        total += annual
+        count += 1
+
+    # ---------------- FINAL CALC ----------------
+    values["total_grace"] = sum(
+        values[f] for f in GRACE_FIELDS if values[f] is not None
+    )
+
+    # Percentage is calculated only from Annual marks of non grade-only subjects
+    if count > 0:
+        values["percentage"] = round((total / count), 2)
+
+    # EVS and PE are grade-only. If annual marks exist for them, store the grade.
+    for code in ("EVS", "PE"):
+        m = mark_map.get(code)
+        if m and m.annual is not None:
+            values[f"{code.lower()}_grade"] = grade_for_annual(m.annual)
+
+    return values
+
+
+def _write_results(rows):
+    """Bulk upsert computed Result rows keyed on (roll_no, division)."""
+    if not rows:
+        return 0
+    stamp = now()
+    for row in rows:
+        row["updated_at"] = stamp
+    return upsert_rows(
+        Result,
+        rows,
+        key_columns=("roll_no", "division"),
+        update_columns=RESULT_VALUE_FIELDS + ["updated_at"],
+    )
+
+
+def _student_rows(division, roll_nos=None):
+    """Students of a division (or some of them) with the columns the engine needs."""
+    query = db.session.query(
+        Student.roll_no,
+        Student.name,
+        Student.division,
+        Student.optional_subject,
+        Student.optional_subject_2,
+    ).filter(Student.division == division)
+    if roll_nos is not None:
+        query = query.filter(Student.roll_no.in_(roll_nos))
+    return query.all()
+
+
+def _marks_by_roll(division, subjects, roll_nos=None):
+    """Map roll_no -> {subject_code -> mark} for a division (or some of its students)."""
+    query = db.session.query(
+        Mark.roll_no, Mark.subject_id, Mark.annual, Mark.grace
+    ).filter(Mark.division == division)
+    if roll_nos is not None:
+        query = query.filter(Mark.roll_no.in_(roll_nos))
+
+    marks_by_roll = {}
+    for m in query:
+        code = subjects.get(m.subject_id)
+        if code:
+            marks_by_roll.setdefault(m.roll_no, {})[code] = m
+    return marks_by_roll
+
+
+def _recompute(division, roll_nos=None, version=None):
+    """
+    Compute and persist results for a division, or some students of it.
+    A division recompute records the data version it started from; a
+    student recompute records ``version`` when given.
+    """
+    # Read the version first: changes committed while computing keep it stale
+    if roll_nos is None:
+        version = get_data_version(division)
+
+    subjects = _load_subject_codes()
+    base_required = _base_required_codes(division, subjects)
+    students = _student_rows(division, roll_nos)
+    marks_by_roll = _marks_by_roll(division, subjects, roll_nos)
+    existing_by_roll = _existing_result_values(division, roll_nos)
+
+    to_write = []
+    for student in students:
+        existing = existing_by_roll.get(student.roll_no)
+        values = compute_result_values(
+            student, marks_by_roll.get(student.roll_no, {}), base_required, existing
+        )
+        if values is not None and values != existing:
+            to_write.append(values)
+
+    written = _write_results(to_write)
+    if version is not None:
+        record_results_version(division, version)
+    db.session.commit()
+    return written
 
 
 def generate_results_for_division(division: str):
@@ -10,185 +283,78 @@ def generate_results_for_division(division: str):
 
     Only create/update a Result row for a student when marks for all
     required subjects (core + their chosen optional subjects) are present.
+
+    Students, marks, allocations and existing results are loaded with a fixed
+    number of queries, computed in memory and written back with one bulk
+    upsert; rows whose values did not change are not rewritten.
+    Concurrent callers for the same division share one computation, and
+    worker processes are serialised by a per-division database/file lock.
+    Returns the number of Result rows written.
     """
+    def run():
+        with cross_process_lock(f"results.{division}"):
+            return _recompute(division)
 
-    # Fetch subjects mapping
-    subjects = {s.subject_id: s.subject_code for s in Subject.query.all()}
+    return _division_flights.do(("generate", division), run)
 
-    students = Student.query.filter_by(division=division).all()
 
-    for student in students:
-        marks = Mark.query.filter_by(
-            roll_no=student.roll_no,
-            division=student.division,
-        ).all()
-
-        # Map subject_code → mark
-        mark_map = {}
-        for m in marks:
-            code = subjects.get(m.subject_id)
-            if code:
-                mark_map[code] = m
-
-        # Determine required subject codes for this student.
-        # Prefer deriving required subjects from teacher allocations for the student's division.
-        grading_only = {"EVS", "PE"}
-        optional_codes = {"HINDI", "IT", "MATHS", "SP"}
-
-        allocs = TeacherSubjectAllocation.query.filter_by(division=student.division).all()
-        base_required = []
-        if allocs:
-            for a in allocs:
-                code = subjects.get(a.subject_id)
-                if not code:
-                    continue
-                # exclude grading-only and optional-coded subjects here
-                if code in grading_only or code in optional_codes:
-                    continue
-                if code not in base_required:
-                    base_required.append(code)
-        else:
-            # fallback to sensible defaults if no allocations found
-            base_required = ["ENG", "ECO", "BK", "OC"]
-
-        required_codes = list(base_required)
-        if student.optional_subject in ("HINDI", "IT"):
-            required_codes.append(student.optional_subject)
-        if student.optional_subject_2 in ("MATHS", "SP"):
-            required_codes.append(student.optional_subject_2)
-
-        # If any required subject is missing Annual marks, do not compute percentage
-        missing_required = False
-        for code in required_codes:
-            m = mark_map.get(code)
-            if not m or m.annual is None:
-                missing_required = True
-                break
-        if missing_required:
-            # If a Result already exists, clear its percentage to avoid showing stale/incorrect values
-            existing = Result.query.filter_by(roll_no=student.roll_no, division=student.division).first()
-            if existing:
-                existing.percentage = None
-                db.session.add(existing)
-            # Skip calculation for this student until all required Annual marks are present
-            continue
+def generate_result_for_student(roll_no: str, division: str):
+    """
+    Generate / update the Result row of a single student.
 
-        # All required marks are present — proceed to create/update result
-        result = Result.query.filter_by(
-            roll_no=student.roll_no,
-            division=student.division,
-        ).first()
-
-        if not result:
-            # SQLAlchemy model `Result` does not define a custom __init__ that
-            # accepts kwargs for columns; assign attributes explicitly to
-            # satisfy static checkers and avoid unexpected __init__ behavior.
-            result = Result()
-            result.roll_no = student.roll_no
-            result.name = student.name
-            result.division = student.division
-
-        # total sums Annual marks only (used for percentage calculation)
-        total = 0.0
-        count = 0
-
-        # ---------------- CORE SUBJECTS ----------------
-        for code, field in {
-            "ENG": "eng",
-            "ECO": "eco",
-            "BK": "bk",
-            "OC": "oc",
-        }.items():
-            m = mark_map.get(code)
-            if m:
-                annual = m.annual if m.annual is not None else 0.0
-                grace = m.grace or 0.0
-                # Store Annual in the result avg fields (avg kept only for compatibility/display)
-                setattr(result, f"{field}_avg", annual)
-                setattr(result, f"{field}_grace", grace)
-                total += annual
-                count += 1
-
-        # ---------------- OPTIONAL GROUP 1 ----------------
-        if student.optional_subject == "HINDI":
-            m = mark_map.get("HINDI")
-            annual = m.annual if m and m.annual is not None else 0.0
-            result.hindi_avg = annual
-            result.hindi_grace = (m.grace if m and m.grace is not None else 0.0)
-            total += result.hindi_avg
-            count += 1
-        elif student.optional_subject == "IT":
-            m = mark_map.get("IT")
-            annual = m.annual if m and m.annual is not None else 0.0
-            result.it_avg = annual
-            result.it_grace = (m.grace if m and m.grace is not None else 0.0)
-            total += result.it_avg
-            count += 1
+    The cost does not grow with the size of the division, but the division is
+    not recorded as current (other students may be stale too), so the next
+    `ensure_results_current` still recomputes it. Returns the number of
+    Result rows written (0 or 1).
+    """
+    return _recompute(division, [roll_no])
 
-        # ---------------- OPTIONAL GROUP 2 ----------------
-        if student.optional_subject_2 == "MATHS":
-            m = mark_map.get("MATHS")
-            annual = m.annual if m and m.annual is not None else 0.0
-            result.maths_avg = annual
-            result.maths_grace = (m.grace if m and m.grace is not None else 0.0)
-            total += result.maths_avg
-            count += 1
-        elif student.optional_subject_2 == "SP":
-            m = mark_map.get("SP")
-            annual = m.annual if m and m.annual is not None else 0.0
-            result.sp_avg = annual
-            result.sp_grace = (m.grace if m and m.grace is not None else 0.0)
-            total += result.sp_avg
-            count += 1
 
-        # ---------------- FINAL CALC ----------------
-        result.total_grace = sum(
-            g for g in [
-                result.eng_grace,
-                result.hindi_grace,
-                result.it_grace,
-                result.maths_grace,
-                result.sp_grace,
-                result.bk_grace,
-                result.oc_grace,
-            ]
-            if g is not None
-        )
+def generate_results_for_students(division: str, roll_nos, versions=()):
+    """
+    Bring a division's results up to date after mark writes that touched only
+    ``roll_nos``; ``versions`` are the data versions those writes produced.
+
+    When they account for every change since the results were last computed,
+    only these students are recomputed and the division is recorded as
+    current, so the cost does not grow with the size of the division.
+    Otherwise (writes elsewhere, e.g. in another process or to students,
+    allocations or whole divisions) the whole division is recomputed.
+    Returns the number of Result rows written.
+    """
+    with cross_process_lock(f"results.{division}"):
+        # End the current transaction to see versions committed elsewhere
+        db.session.commit()
+        data_version, results_version = get_versions(division)
+        if results_version == data_version:
+            return 0
+        if results_version is None or not set(range(results_version + 1, data_version + 1)) <= set(versions):
+            return _recompute(division)
+        return _recompute(division, sorted(roll_nos), data_version)
+
+
+def ensure_results_current(division: str):
+    """
+    Recompute a division's results only when its data changed since they were
+    last computed. When results are current this is a single SELECT, so read
+    endpoints stay free of writes and row locks. Concurrent stale readers wait
+    for a single recompute instead of each rewriting the same rows.
+    Returns True when a recompute was needed.
+    """
+    if results_are_current(division):
+        return False
 
-        # Percentage is calculated only from Annual marks (avg fields now store Annual)
-        # Exclude grade-only subjects (EVS, PE) from the calculation
-        if count > 0:
-            result.percentage = round((total / count), 2)
-
-        # EVS and PE are grade-only. If annual marks exist for them, convert to grade and store.
-        evs_mark = mark_map.get('EVS')
-        if evs_mark and evs_mark.annual is not None:
-            a = evs_mark.annual
-            if a >= 75:
-                result.evs_grade = 'A+'
-            elif a >= 60:
-                result.evs_grade = 'A'
-            elif a >= 50:
-                result.evs_grade = 'B'
-            elif a >= 35:
-                result.evs_grade = 'C'
-            else:
-                result.evs_grade = 'F'
-
-        pe_mark = mark_map.get('PE')
-        if pe_mark and pe_mark.annual is not None:
-            a = pe_mark.annual
-            if a >= 75:
-                result.pe_grade = 'A+'
-            elif a >= 60:
-                result.pe_grade = 'A'
-            elif a >= 50:
-                result.pe_grade = 'B'
-            elif a >= 35:
-                result.pe_grade = 'C'
-            else:
-                result.pe_grade = 'F'
-
-        db.session.add(result)
+    def run():
+        with cross_process_lock(f"results.{division}"):
+            # End the current transaction so the re-check sees work another
+            # process committed while we waited for the lock
+            db.session.commit()
+            if results_are_current(division):
+                return False
+            _recompute(division)
+            return True
 
+    recomputed = _division_flights.do(("ensure", division), run)
+    # Start a fresh transaction so callers read the rows committed by the leader
     db.session.commit()
+    return recomputed
@@ -0,0 +1,144 @@
+# /backend/services/single_flight.py
+"""
+Single-flight execution of expensive per-key work (e.g. a division recompute).
+
+`SingleFlight` coalesces concurrent callers inside one process: the first
+caller for a key runs the function, the others wait for it and share its
+outcome. `cross_process_lock` serialises the same work across worker
+processes, using MySQL ``GET_LOCK`` when available and an exclusive lock
+file otherwise (SQLite / local development).
+"""
+
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app
+
+from app import db
+
+try:
+    import fcntl  # POSIX
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt  # type: ignore
+
+LOCK_POLL_SECONDS = 0.05
+
+
+class LockTimeout(Exception):
+    """Raised when a cross-process lock could not be acquired in time."""
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Run at most one call per key at a time; concurrent callers share its outcome."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as ex:
+            call.error = ex
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def in_flight(self):
+        with self._lock:
+            return list(self._calls)
+
+
+def _lock_timeout():
+    return current_app.config.get("RESULT_LOCK_TIMEOUT_SECONDS", 30)
+
+
+@contextmanager
+def _mysql_lock(name, timeout):
+    # GET_LOCK is bound to the connection, so hold a dedicated one for the duration
+    with db.engine.connect() as conn:
+        acquired = conn.execute(
+            db.text("SELECT GET_LOCK(:name, :timeout)"), {"name": name, "timeout": timeout}
+        ).scalar()
+        if acquired != 1:
+            raise LockTimeout(f"Could not acquire lock {name}")
+        try:
+            yield
+        finally:
+            conn.execute(db.text("SELECT RELEASE_LOCK(:name)"), {"name": name})
+
+
+@contextmanager
+def _file_lock(name, timeout):
+    lock_dir = current_app.config.get("RESULT_LOCK_DIR") or os.path.join(
+        tempfile.gettempdir(), "result_locks"
+    )
+    os.makedirs(lock_dir, exist_ok=True)
+    path = os.path.join(lock_dir, re.sub(r"[^A-Za-z0-9_.-]", "_", name) + ".lock")
+
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:  # pragma: no cover - Windows
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise LockTimeout(f"Could not acquire lock {name}")
+                time.sleep(LOCK_POLL_SECONDS)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:  # pragma: no cover - Windows
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def cross_process_lock(key, timeout=None):
+    """Exclusive lock on ``key`` shared by every worker process using the database."""
+    timeout = _lock_timeout() if timeout is None else timeout
+    url = db.engine.url
+    name = f"{url.database or 'db'}.{key}"
+    if url.get_backend_name() == "mysql":
+        # MySQL lock names are limited to 64 characters
+        with _mysql_lock(name[-64:], timeout):
+            yield
+    else:
+        with _file_lock(name, timeout):
+            yield
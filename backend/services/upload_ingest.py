@@ -0,0 +1,214 @@
+# /backend/services/upload_ingest.py
+"""
+Streaming ingestion of uploaded marks sheets (Excel workbooks or CSV/TSV).
+
+Uploads are copied in chunks to an anonymous temp file, refusing anything
+over MAX_UPLOAD_BYTES. Workbooks (detected by their zip signature) are
+parsed with openpyxl's read-only mode: rows are streamed as value tuples
+without building cell objects. Anything else is read as UTF-8 delimited
+text with the csv module, the delimiter (comma, tab or semicolon) taken
+from the header line. Either way rows are handed to the caller one at a
+time as they are parsed, fully blank rows are dropped and parsing stops as
+soon as the sheet exceeds MAX_UPLOAD_ROWS data rows.
+"""
+
+import csv
+import io
+import os
+import tempfile
+
+from flask import current_app
+
+try:
+    import openpyxl
+except Exception:  # pragma: no cover - optional at import time, checked by routes
+    openpyxl = None
+
+COPY_CHUNK_BYTES = 64 * 1024
+
+# .xlsx files are zip archives
+XLSX_MAGIC = b"PK\x03\x04"
+DELIMITERS = (",", "\t", ";")
+
+
+class UploadError(Exception):
+    """Rejected upload; carries the JSON error body and HTTP status for the route."""
+
+    def __init__(self, message, status_code=400, details=None):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.details = details
+
+    def body(self):
+        body = {"error": self.message}
+        if self.details is not None:
+            body["details"] = self.details
+        return body
+
+
+def _limits():
+    config = current_app.config
+    return config.get("MAX_UPLOAD_BYTES", 10 * 1024 * 1024), config.get("MAX_UPLOAD_ROWS", 20000)
+
+
+def _check_declared_size(file_storage, max_bytes):
+    if file_storage.content_length and file_storage.content_length > max_bytes:
+        raise UploadError(f"Upload exceeds the {max_bytes} byte limit", 413)
+
+
+def _copy_limited(file_storage, dest, max_bytes):
+    """Copy an uploaded file into ``dest`` in chunks, enforcing ``max_bytes``."""
+    written = 0
+    while True:
+        chunk = file_storage.stream.read(COPY_CHUNK_BYTES)
+        if not chunk:
+            break
+        written += len(chunk)
+        if written > max_bytes:
+            raise UploadError(f"Upload exceeds the {max_bytes} byte limit", 413)
+        dest.write(chunk)
+
+
+def save_upload(file_storage, path):
+    """Store an upload at ``path`` for later parsing (size limit enforced)."""
+    max_bytes, _ = _limits()
+    _check_declared_size(file_storage, max_bytes)
+    try:
+        with open(path, "wb") as dest:
+            _copy_limited(file_storage, dest, max_bytes)
+    except BaseException:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+
+
+def _non_blank_rows(rows, max_rows, kind):
+    """Yield the rows that are not fully blank, failing past ``max_rows`` of them."""
+    count = 0
+    for r in rows:
+        if not r or all(c is None for c in r):
+            continue
+        count += 1
+        if count > max_rows:
+            raise UploadError(f"{kind} has more than {max_rows} data rows", 413)
+        yield r
+
+
+def _read_workbook(fileobj, max_rows, close):
+    if openpyxl is None:
+        close()
+        raise UploadError("Server missing Excel parsing support (openpyxl)", 500)
+    try:
+        wb = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception as e:
+        close()
+        raise UploadError("Failed to read Excel file", 400, str(e))
+
+    def finish():
+        wb.close()
+        close()
+
+    try:
+        if not wb.sheetnames:
+            raise UploadError("Excel contains no sheets")
+        # Use the first sheet (do not enforce exact sheet name). Validate by columns instead.
+        sheet = wb[wb.sheetnames[0]]
+        # stored dimensions are often wrong in generated files; scan the real extent
+        sheet.reset_dimensions()
+        rows_iter = sheet.iter_rows(values_only=True)
+        try:
+            headers = [str(x).strip().lower() if x is not None else '' for x in next(rows_iter)]
+        except StopIteration:
+            raise UploadError("Excel sheet is empty")
+    except BaseException:
+        finish()
+        raise
+
+    def rows():
+        try:
+            yield from _non_blank_rows(rows_iter, max_rows, "Excel")
+        finally:
+            finish()
+
+    return headers, rows()
+
+
+def _read_delimited(fileobj, max_rows, close):
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+
+    def finish():
+        # leave the underlying file to ``close``
+        text.detach()
+        close()
+
+    def failed(e):
+        return UploadError("Failed to read CSV file (expected .xlsx or UTF-8 CSV/TSV)", 400, str(e))
+
+    try:
+        header_line = text.readline()
+        if not header_line.strip():
+            raise UploadError("CSV file is empty")
+        delimiter = max(DELIMITERS, key=header_line.count)
+        headers = [h.strip().lower() for h in next(csv.reader([header_line], delimiter=delimiter))]
+    except (UnicodeDecodeError, csv.Error) as e:
+        finish()
+        raise failed(e)
+    except BaseException:
+        finish()
+        raise
+
+    def rows():
+        try:
+            # blank cells become None, as in workbooks
+            cells = (tuple(c.strip() or None for c in r) for r in csv.reader(text, delimiter=delimiter))
+            yield from _non_blank_rows(cells, max_rows, "CSV")
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise failed(e)
+        finally:
+            finish()
+
+    return headers, rows()
+
+
+def _parse(fileobj, close):
+    _, max_rows = _limits()
+    magic = fileobj.read(len(XLSX_MAGIC))
+    fileobj.seek(0)
+    if magic == XLSX_MAGIC:
+        return _read_workbook(fileobj, max_rows, close)
+    return _read_delimited(fileobj, max_rows, close)
+
+
+def read_sheet(source):
+    """
+    Parse an uploaded sheet (path or seekable binary file object): the first
+    sheet of an .xlsx workbook, or CSV/TSV text. Returns (headers, rows):
+    lower-cased header strings and an iterator over the non-blank data rows
+    as value tuples, read from the file row by row as it is consumed.
+    Raises UploadError for unreadable or empty sheets; the iterator raises it
+    once a sheet goes over MAX_UPLOAD_ROWS. A file opened from ``source``
+    stays open until the rows are consumed (or the iterator is closed).
+    """
+    if isinstance(source, (str, os.PathLike)):
+        fh = open(source, "rb")
+        return _parse(fh, fh.close)
+    return _parse(source, lambda: None)
+
+
+def read_upload_sheet(file_storage):
+    """
+    Spool an upload to a temp file and parse it (see read_sheet); the spool
+    is removed once the rows are consumed.
+    """
+    max_bytes, _ = _limits()
+    _check_declared_size(file_storage, max_bytes)
+
+    spool = tempfile.TemporaryFile()
+    try:
+        _copy_limited(file_storage, spool, max_bytes)
+        spool.seek(0)
+    except BaseException:
+        spool.close()
+        raise
+    return _parse(spool, spool.close)
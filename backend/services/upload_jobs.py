@@ -0,0 +1,210 @@
+# /backend/services/upload_jobs.py
+"""
+Background processing of large marks uploads.
+
+`/teacher/marks/upload-apply?async=1` stores the upload on disk and
+returns a random job id straight away; a single worker thread then parses,
+validates (in chunks, reporting progress) and applies it with the same
+pipeline as the synchronous request. Job state is written to a JSON file
+per job in UPLOAD_JOB_DIR, so the uploader can poll `/teacher/jobs/<id>`
+on any worker process sharing that directory.
+"""
+
+import json
+import os
+import queue
+import secrets
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from app import db
+from services.marks_upload import parse_apply_rows, validate_apply_rows, commit_marks
+from services.upload_ingest import UploadError, save_upload, read_sheet
+
+# Seconds a job's status file (or a leftover stored upload) is kept after its last update
+JOB_STATUS_TTL_SECONDS = 24 * 3600
+# Seconds without a status update after which a queued/running job is
+# reported failed: the worker process holding it has gone away
+JOB_STALE_SECONDS = 3600
+
+
+def _stamp():
+    return datetime.utcnow().isoformat()
+
+
+class UploadJobQueue:
+    """FIFO of stored uploads drained by one worker thread."""
+
+    def __init__(self):
+        self.app = None
+        self.async_mode = True
+        self.job_dir = None
+
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = None
+
+    def init_app(self, app):
+        self.app = app
+        self.async_mode = app.config.get("UPLOAD_JOBS_ASYNC", True)
+        self.job_dir = app.config.get("UPLOAD_JOB_DIR") or os.path.join(
+            tempfile.gettempdir(), "upload_jobs"
+        )
+
+    # ---------------- producers ----------------
+    def submit(self, file_storage, user_id, user_type, form_subject_id=None):
+        """
+        Store an upload and queue it for processing; returns the job.
+        Raises UploadError when the file is over the size limit.
+        """
+        os.makedirs(self.job_dir, exist_ok=True)
+        self._purge_expired()
+        job_id = secrets.token_urlsafe(12)
+        path = os.path.join(self.job_dir, f"{job_id}.upload")
+        save_upload(file_storage, path)
+
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "owner_id": user_id,
+            "owner_type": user_type,
+            "filename": file_storage.filename,
+            "created_at": _stamp(),
+            "started_at": None,
+            "finished_at": None,
+            "rows_total": None,
+            "rows_processed": 0,
+            "saved": 0,
+            "missing": 0,
+            "inserted": 0,
+            "updated": 0,
+            "result": None,
+        }
+        task = {"path": path, "subject_id": form_subject_id}
+        self._save(job)
+
+        if self.async_mode:
+            self._ensure_worker()
+            self._queue.put((job, task))
+        else:
+            # synchronous mode (tests / scripts): process right away
+            self._process(job, task)
+        return job
+
+    # ---------------- worker ----------------
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name="upload-jobs", daemon=True
+                )
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            job, task = self._queue.get()
+            try:
+                self._process(job, task)
+            finally:
+                self._queue.task_done()
+
+    def _process(self, job, task):
+        job["status"] = "running"
+        job["started_at"] = _stamp()
+        self._save(job)
+
+        def progress(rows_done):
+            job["rows_processed"] = rows_done
+            self._save(job)
+
+        app = self.app
+        try:
+            with app.app_context():
+                try:
+                    headers, rows = read_sheet(task["path"])
+                    requested = parse_apply_rows(headers, rows)
+                except UploadError as e:
+                    body, status = e.body(), e.status_code
+                else:
+                    job["rows_total"] = len(requested)
+                    self._save(job)
+                    to_apply, missing = validate_apply_rows(
+                        requested, job["owner_id"], job["owner_type"], task["subject_id"], progress
+                    )
+                    body, status = commit_marks(to_apply, job["owner_id"], missing)
+                db.session.remove()
+        except Exception as ex:
+            app.logger.exception(f"Upload job {job['job_id']} failed")
+            body, status = {"error": "Upload processing failed", "details": str(ex)}, 500
+        finally:
+            if os.path.exists(task["path"]):
+                os.remove(task["path"])
+
+        job["result"] = body
+        job["saved"] = len(body.get("saved", []))
+        job["missing"] = len(body.get("missing", []))
+        job["inserted"] = body.get("inserted", 0)
+        job["updated"] = body.get("updated", 0)
+        job["status"] = "done" if status == 200 else "failed"
+        job["finished_at"] = _stamp()
+        self._save(job)
+
+    # ---------------- shared state ----------------
+    def _status_path(self, job_id):
+        return os.path.join(self.job_dir, f"{job_id}.json")
+
+    def _save(self, job):
+        # written atomically: pollers never see a partial file
+        path = self._status_path(job["job_id"])
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(job, fh)
+        os.replace(tmp, path)
+
+    def _purge_expired(self):
+        """
+        Drop status files and stored uploads past JOB_STATUS_TTL_SECONDS
+        and fail jobs left queued/running by a worker that died.
+        """
+        now = time.time()
+        for name in os.listdir(self.job_dir):
+            path = os.path.join(self.job_dir, name)
+            try:
+                mtime = os.path.getmtime(path)
+                if mtime < now - JOB_STATUS_TTL_SECONDS:
+                    os.remove(path)
+                elif name.endswith(".json") and mtime < now - JOB_STALE_SECONDS:
+                    self._load(path, mtime)
+            except (OSError, ValueError):
+                pass
+
+    def _load(self, path, mtime):
+        """The job saved at ``path``, marked failed first when it went stale."""
+        with open(path, encoding="utf-8") as fh:
+            job = json.load(fh)
+        if job["status"] in ("queued", "running") and mtime < time.time() - JOB_STALE_SECONDS:
+            job["status"] = "failed"
+            job["result"] = {"error": "Upload processing was interrupted"}
+            job["finished_at"] = _stamp()
+            self._save(job)
+            upload = os.path.join(self.job_dir, f"{job['job_id']}.upload")
+            if os.path.exists(upload):
+                os.remove(upload)
+        return job
+
+    # ---------------- reporting ----------------
+    def get_job(self, job_id):
+        """The job's last saved state, or None for unknown (or expired) ids."""
+        # ids are url-safe base64; anything else cannot name a status file
+        if not job_id or not all(c.isalnum() or c in "-_" for c in job_id):
+            return None
+        path = self._status_path(job_id)
+        try:
+            return self._load(path, os.path.getmtime(path))
+        except (OSError, ValueError):
+            return None
+
+
+upload_jobs = UploadJobQueue()
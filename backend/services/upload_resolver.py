@@ -0,0 +1,139 @@
+# /backend/services/upload_resolver.py
+"""
+Bulk lookups for validating uploaded marks sheets.
+
+`UploadResolver` collects every (roll_no, division) key and subject cell of
+an upload up front and resolves students, subjects, the uploader's
+allocations and existing marks with a few ``IN`` queries, so row validation
+runs against dicts instead of issuing several queries per row.
+
+Candidate rows are selected by the database, so its collation decides what
+matches just as it did for the per-row lookups; they are then keyed
+case-insensitively in memory.
+"""
+
+from app import db
+from models import Student, Subject, Mark, TeacherSubjectAllocation
+from services.db_bulk import chunked
+
+LOOKUP_CHUNK_SIZE = 1000
+
+
+def _norm(value):
+    return str(value).strip().lower() if value is not None else None
+
+
+def _key(roll_no, division):
+    return _norm(roll_no), _norm(division)
+
+
+class UploadResolver:
+    """Students, subjects, allocations and marks needed to validate one upload."""
+
+    def __init__(self, teacher_id, keys, subject_values=()):
+        """
+        ``keys``: iterable of (roll_no, division) from the sheet (division may be None).
+        ``subject_values``: subject cells (codes or names) to resolve.
+        """
+        self.teacher_id = teacher_id
+        # raw values go to the database (its collation decides matches),
+        # normalised keys are used for the in-memory lookups
+        keys = {(str(r).strip(), str(d).strip()) for r, d in keys if r is not None and d}
+        self._students = self._load_students(keys)
+        self._subjects = self._load_subjects(subject_values)
+        self._allocations = self._load_allocations({d for _, d in keys})
+        self._marks = {}
+
+    # -------------------- loading --------------------
+    @staticmethod
+    def _load_students(keys):
+        students = {}
+        if not keys:
+            return students
+        wanted = {_key(r, d) for r, d in keys}
+        divisions = sorted({d for _, d in keys})
+        for rolls in chunked(sorted({r for r, _ in keys}), LOOKUP_CHUNK_SIZE):
+            query = Student.query.filter(Student.roll_no.in_(rolls), Student.division.in_(divisions))
+            for s in query:
+                key = _key(s.roll_no, s.division)
+                if key in wanted:
+                    students.setdefault(key, s)
+        return students
+
+    @staticmethod
+    def _load_subjects(values):
+        values = {v for v in (str(x).strip() for x in values if x is not None) if v and not v.isdigit()}
+        if not values:
+            return {}
+        subjects = {}
+        rows = (
+            db.session.query(Subject.subject_id, Subject.subject_code, Subject.subject_name)
+            .filter(Subject.subject_code.in_(values) | Subject.subject_name.in_(values))
+            .order_by(Subject.subject_id)
+        )
+        # lowest id wins when a value matches several subjects, like .first() did
+        for sid, code, name in rows:
+            subjects.setdefault(_norm(code), sid)
+            subjects.setdefault(_norm(name), sid)
+        return subjects
+
+    def _load_allocations(self, divisions):
+        allocations = {}
+        if not divisions:
+            return allocations
+        rows = (
+            db.session.query(TeacherSubjectAllocation.division, TeacherSubjectAllocation.subject_id)
+            .filter(
+                TeacherSubjectAllocation.teacher_id == self.teacher_id,
+                TeacherSubjectAllocation.division.in_(divisions),
+            )
+        )
+        for division, sid in rows:
+            allocations.setdefault(_norm(division), set()).add(sid)
+        return allocations
+
+    def load_marks(self, triples):
+        """Fetch existing marks for (roll_no, division, subject_id) triples in bulk."""
+        triples = {(str(r).strip(), str(d).strip(), int(sid)) for r, d, sid in triples}
+        if not triples:
+            return
+        wanted = {(*_key(r, d), sid) for r, d, sid in triples}
+        divisions = sorted({d for _, d, _ in triples})
+        subject_ids = sorted({sid for _, _, sid in triples})
+        for rolls in chunked(sorted({r for r, _, _ in triples}), LOOKUP_CHUNK_SIZE):
+            query = Mark.query.filter(
+                Mark.roll_no.in_(rolls),
+                Mark.division.in_(divisions),
+                Mark.subject_id.in_(subject_ids),
+            )
+            for m in query:
+                key = (*_key(m.roll_no, m.division), m.subject_id)
+                if key in wanted:
+                    self._marks.setdefault(key, m)
+
+    # -------------------- lookups --------------------
+    def student(self, roll_no, division):
+        return self._students.get(_key(roll_no, division))
+
+    def subject_id(self, value):
+        """Subject id for a subject cell: numeric ids pass through, codes/names are looked up."""
+        if value is None:
+            return None
+        value = str(value).strip()
+        if not value:
+            return None
+        if value.isdigit():
+            return int(value)
+        return self._subjects.get(_norm(value))
+
+    def sole_allocated_subject(self, division):
+        """The uploader's only subject in ``division``; None when there are none or several."""
+        sids = self._allocations.get(_norm(division), ())
+        return next(iter(sids)) if len(sids) == 1 else None
+
+    def is_allocated(self, subject_id, division):
+        return int(subject_id) in self._allocations.get(_norm(division), ())
+
+    def mark(self, roll_no, division, subject_id):
+        """Existing mark (after load_marks) or None."""
+        return self._marks.get((*_key(roll_no, division), int(subject_id)))
@@ -0,0 +1,111 @@
+# /backend/services/upload_staging.py
+"""
+Short-lived staging of previewed marks uploads.
+
+`/teacher/marks/from-excel` resolves a workbook once and stages the
+uploaded values of the matched rows (with their resolved subject) on disk
+under a random token bound to the uploader. `/teacher/marks/upload-apply`
+can then apply those rows by token instead of parsing the workbook again;
+they are validated again at that point, so students, allocations or ranges
+that changed since the preview are honoured. Staged uploads expire after
+UPLOAD_STAGING_TTL_SECONDS and are single-use: applying claims the file by
+renaming it, so only one of two concurrent applies gets it.
+"""
+
+import json
+import os
+import secrets
+import tempfile
+import time
+
+from flask import current_app
+
+from services.upload_ingest import UploadError
+
+
+def _settings():
+    config = current_app.config
+    directory = config.get("UPLOAD_STAGING_DIR") or os.path.join(tempfile.gettempdir(), "upload_staging")
+    return directory, config.get("UPLOAD_STAGING_TTL_SECONDS", 1800)
+
+
+def _path(directory, token):
+    return os.path.join(directory, f"{token}.json")
+
+
+def _claimed_path(directory, token):
+    return os.path.join(directory, f"{token}.claimed")
+
+
+def _purge_expired(directory, ttl):
+    cutoff = time.time() - ttl
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def stage_upload(entries, missing, user_id, user_type):
+    """Persist upload items (and the rows left out) for one uploader; returns the token."""
+    directory, ttl = _settings()
+    os.makedirs(directory, exist_ok=True)
+    _purge_expired(directory, ttl)
+
+    token = secrets.token_urlsafe(24)
+    payload = {"user_id": user_id, "user_type": user_type, "entries": entries, "missing": missing}
+    tmp = _path(directory, token) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(payload, fh)
+    os.replace(tmp, _path(directory, token))
+    return token
+
+
+def claim_staged(token, user_id, user_type):
+    """
+    Take the upload staged under ``token`` by this user for applying; returns (entries, missing).
+    The token can no longer be claimed until release_staged() hands it back.
+    Raises UploadError (404) for unknown, expired, foreign or already claimed tokens.
+    """
+    directory, ttl = _settings()
+    not_found = UploadError("Staged upload not found or expired; upload the file again", 404)
+    # tokens are url-safe base64; anything else cannot name a staged file
+    if not token or not all(c.isalnum() or c in "-_" for c in token):
+        raise not_found
+    path = _path(directory, token)
+    try:
+        if os.path.getmtime(path) < time.time() - ttl:
+            os.remove(path)
+            raise not_found
+        with open(path, encoding="utf-8") as fh:
+            payload = json.load(fh)
+    except (OSError, ValueError):
+        raise not_found
+    if (payload.get("user_id"), payload.get("user_type")) != (user_id, user_type):
+        raise not_found
+    # atomic: of two concurrent applies only one rename succeeds
+    try:
+        os.replace(path, _claimed_path(directory, token))
+    except OSError:
+        raise not_found
+    return payload["entries"], payload["missing"]
+
+
+def release_staged(token):
+    """Make a claimed upload available again (its apply failed)."""
+    directory, _ = _settings()
+    try:
+        os.replace(_claimed_path(directory, token), _path(directory, token))
+    except OSError:
+        pass
+
+
+def discard_staged(token):
+    """Delete a claimed upload once it has been applied."""
+    directory, _ = _settings()
+    try:
+        os.remove(_claimed_path(directory, token))
+    except OSError:
+        pass
@@ -0,0 +1,132 @@
+# backend/tests/helpers.py
+"""Helpers shared by the unit tests"""
+import io
+import unittest
+
+import openpyxl
+from sqlalchemy import event
+
+from app import create_app, db
+from auth import generate_token, hash_password
+from models import Admin, Mark, Student, Subject, Teacher, TeacherSubjectAllocation
+
+
+class QueryCounter:
+    """Count (and keep) SQL statements executed on an engine inside a `with` block."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+        self.statements = []
+
+    def _on_execute(self, conn, cursor, statement, *args, **kwargs):
+        self.count += 1
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+class AppTestCase(unittest.TestCase):
+    """
+    App on an in-memory SQLite database with the tables created, results
+    recomputed inline, a test client and a pushed app context. Override
+    `app_config` for extra settings.
+    """
+
+    def app_config(self):
+        return {}
+
+    def setUp(self):
+        self.app = create_app({
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "TESTING": True,
+            "RESULT_RECOMPUTE_ASYNC": False,
+            **self.app_config(),
+        })
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+
+# ---------------- fixtures (added to the session, not committed) ----------------
+def add_subject(code, name=None, subject_type="CORE"):
+    s = Subject()
+    s.subject_code = code
+    s.subject_name = name or code.title()
+    s.subject_type = subject_type
+    db.session.add(s)
+    return s
+
+
+def add_teacher(name, userid):
+    teacher = Teacher(name=name, userid=userid, password_hash="x")
+    db.session.add(teacher)
+    return teacher
+
+
+def add_admin(username="admin"):
+    admin = Admin(username=username, password_hash=hash_password("x"), active=True)
+    db.session.add(admin)
+    return admin
+
+
+def allocate(teacher, subject, division):
+    """Allocate ``subject`` in ``division`` to ``teacher`` (flushes to get their ids)."""
+    db.session.flush()
+    alloc = TeacherSubjectAllocation()
+    alloc.teacher_id = teacher.teacher_id
+    alloc.subject_id = subject.subject_id
+    alloc.division = division
+    db.session.add(alloc)
+    return alloc
+
+
+def add_student(roll_no, division="A", name=None, **fields):
+    s = Student()
+    s.roll_no = roll_no
+    s.division = division
+    s.name = name or f"Student {roll_no}"
+    for field, value in fields.items():
+        setattr(s, field, value)
+    db.session.add(s)
+    return s
+
+
+def add_mark(roll_no, subject, division="A", **fields):
+    """Mark of ``subject`` (flushed to get its id) with the given column values."""
+    db.session.flush()
+    m = Mark()
+    m.roll_no = roll_no
+    m.division = division
+    m.subject_id = subject.subject_id
+    for field, value in fields.items():
+        setattr(m, field, value)
+    db.session.add(m)
+    return m
+
+
+def auth_headers(principal_id, user_type):
+    return {"Authorization": f"Bearer {generate_token(principal_id, user_type)}"}
+
+
+def workbook_bytes(rows, header=("Roll", "Name", "Division", "Unit1", "Unit2", "Term", "Annual", "Grace")):
+    """An .xlsx upload with ``header`` and ``rows``."""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(list(header))
+    for row in rows:
+        ws.append(list(row))
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
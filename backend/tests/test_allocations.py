@@ -0,0 +1,60 @@
+# backend/tests/test_allocations.py
+"""Unit tests for the joined allocation listing and /auth/me"""
+import unittest
+from app import db
+from auth import generate_token
+from tests.helpers import AppTestCase, QueryCounter, add_admin, add_subject, add_teacher, allocate, auth_headers
+
+
+class AllocationListingTestCase(AppTestCase):
+    """Test that allocation listings do not query per allocation"""
+
+    def setUp(self):
+        super().setUp()
+        subjects = [add_subject(code) for code in ("ENG", "ECO", "BK", "OC")]
+        admin = add_admin()
+        self.t1 = add_teacher("One", "one")
+        self.t2 = add_teacher("Two", "two")
+        for division in ("A", "B", "C"):
+            for subject in subjects:
+                allocate(self.t1, subject, division)
+        allocate(self.t2, subjects[0], "A")
+        db.session.commit()
+        self.t1_id, self.t2_id = self.t1.teacher_id, self.t2.teacher_id
+        self.admin_headers = auth_headers(admin.admin_id, "ADMIN")
+
+    def get(self, url, headers):
+        db.session.expunge_all()
+        with QueryCounter(db.engine) as counter:
+            response = self.client.get(url, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        return response.get_json(), counter.count
+
+    def test_allocations_listing_and_filters(self):
+        # warm the auth cache so every counted request resolves the admin the same way
+        self.client.get("/admin/divisions", headers=self.admin_headers)
+        rows, queries = self.get("/admin/allocations", self.admin_headers)
+        self.assertEqual(len(rows), 13)
+        self.assertEqual(rows[0]["teacher_name"], "One")
+        self.assertEqual(rows[0]["subject_code"], "ENG")
+
+        filtered, filtered_queries = self.get(f"/admin/allocations?teacher_id={self.t2_id}", self.admin_headers)
+        self.assertEqual([(r["teacher_name"], r["division"]) for r in filtered], [("Two", "A")])
+        self.assertEqual(queries, filtered_queries)
+
+        by_division, _ = self.get("/admin/allocations?division=B", self.admin_headers)
+        self.assertEqual(len(by_division), 4)
+
+        bad = self.client.get("/admin/allocations?teacher_id=x", headers=self.admin_headers)
+        self.assertEqual(bad.status_code, 400)
+
+    def test_me_uses_constant_queries(self):
+        many, many_queries = self.get("/auth/me", {"Authorization": f"Bearer {generate_token(self.t1_id, 'TEACHER')}"})
+        one, one_queries = self.get("/auth/me", {"Authorization": f"Bearer {generate_token(self.t2_id, 'TEACHER')}"})
+        self.assertEqual(len(many["allocations"]), 12)
+        self.assertEqual(one["allocations"], [{"subject_id": 1, "subject_code": "ENG", "subject_name": "Eng", "division": "A"}])
+        self.assertEqual(many_queries, one_queries)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+# backend/tests/test_artifact_cache.py
+"""Unit tests for the version-keyed export artifact cache"""
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from app import db
+from models import Mark
+from services.artifact_cache import ArtifactCache, export_cache
+from services.division_version import bump_data_version
+from tests.helpers import AppTestCase, QueryCounter, add_admin, add_mark, add_student, add_subject, auth_headers
+
+
+class ArtifactCacheTestCase(AppTestCase):
+    """Test cached /admin/excel exports, conditional GETs and eviction"""
+
+    def app_config(self):
+        return {"EXPORT_CACHE_DIR": self.cache_dir.name}
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        super().setUp()
+        eng = add_subject("ENG", "English")
+        admin = add_admin()
+        for division in ("A", "B"):
+            add_student("1", division, f"Student {division}")
+        m = add_mark("1", eng, annual=55.0)
+        db.session.commit()
+        self.mark_id = m.mark_id
+        self.headers = auth_headers(admin.admin_id, "ADMIN")
+
+    def get(self, url, **headers):
+        return self.client.get(url, headers={**self.headers, **headers})
+
+    def stats(self):
+        return self.get("/admin/stats/caches").get_json()["exports"]
+
+    def test_unchanged_export_served_from_disk(self):
+        url = "/admin/excel/marksheet?division=A"
+        first = self.get(url)
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers["ETag"]
+        self.assertTrue(first.headers["Last-Modified"])
+
+        with QueryCounter(db.engine) as counter:
+            second = self.get(url)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second.headers["ETag"], etag)
+        self.assertEqual(second.headers["Content-Disposition"], "attachment; filename=marksheet_div_A.xlsx")
+        # version lookups only: no students, marks or results queries
+        self.assertLessEqual(counter.count, 2)
+
+        self.assertEqual(self.get(url, **{"If-None-Match": etag}).status_code, 304)
+
+        stats = self.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (2, 1, 1))
+        self.assertEqual(stats["bytes_saved"], 2 * len(first.data))
+        self.assertEqual(stats["hit_rate"], 0.6667)
+
+    def test_data_changes_replace_the_cached_file(self):
+        url = "/admin/excel/complete?division=A"
+        first = self.get(url)
+        mark = db.session.get(Mark, self.mark_id)
+        mark.annual = 90.0
+        bump_data_version("A")
+        db.session.commit()
+
+        second = self.get(url)
+        self.assertNotEqual(second.headers["ETag"], first.headers["ETag"])
+        self.assertEqual(self.get(url, **{"If-None-Match": first.headers["ETag"]}).status_code, 200)
+        # the older version's entry was dropped
+        self.assertEqual(self.stats()["entries"], 1)
+        self.assertEqual(len(os.listdir(export_cache.directory)), 1)
+
+        # per-student exports are not cached
+        self.get("/admin/excel/complete?division=A&roll_no=1")
+        self.assertEqual(self.stats()["entries"], 1)
+
+    def test_lru_eviction(self):
+        cache = ArtifactCache()
+        cache.root = self.cache_dir.name
+        cache.max_bytes = 25
+        for key in ("a", "b"):
+            cache.store(("x", key, 1), io.BytesIO(key.encode() * 10))[1].close()
+        cache.open(("x", "a", 1))[1].close()
+        cache.store(("x", "c", 1), io.BytesIO(b"c" * 10))[1].close()
+
+        self.assertIsNone(cache.open(("x", "b", 1)))
+        cache.open(("x", "a", 1))[1].close()
+        stats = cache.stats()
+        self.assertEqual((stats["entries"], stats["bytes"], stats["evictions"]), (2, 20, 1))
+
+    def test_startup_keeps_other_live_processes_files(self):
+        dead = subprocess.Popen([sys.executable, "-c", "pass"])
+        dead.wait()
+        for pid in (os.getppid(), dead.pid):
+            os.makedirs(os.path.join(self.cache_dir.name, f"p{pid}"))
+            with open(os.path.join(self.cache_dir.name, f"p{pid}", "a" * 64), "wb") as fh:
+                fh.write(b"x")
+
+        # a restarted worker only purges its own directory and those of exited processes
+        ArtifactCache().init_app(self.app)
+        self.assertTrue(os.path.exists(os.path.join(self.cache_dir.name, f"p{os.getppid()}", "a" * 64)))
+        self.assertFalse(os.path.exists(os.path.join(self.cache_dir.name, f"p{dead.pid}")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+# backend/tests/test_auth_cache.py
+"""Unit tests for the token / principal cache used by token_required"""
+import os
+import tempfile
+import unittest
+from app import create_app, db
+from auth import generate_token, auth_cache_stats
+from tests.helpers import AppTestCase, QueryCounter, add_admin, add_subject, add_teacher, allocate, auth_headers
+
+
+class AuthCacheTestCase(AppTestCase):
+    """Test cached principals and their invalidation"""
+
+    def setUp(self):
+        super().setUp()
+        eng = add_subject("ENG", "English")
+        admin = add_admin()
+        teacher = add_teacher("T", "t")
+        allocate(teacher, eng, "A")
+        db.session.commit()
+        self.teacher_id = teacher.teacher_id
+        self.admin_headers = auth_headers(admin.admin_id, "ADMIN")
+        self.teacher_headers = auth_headers(teacher.teacher_id, "TEACHER")
+
+    @staticmethod
+    def dispose_engine(app):
+        with app.app_context():
+            db.engine.dispose()
+
+    def get(self, url, headers):
+        db.session.expunge_all()
+        with QueryCounter(db.engine) as counter:
+            response = self.client.get(url, headers=headers)
+        return response, counter.count
+
+    def test_repeat_requests_skip_user_lookup(self):
+        first, first_queries = self.get("/admin/divisions", self.admin_headers)
+        second, second_queries = self.get("/admin/divisions", self.admin_headers)
+        self.assertEqual((first.status_code, second.status_code), (200, 200))
+        self.assertEqual(second_queries, first_queries - 1)
+
+        stats = auth_cache_stats()
+        self.assertEqual(stats["principals"]["hits"], 1)
+        self.assertEqual(stats["tokens"]["hits"], 1)
+        self.assertEqual(stats["principals"]["entries"], 1)
+
+    def test_deactivation_takes_effect_immediately(self):
+        self.assertEqual(self.get("/teacher/divisions", self.teacher_headers)[0].status_code, 200)
+
+        response = self.client.put(
+            f"/admin/teachers/{self.teacher_id}", json={"active": False}, headers=self.admin_headers
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get("/teacher/divisions", self.teacher_headers)[0].status_code, 401)
+
+    def test_deleted_teacher_is_rejected(self):
+        self.assertEqual(self.get("/teacher/divisions", self.teacher_headers)[0].status_code, 200)
+        self.client.delete(f"/admin/teachers/{self.teacher_id}", headers=self.admin_headers)
+        self.assertEqual(self.get("/teacher/divisions", self.teacher_headers)[0].status_code, 401)
+
+    def test_invalidation_reaches_other_processes(self):
+        # two apps with their own caches on one database stand in for two worker processes
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        config = {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(tmp.name, 'shared.db')}",
+            "TESTING": True,
+            "RESULT_RECOMPUTE_ASYNC": False,
+            "AUTH_INVALIDATION_FILE": os.path.join(tmp.name, "auth_invalidation"),
+        }
+        worker_a, worker_b = create_app(config), create_app(config)
+        with worker_a.app_context():
+            db.create_all()
+            admin = add_admin()
+            teacher = add_teacher("T", "t")
+            db.session.commit()
+            admin_headers = auth_headers(admin.admin_id, "ADMIN")
+            teacher_headers = auth_headers(teacher.teacher_id, "TEACHER")
+            teacher_id = teacher.teacher_id
+        for app in (worker_a, worker_b):
+            self.addCleanup(self.dispose_engine, app)
+
+        client_a, client_b = worker_a.test_client(), worker_b.test_client()
+        self.assertEqual(client_a.get("/teacher/divisions", headers=teacher_headers).status_code, 200)
+
+        response = client_b.put(f"/admin/teachers/{teacher_id}", json={"active": False}, headers=admin_headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(client_a.get("/teacher/divisions", headers=teacher_headers).status_code, 401)
+
+    def test_invalid_tokens(self):
+        bad = self.client.get("/teacher/divisions", headers={"Authorization": "Bearer not-a-token"})
+        self.assertEqual(bad.status_code, 401)
+        self.assertEqual(bad.get_json(), {"error": "Invalid token"})
+        expired = generate_token(self.teacher_id, "TEACHER", expires_hours=-1)
+        response = self.client.get("/teacher/divisions", headers={"Authorization": f"Bearer {expired}"})
+        self.assertEqual(response.get_json(), {"error": "Token expired"})
+
+
+if __name__ == "__main__":
+    unittest.main()
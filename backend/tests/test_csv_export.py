@@ -0,0 +1,68 @@
+# backend/tests/test_csv_export.py
+"""Unit tests for the streamed CSV exports"""
+import csv
+import io
+import unittest
+
+from app import db
+from csv_utils import iter_csv
+from tests.helpers import AppTestCase, add_admin, add_mark, add_student, add_subject, add_teacher, allocate, auth_headers
+
+
+class CsvExportTestCase(AppTestCase):
+    """Test /admin/csv/results and /admin/csv/complete"""
+
+    def setUp(self):
+        super().setUp()
+        eng = add_subject("ENG", "English")
+        add_subject("HINDI", "Hindi", "OPTIONAL")
+        teacher = add_teacher("T", "t")
+        admin = add_admin()
+        for division in ("A", "B"):
+            allocate(teacher, eng, division)
+
+        for division, roll, optional in (("B", "01", None), ("A", "02", "HINDI"), ("A", "01", None)):
+            add_student(roll, division, f"Student {division}{roll}", optional_subject=optional)
+            add_mark(roll, eng, division, unit1=20, term=40, unit2=20, annual=60, entered_by=teacher.teacher_id)
+        db.session.commit()
+        self.headers = auth_headers(admin.admin_id, "ADMIN")
+
+    def get_csv(self, url):
+        response = self.client.get(url, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.mimetype, "text/csv")
+        return response, list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+
+    def test_iter_csv_yields_header_then_chunks(self):
+        chunks = list(iter_csv(["a", "b"], [{"a": 1, "b": 2}, [3, 4], {"a": 5}], chunk_rows=2))
+        self.assertEqual(chunks, [b"a,b\r\n", b"1,2\r\n3,4\r\n", b"5,\r\n"])
+
+    def test_complete_csv_for_one_division(self):
+        response, rows = self.get_csv("/admin/csv/complete?division=A")
+        self.assertEqual(response.headers["Content-Disposition"], "attachment; filename=complete_marks_A.csv")
+        self.assertEqual(rows[0][:4], ["Roll", "Student Name", "Subject", "Division"])
+        self.assertEqual(rows[1:], [
+            ["01", "Student A01", "ENG", "A", "20.0", "40.0", "20.0", "60.0", "0.0", "T"],
+            ["02", "Student A02", "ENG", "A", "20.0", "40.0", "20.0", "60.0", "0.0", "T"],
+            # optional subject without marks yet
+            ["02", "Student A02", "HINDI", "A", "", "", "", "", "", ""],
+        ])
+
+    def test_complete_csv_for_whole_college(self):
+        _, rows = self.get_csv("/admin/csv/complete")
+        self.assertEqual([(r[3], r[0], r[2]) for r in rows[1:]],
+                         [("A", "01", "ENG"), ("A", "02", "ENG"), ("A", "02", "HINDI"), ("B", "01", "ENG")])
+
+    def test_results_csv_recomputes_and_streams(self):
+        response, rows = self.get_csv("/admin/csv/results")
+        self.assertEqual(response.headers["Content-Disposition"], "attachment; filename=results_all.csv")
+        self.assertEqual(rows[0][:3], ["roll_no", "name", "division"])
+        self.assertEqual([(r[2], r[0]) for r in rows[1:]], [("A", "01"), ("B", "01")])
+
+        _, rows = self.get_csv("/admin/csv/results?division=B")
+        self.assertEqual([(r[2], r[0]) for r in rows[1:]], [("B", "01")])
+
+
+if __name__ == '__main__':
+    unittest.main()
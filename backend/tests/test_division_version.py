@@ -0,0 +1,115 @@
+# backend/tests/test_division_version.py
+"""Unit tests for per-division data versions and read-side staleness checks"""
+import unittest
+from unittest import mock
+from sqlalchemy import event
+from app import db
+from models import Mark, Result
+from services.division_version import bump_data_version, get_versions, results_are_current
+from services import result_service
+from services.result_service import generate_results_for_division, ensure_results_current
+from tests.helpers import AppTestCase, add_mark, add_student, add_subject, add_teacher, allocate, auth_headers
+
+
+class DivisionVersionTestCase(AppTestCase):
+    """Test version bumps, recording and the read path"""
+
+    def setUp(self):
+        super().setUp()
+        self.eng = add_subject("ENG", "English")
+        teacher = add_teacher("T", "t")
+        allocate(teacher, self.eng, "A")
+        for roll in ("01", "02"):
+            add_student(roll)
+            add_mark(roll, self.eng, annual=55.0)
+        db.session.commit()
+        self.headers = auth_headers(teacher.teacher_id, "TEACHER")
+
+    def test_bump_and_record(self):
+        self.assertEqual(get_versions("A"), (0, None))
+        self.assertFalse(results_are_current("A"))
+
+        generate_results_for_division("A")
+        self.assertEqual(get_versions("A"), (0, 0))
+        self.assertTrue(results_are_current("A"))
+
+        bump_data_version("A", "A", None)
+        db.session.commit()
+        self.assertEqual(get_versions("A"), (1, 0))
+        self.assertFalse(results_are_current("A"))
+
+        self.assertTrue(ensure_results_current("A"))
+        self.assertFalse(ensure_results_current("A"))
+        self.assertEqual(get_versions("A"), (1, 1))
+
+    def test_complete_table_read_does_not_write_when_current(self):
+        headers = self.headers
+        first = self.client.get("/teacher/complete-table?division=A", headers=headers)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(Result.query.filter_by(division="A").count(), 2)
+
+        writes = []
+
+        def on_execute(conn, cursor, statement, *args):
+            if not statement.lstrip().upper().startswith("SELECT"):
+                writes.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", on_execute)
+        try:
+            second = self.client.get("/teacher/complete-table?division=A", headers=headers)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", on_execute)
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.get_json(), first.get_json())
+        self.assertEqual(writes, [])
+
+    def test_mark_update_recomputes_and_records_version(self):
+        ensure_results_current("A")
+        mark = Mark.query.filter_by(roll_no="01").first()
+        response = self.client.put(
+            f"/teacher/marks/{mark.mark_id}",
+            json={"unit1": 10, "unit2": 10, "term": 20, "annual": 90},
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 200)
+        # the queued recompute brought the division up to date and recorded the version
+        self.assertEqual(get_versions("A"), (1, 1))
+        self.assertEqual(Result.query.filter_by(roll_no="01").one().percentage, 90.0)
+
+    def test_mark_write_then_reads_recompute_once(self):
+        ensure_results_current("A")
+        headers = self.headers
+        mark = Mark.query.filter_by(roll_no="02").first()
+        with mock.patch.object(result_service, "_recompute", wraps=result_service._recompute) as recompute:
+            response = self.client.put(
+                f"/teacher/marks/{mark.mark_id}",
+                json={"unit1": 10, "unit2": 10, "term": 20, "annual": 70},
+                headers=headers,
+            )
+            self.assertEqual(response.status_code, 200)
+            for _ in range(2):
+                self.assertEqual(self.client.get("/teacher/complete-table?division=A", headers=headers).status_code, 200)
+        # one recompute, of the edited student only
+        recompute.assert_called_once_with("A", ["02"], 1)
+
+    def test_student_recompute_falls_back_to_division_for_other_changes(self):
+        ensure_results_current("A")
+        # a change the queue was not told about (e.g. made by another process)
+        Mark.query.filter_by(roll_no="01").first().annual = 80.0
+        bump_data_version("A")
+        db.session.commit()
+        mark = Mark.query.filter_by(roll_no="02").first()
+        with mock.patch.object(result_service, "_recompute", wraps=result_service._recompute) as recompute:
+            self.client.put(
+                f"/teacher/marks/{mark.mark_id}",
+                json={"unit1": 10, "unit2": 10, "term": 20, "annual": 70},
+                headers=self.headers,
+            )
+        recompute.assert_called_once_with("A")
+        self.assertEqual(get_versions("A"), (2, 2))
+        self.assertEqual(Result.query.filter_by(roll_no="01").one().percentage, 80.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+# backend/tests/test_excel_export.py
+"""Unit tests for the admin Excel exports"""
+import io
+import unittest
+
+import openpyxl
+
+from app import db
+from models import Subject, Teacher
+from tests.helpers import AppTestCase, QueryCounter, add_admin, add_mark, add_student, add_subject, add_teacher, auth_headers
+
+
+class ExcelExportTestCase(AppTestCase):
+    """Test the workbooks produced by /admin/excel/*"""
+
+    def app_config(self):
+        # exercise the builders; caching is covered in test_artifact_cache
+        return {"EXPORT_CACHE_MAX_BYTES": 0}
+
+    def setUp(self):
+        super().setUp()
+        subjects = [add_subject("ENG", "English"), add_subject("BK", "Book Keeping"), add_subject("MATHS", "Maths", "OPTIONAL")]
+        teacher = add_teacher("Teacher One", "t1")
+        admin = add_admin()
+        db.session.flush()
+        for roll, optional in (("1", "MATHS"), ("2", None)):
+            add_student(roll, optional_subject_2=optional)
+        for roll, sub, annual in (("1", subjects[0], 60), ("1", subjects[2], 70), ("2", subjects[1], 40)):
+            add_mark(roll, sub, unit1=20, term=40, unit2=20, annual=annual, grace=0,
+                     tot=80 + annual, sub_avg=(80 + annual) / 2, entered_by=teacher.teacher_id)
+        db.session.commit()
+        self.headers = auth_headers(admin.admin_id, "ADMIN")
+
+    def download(self, url):
+        response = self.client.get(url, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+        self.assertEqual(response.content_length, len(response.data))
+        return openpyxl.load_workbook(io.BytesIO(response.data)).active
+
+    def test_division_export(self):
+        ws = self.download("/admin/excel/division?division=A")
+        self.assertEqual(ws.title, "Marks")
+        self.assertTrue(ws["A1"].font.bold)
+        self.assertEqual(ws["A1"].style, "export_header")
+        rows = list(ws.iter_rows(min_row=2, values_only=True))
+        self.assertEqual(
+            [(r[0], r[2], r[7], r[9]) for r in rows],
+            [("1", "BK", None, None), ("1", "ENG", 60, "Teacher One"), ("1", "MATHS", 70, "Teacher One"),
+             ("2", "BK", 40, "Teacher One"), ("2", "ENG", None, None)],
+        )
+
+    def test_complete_and_student_exports(self):
+        ws = self.download("/admin/excel/complete?division=A")
+        self.assertEqual(ws.title, "Complete Results")
+        self.assertEqual(len(list(ws.iter_rows(min_row=2))), 5)
+
+        ws = self.download("/admin/excel/student?roll_no=1&division=A")
+        rows = list(ws.iter_rows(min_row=2, values_only=True))
+        self.assertEqual([(r[2], r[11], r[12]) for r in rows], [("BK", None, None), ("ENG", 70, "Teacher One"), ("MATHS", 75, "Teacher One")])
+
+    def test_marksheet_layout(self):
+        ws = self.download("/admin/excel/marksheet?division=A")
+        self.assertEqual(ws.title, "Marksheet")
+        merged = {str(r) for r in ws.merged_cells.ranges}
+        self.assertTrue({"A1:AP1", "A2:AP2", "A4:A5", "B4:B5", "C4:J4", "AI4:AP4"} <= merged)
+        self.assertEqual(ws["A1"].value, "SIES COLLEGE OF COMMERCE, NERUL")
+        self.assertTrue(ws["A1"].font.bold)
+        self.assertEqual(ws["AP3"].alignment.horizontal, "right")
+        self.assertEqual((ws["C4"].value, ws["C5"].value, ws["J5"].value), ("ENGLISH", "UNIT I", "GRACE"))
+        self.assertEqual((ws["C6"].value, ws["H6"].value), (25, 200))
+
+        # student 1: ENG block then SP / MATHS block from their optional subject
+        self.assertEqual((ws["A7"].value, ws["B7"].value, ws["G7"].value, ws["H7"].value), ("1", "Student 1", 60, 140))
+        self.assertEqual(ws["W7"].value, 70)
+        self.assertEqual(ws["G7"].alignment.horizontal, "center")
+        self.assertEqual((ws["A8"].value, ws["AM8"].value), ("2", 40))
+
+    def test_export_queries_do_not_grow_with_students(self):
+        urls = ("/admin/excel/division?division=A", "/admin/excel/complete?division=A", "/admin/excel/marksheet?division=A")
+        for url in urls:
+            self.client.get(url, headers=self.headers)
+
+        def count_queries():
+            counts = []
+            for url in urls:
+                with QueryCounter(db.engine) as counter:
+                    self.assertEqual(self.client.get(url, headers=self.headers).status_code, 200)
+                counts.append(counter.count)
+            return counts
+
+        before = count_queries()
+        teacher_id = Teacher.query.one().teacher_id
+        eng = Subject.query.filter_by(subject_code="ENG").one()
+        for i in range(3, 23):
+            add_student(str(i))
+            add_mark(str(i), eng, annual=50, entered_by=teacher_id)
+        db.session.commit()
+        # first requests after the write recompute results; count the steady state
+        for url in urls:
+            self.client.get(url, headers=self.headers)
+        self.assertEqual(count_queries(), before)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+# backend/tests/test_http_cache.py
+"""Unit tests for ETag / conditional GET on result and master data views"""
+import unittest
+from app import db
+from models import Subject
+from tests.helpers import (
+    AppTestCase, QueryCounter, add_admin, add_mark, add_student, add_subject, add_teacher, allocate, auth_headers,
+)
+
+
+class ConditionalGetTestCase(AppTestCase):
+    """Test 304 responses and ETag invalidation"""
+
+    def setUp(self):
+        super().setUp()
+        eng = add_subject("ENG", "English")
+        teacher = add_teacher("T", "t")
+        admin = add_admin()
+        allocate(teacher, eng, "A")
+        add_student("01")
+        m = add_mark("01", eng, annual=55.0)
+        db.session.commit()
+        self.mark_id = m.mark_id
+        self.teacher_headers = auth_headers(teacher.teacher_id, "TEACHER")
+        self.admin_headers = auth_headers(admin.admin_id, "ADMIN")
+
+    def revalidate(self, url, headers, etag):
+        return self.client.get(url, headers={**headers, "If-None-Match": etag})
+
+    def test_complete_table_not_modified_until_marks_change(self):
+        url = "/teacher/complete-table?division=A"
+        first = self.client.get(url, headers=self.teacher_headers)
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers["ETag"]
+
+        with QueryCounter(db.engine) as counter:
+            second = self.revalidate(url, self.teacher_headers, etag)
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.data, b"")
+        # auth, allocation check and the version lookup only
+        self.assertLessEqual(counter.count, 3)
+
+        self.client.put(
+            f"/teacher/marks/{self.mark_id}",
+            json={"unit1": 10, "unit2": 10, "term": 20, "annual": 90},
+            headers=self.teacher_headers,
+        )
+        third = self.revalidate(url, self.teacher_headers, etag)
+        self.assertEqual(third.status_code, 200)
+        self.assertNotEqual(third.headers["ETag"], etag)
+
+    def test_admin_results_and_students(self):
+        for url in ("/admin/results?division=A", "/admin/students?division=A"):
+            first = self.client.get(url, headers=self.admin_headers)
+            self.assertEqual(first.status_code, 200)
+            again = self.revalidate(url, self.admin_headers, first.headers["ETag"])
+            self.assertEqual(again.status_code, 304)
+
+        results_etag = self.client.get("/admin/results?division=A", headers=self.admin_headers).headers["ETag"]
+        students_etag = self.client.get("/admin/students?division=A", headers=self.admin_headers).headers["ETag"]
+        self.assertNotEqual(results_etag, students_etag)
+
+        self.client.post(
+            "/admin/students",
+            json={"roll_no": "02", "name": "Student 02", "division": "A"},
+            headers=self.admin_headers,
+        )
+        for url, etag in (("/admin/results?division=A", results_etag), ("/admin/students?division=A", students_etag)):
+            self.assertEqual(self.revalidate(url, self.admin_headers, etag).status_code, 200)
+
+    def test_subjects_cache_headers(self):
+        first = self.client.get("/subjects")
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("max-age=", first.headers["Cache-Control"])
+        self.assertEqual(self.client.get("/subjects", headers={"If-None-Match": first.headers["ETag"]}).status_code, 304)
+
+        subject = Subject.query.first()
+        subject.active = False
+        db.session.commit()
+        changed = self.client.get("/subjects", headers={"If-None-Match": first.headers["ETag"]})
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.get_json(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+# backend/tests/test_mark_service.py
+"""Unit tests for bulk mark upserts"""
+import unittest
+from unittest import mock
+from app import db
+from auth import generate_token
+from models import Mark
+from services.mark_service import bulk_upsert_marks
+from services.recompute_queue import recompute_queue
+from tests.helpers import AppTestCase, QueryCounter, add_student, add_subject, add_teacher, allocate
+
+
+def entry(roll, annual, subject_id=1, division="A"):
+    return {"roll_no": roll, "division": division, "subject_id": subject_id,
+            "unit1": 10, "unit2": 10, "term": 20, "annual": annual, "grace": 0}
+
+
+class MarkServiceTestCase(AppTestCase):
+    """Test bulk_upsert_marks and the batch endpoint built on it"""
+
+    def setUp(self):
+        super().setUp()
+        eng = add_subject("ENG", "English")
+        self.t1 = add_teacher("One", "one")
+        self.t2 = add_teacher("Two", "two")
+        for teacher in (self.t1, self.t2):
+            allocate(teacher, eng, "A")
+        for i in range(1, 41):
+            add_student(str(i))
+        db.session.commit()
+        self.t1_id, self.t2_id = self.t1.teacher_id, self.t2.teacher_id
+
+    def test_inserts_then_updates(self):
+        self.assertEqual(bulk_upsert_marks([entry("1", 40), entry("2", 50)], entered_by=self.t1_id), (2, 0))
+        db.session.commit()
+
+        inserted, updated = bulk_upsert_marks([entry("2", 90), entry("3", 60), entry("3", 70)], entered_by=self.t2_id)
+        db.session.commit()
+        self.assertEqual((inserted, updated), (1, 1))
+
+        second = Mark.query.filter_by(roll_no="2").one()
+        self.assertEqual((second.annual, second.tot, second.sub_avg), (90, 130, 65.0))
+        # entered_by is kept from the first entry
+        self.assertEqual(second.entered_by, self.t1_id)
+        # repeated keys: last one wins
+        self.assertEqual(Mark.query.filter_by(roll_no="3").one().annual, 70)
+        self.assertEqual(Mark.query.count(), 3)
+
+    def test_batch_endpoint_reports_counts_with_constant_queries(self):
+        headers = {"Authorization": f"Bearer {generate_token(self.t1_id, 'TEACHER')}"}
+        self.client.get("/teacher/divisions", headers=headers)
+
+        counts = []
+        for n in (3, 40):
+            # count the write path only, not the (inline in tests) result recompute
+            with mock.patch.object(recompute_queue, "schedule_student"), QueryCounter(db.engine) as counter:
+                response = self.client.post(
+                    "/teacher/marks/batch",
+                    json={"entries": [entry(str(i), 50) for i in range(1, n + 1)]},
+                    headers=headers,
+                )
+            self.assertEqual(response.status_code, 200)
+            counts.append(counter.count)
+
+        body = response.get_json()
+        self.assertEqual((body["inserted"], body["updated"]), (37, 3))
+        self.assertEqual(counts[0], counts[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
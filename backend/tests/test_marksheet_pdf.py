@@ -0,0 +1,119 @@
+# backend/tests/test_marksheet_pdf.py
+"""Unit tests for single and division-wide PDF marksheets"""
+import io
+import re
+import unittest
+import zipfile
+from unittest import mock
+
+from reportlab import rl_config
+
+from app import db
+from services import marksheet_pdf
+from tests.helpers import AppTestCase, add_admin, add_mark, add_student, add_subject, add_teacher, allocate, auth_headers
+
+
+def page_count(pdf):
+    return len(re.findall(rb"/Type /Page\b", pdf))
+
+
+class MarksheetPdfTestCase(AppTestCase):
+    """Test /admin/students/<roll>/pdf and /admin/results/pdf"""
+
+    def app_config(self):
+        return {"PDF_RENDER_WORKERS": 1}
+
+    def setUp(self):
+        super().setUp()
+        eng = add_subject("ENG", "English")
+        allocate(add_teacher("T", "t"), eng, "A")
+        admin = add_admin()
+        for roll in ("03", "01", "02"):
+            add_student(roll)
+            add_mark(roll, eng, unit1=20, term=40, unit2=20, annual=60)
+        db.session.commit()
+        self.headers = auth_headers(admin.admin_id, "ADMIN")
+
+    def get(self, url):
+        return self.client.get(url, headers=self.headers)
+
+    def test_single_student_pdf(self):
+        response = self.get("/admin/students/01/pdf?division=A")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "application/pdf")
+        self.assertEqual(page_count(response.data), 1)
+        self.assertEqual(self.get("/admin/students/99/pdf?division=A").status_code, 404)
+
+    def test_division_multi_page_pdf(self):
+        response = self.get("/admin/results/pdf?division=A")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["Content-Disposition"], "attachment; filename=marksheets_div_A.pdf")
+        self.assertEqual(page_count(response.data), 3)
+
+        self.assertEqual(self.get("/admin/results/pdf?division=Z").status_code, 404)
+        self.assertEqual(self.get("/admin/results/pdf?division=A&format=doc").status_code, 400)
+
+    def test_division_zip_in_roll_order(self):
+        response = self.get("/admin/results/pdf?division=A&format=zip")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "application/zip")
+        with zipfile.ZipFile(io.BytesIO(response.data)) as zf:
+            self.assertEqual(zf.namelist(), ["01_marksheet.pdf", "02_marksheet.pdf", "03_marksheet.pdf"])
+            pdf = zf.read("02_marksheet.pdf")
+        self.assertTrue(pdf.startswith(b"%PDF"))
+        self.assertEqual(page_count(pdf), 1)
+
+    def test_static_frame_is_one_shared_form(self):
+        datas = [
+            {"roll_no": str(i), "name": f"S{i}", "division": "A", "subjects": [("ENG", 60, 0)], "percentage": 60}
+            for i in range(5)
+        ]
+        combined = marksheet_pdf.render_combined(datas)
+        self.assertEqual(page_count(combined), 5)
+        self.assertEqual(combined.count(b"/Subtype /Form"), 1)
+        # a one-page document draws the frame inline
+        self.assertNotIn(b"/Subtype /Form", marksheet_pdf.render_marksheet(datas[0]))
+
+    def test_single_pages_copy_the_frame_rendered_once(self):
+        marksheet_pdf._frame_code.cache_clear()
+        datas = [
+            {"roll_no": str(i), "name": f"S{i}", "division": "A", "subjects": [("ENG", 60, 0)], "percentage": 60}
+            for i in range(3)
+        ]
+        pdfs = [marksheet_pdf.render_marksheet(data) for data in datas]
+        self.assertEqual([page_count(pdf) for pdf in pdfs], [1, 1, 1])
+        info = marksheet_pdf._frame_code.cache_info()
+        self.assertEqual((info.misses, info.hits), (1, 2))
+
+    def test_process_pool_matches_serial_rendering(self):
+        datas = [
+            {"roll_no": str(i), "name": f"S{i}", "division": "A", "subjects": [("ENG", 50 + i, 1)], "percentage": 50 + i}
+            for i in range(4)
+        ]
+        with mock.patch.object(marksheet_pdf, "POOL_MIN_PAGES", 1):
+            pooled = list(marksheet_pdf.render_each(datas, workers=2))
+        serial = list(marksheet_pdf.render_each(datas, workers=1))
+        self.assertEqual([name for name, _ in pooled], [name for name, _ in serial])
+        self.assertEqual([page_count(pdf) for _, pdf in pooled], [1, 1, 1, 1])
+
+    def test_combined_pdf_pages_render_in_the_pool(self):
+        datas = [
+            {"roll_no": str(i), "name": f"S{i}", "division": "A", "subjects": [("ENG", 50 + i, 1)], "percentage": 50 + i}
+            for i in range(4)
+        ]
+        # no timestamps or random ids, so documents compare byte for byte
+        with mock.patch.object(rl_config, "invariant", 1):
+            with mock.patch.object(marksheet_pdf, "POOL_MIN_PAGES", 1), \
+                    mock.patch.object(marksheet_pdf, "_get_pool", wraps=marksheet_pdf._get_pool) as get_pool:
+                pooled = marksheet_pdf.render_combined(datas, workers=2)
+            serial = marksheet_pdf.render_combined(datas, workers=1)
+        get_pool.assert_called_once_with(2)
+        self.assertEqual(pooled, serial)
+        self.assertEqual(page_count(pooled), 4)
+
+        marksheet_pdf._shutdown_pool()
+        self.assertIsNone(marksheet_pdf._pool)
+
+
+if __name__ == '__main__':
+    unittest.main()
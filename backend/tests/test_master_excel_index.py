@@ -0,0 +1,62 @@
+# backend/tests/test_master_excel_index.py
+"""Unit tests for the cached master Excel index"""
+import os
+import shutil
+import tempfile
+import unittest
+import openpyxl
+from services.master_excel_index import MasterExcelIndex, ExcelMark
+
+
+class MasterExcelIndexTestCase(unittest.TestCase):
+    """Test lookups and mtime/size based invalidation"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "master.xlsx")
+        self.index = MasterExcelIndex(self.path, "Marks")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def write(self, rows, mtime=None):
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.title = "Marks"
+        ws.append(["Roll_No", "Division", "Subject", "Unit1", "Unit2", "Term", "Annual", "Grace"])
+        for row in rows:
+            ws.append(row)
+        wb.save(self.path)
+        if mtime is not None:
+            os.utime(self.path, (mtime, mtime))
+
+    def test_lookup_is_built_once(self):
+        self.write([
+            [1, "A", "ENG", 10, 12, "30", 55, None],
+            [1, "A", "ECO", 5, 5, 5, 5, 0],
+            ["2", "B", "ENG", None, None, None, 70, 2],
+        ])
+        self.assertEqual(self.index.lookup("1", "A"), ExcelMark("ENG", 10.0, 12.0, 30.0, 55.0, None))
+        self.assertEqual(self.index.lookup("2").annual, 70.0)
+        self.assertIsNone(self.index.lookup("2", "A"))
+        self.assertIsNone(self.index.lookup("3"))
+
+        stats = self.index.stats()
+        self.assertEqual((stats["entries"], stats["builds"]), (2, 1))
+        self.assertIsNotNone(stats["build_ms"])
+
+    def test_rebuilds_when_file_changes(self):
+        self.write([[1, "A", "ENG", 1, 1, 1, 40, 0]], mtime=1_000_000)
+        self.assertEqual(self.index.lookup("1", "A").annual, 40.0)
+
+        self.write([[1, "A", "ENG", 1, 1, 1, 80, 0], [2, "A", "ENG", 1, 1, 1, 60, 0]], mtime=1_000_100)
+        self.assertEqual(self.index.lookup("1", "A").annual, 80.0)
+        self.assertEqual(self.index.stats()["builds"], 2)
+
+        os.remove(self.path)
+        self.assertIsNone(self.index.lookup("1", "A"))
+        self.assertFalse(self.index.stats()["exists"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+# backend/tests/test_pagination.py
+"""Unit tests for keyset pagination and prefix search on list endpoints"""
+import base64
+import json
+import unittest
+from app import db
+from tests.helpers import AppTestCase, QueryCounter, add_admin, add_student, add_subject, add_teacher, allocate, auth_headers
+
+
+def raw_cursor(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+
+class KeysetPaginationTestCase(AppTestCase):
+    """Test cursor pages on students, teachers and results"""
+
+    def setUp(self):
+        super().setUp()
+        eng = add_subject("ENG", "English")
+        admin = add_admin()
+        teachers = []
+        for i in range(1, 26):
+            add_student(f"{i:03d}", name="Asha" if i % 5 == 0 else f"Student {i}")
+            teachers.append(add_teacher(f"Teacher {i:02d}", f"t{i:02d}"))
+        allocate(teachers[0], eng, "A")
+        db.session.commit()
+        self.headers = auth_headers(admin.admin_id, "ADMIN")
+        self.teacher_headers = auth_headers(teachers[0].teacher_id, "TEACHER")
+
+    def walk(self, url, headers, key):
+        """Follow X-Next-Cursor until exhausted; return the keys of every page."""
+        pages = []
+        cursor = None
+        while True:
+            full = f"{url}&cursor={cursor}" if cursor else url
+            response = self.client.get(full, headers=headers)
+            self.assertEqual(response.status_code, 200)
+            pages.append([row[key] for row in response.get_json()])
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                return pages
+
+    def test_student_pages_cover_division_in_order(self):
+        full = self.client.get("/admin/students?division=A", headers=self.headers)
+        self.assertNotIn("X-Next-Cursor", full.headers)
+        all_rolls = [row["roll_no"] for row in full.get_json()]
+        self.assertEqual(len(all_rolls), 25)
+
+        pages = self.walk("/admin/students?division=A&limit=10", self.headers, "roll_no")
+        self.assertEqual([len(p) for p in pages], [10, 10, 5])
+        self.assertEqual(sum(pages, []), all_rolls)
+
+        teacher_pages = self.walk("/teacher/students-by-division?division=A&limit=20", self.teacher_headers, "roll_no")
+        self.assertEqual(sum(teacher_pages, []), all_rolls)
+
+    def test_search_is_a_prefix_match(self):
+        by_name = self.client.get("/admin/students?division=A&search=Ash", headers=self.headers).get_json()
+        self.assertEqual([r["roll_no"] for r in by_name], ["005", "010", "015", "020", "025"])
+        by_roll = self.client.get("/admin/students?division=A&search=01", headers=self.headers).get_json()
+        self.assertEqual(len(by_roll), 10)
+        # LIKE wildcards are taken literally
+        self.assertEqual(self.client.get("/admin/students?division=A&search=%25", headers=self.headers).get_json(), [])
+
+        pages = self.walk("/admin/teachers?search=Teacher%201&limit=4", self.headers, "userid")
+        self.assertEqual(sum(pages, []), [f"t{i}" for i in range(10, 20)])
+
+    def test_result_pages_keep_sequence_numbers(self):
+        url = "/admin/results?division=A&limit=10"
+        first = self.client.get(url, headers=self.headers)
+        second = self.client.get(f"{url}&cursor={first.headers['X-Next-Cursor']}", headers=self.headers)
+        self.assertEqual([r["seq"] for r in second.get_json()], list(range(11, 21)))
+        self.assertEqual(second.get_json()[0]["roll_no"], "011")
+
+    def test_result_page_cost_does_not_grow_with_position(self):
+        url = "/admin/results?division=A&limit=5"
+        cursors = [None]
+        for _ in range(4):
+            full = f"{url}&cursor={cursors[-1]}" if cursors[-1] else url
+            cursors.append(self.client.get(full, headers=self.headers).headers["X-Next-Cursor"])
+
+        counts = []
+        for cursor in (cursors[1], cursors[4]):
+            db.session.expunge_all()
+            with QueryCounter(db.engine) as counter:
+                response = self.client.get(f"{url}&cursor={cursor}", headers=self.headers)
+            counts.append(counter.count)
+            # the offset comes from the cursor: nothing counts the rows before the page
+            self.assertFalse([s for s in counter.statements if "count(" in s.lower()])
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual([r["seq"] for r in response.get_json()], list(range(21, 26)))
+
+    def test_invalid_parameters(self):
+        bad_cursor = self.client.get("/admin/students?division=A&cursor=***", headers=self.headers)
+        self.assertEqual(bad_cursor.status_code, 400)
+        # well-formed JSON of the wrong shape or type never reaches the filter
+        for value in ({"a": 1}, "005", ["005"], [["005"], 0], ["005", -1], ["005", "3"], [True, 0], [None, 0]):
+            response = self.client.get(f"/admin/results?division=A&limit=5&cursor={raw_cursor(value)}", headers=self.headers)
+            self.assertEqual(response.status_code, 400, value)
+        wrong_type = self.client.get(f"/admin/teachers?limit=5&cursor={raw_cursor(['t05', 5])}", headers=self.headers)
+        self.assertEqual(wrong_type.status_code, 400)
+        bad_limit = self.client.get("/admin/teachers?limit=0", headers=self.headers)
+        self.assertEqual(bad_limit.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+# backend/tests/test_recompute_queue.py
+"""Unit tests for the background result recomputation queue"""
+import time
+import unittest
+from unittest import mock
+from app import create_app, db
+from services.recompute_queue import RecomputeQueue
+
+
+class RecomputeQueueTestCase(unittest.TestCase):
+    """Test coalescing and job reporting of RecomputeQueue"""
+
+    def setUp(self):
+        self.app = create_app({
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "TESTING": True,
+            "RESULT_RECOMPUTE_DEBOUNCE_SECONDS": 0.05,
+            "RESULT_RECOMPUTE_MAX_DELAY_SECONDS": 1.0,
+        })
+        with self.app.app_context():
+            db.create_all()
+        self.queue = RecomputeQueue()
+        self.queue.init_app(self.app)
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def wait_for_jobs(self, n, timeout=3.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            status = self.queue.status()
+            done = [j for j in status["jobs"] if j["status"] != "running"]
+            if len(done) >= n and not status["pending"]:
+                return status
+            time.sleep(0.02)
+        self.fail("recompute jobs did not finish in time")
+
+    @mock.patch("services.recompute_queue.generate_results_for_students", return_value=2)
+    @mock.patch("services.recompute_queue.generate_results_for_division", return_value=3)
+    def test_burst_is_coalesced_into_one_job(self, by_division, by_students):
+        self.queue.schedule_student("01", "A", 4)
+        self.queue.schedule_student("02", "A", 5)
+        self.queue.schedule_student("01", "A", 6)
+        self.queue.schedule_student("05", "B", 2)
+        self.queue.schedule_division("B")
+
+        status = self.wait_for_jobs(1)
+        self.assertEqual(len(status["jobs"]), 1)
+        job = status["jobs"][0]
+        self.assertEqual(job["status"], "done")
+        self.assertEqual(job["divisions"], {"A": ["01", "02"], "B": "all"})
+        self.assertEqual(job["rows_written"], 5)
+        by_students.assert_called_once_with("A", {"01", "02"}, {4, 5, 6})
+        by_division.assert_called_once_with("B")
+
+    @mock.patch("services.recompute_queue.generate_results_for_division", side_effect=RuntimeError("boom"))
+    def test_failures_are_reported(self, by_division):
+        self.queue.schedule_division("A")
+        job = self.wait_for_jobs(1)["jobs"][0]
+        self.assertEqual(job["status"], "failed")
+        self.assertEqual(job["errors"], [{"division": "A", "error": "boom"}])
+        # callers get snapshots, not the worker's live dicts
+        job["errors"].clear()
+        self.assertEqual(len(self.queue.get_job(job["job_id"])["errors"]), 1)
+
+    @mock.patch("services.recompute_queue.generate_results_for_division", return_value=0)
+    def test_sync_mode_runs_inline(self, by_division):
+        self.queue.async_mode = False
+        self.queue.schedule_division("A")
+        by_division.assert_called_once_with("A")
+        self.assertEqual(self.queue.status()["jobs"][0]["status"], "done")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+# backend/tests/test_result_read_model.py
+"""Unit tests for the bulk-loaded result read model behind GET /admin/results"""
+import unittest
+from app import db
+from models import Student, Mark
+from services.result_service import ensure_results_current
+from tests.helpers import AppTestCase, QueryCounter, add_admin, add_subject, auth_headers
+
+CODES = ["ENG", "ECO", "BK", "OC", "HINDI", "IT", "MATHS", "SP", "EVS", "PE"]
+
+
+class ResultReadModelTestCase(AppTestCase):
+    """Test that division result listings use a constant number of queries"""
+
+    def setUp(self):
+        super().setUp()
+        self.subjects = {}
+        for code in CODES:
+            subject_type = "OPTIONAL" if code in ("HINDI", "IT", "MATHS", "SP") else "CORE"
+            self.subjects[code] = add_subject(code, subject_type=subject_type)
+        admin = add_admin()
+        db.session.commit()
+        self.headers = auth_headers(admin.admin_id, "ADMIN")
+
+    def seed_division(self, division, count):
+        for i in range(1, count + 1):
+            roll = f"{i:03d}"
+            st = Student()
+            st.roll_no = roll
+            st.division = division
+            st.name = f"Student {roll}"
+            st.optional_subject = "HINDI"
+            st.optional_subject_2 = "MATHS"
+            db.session.add(st)
+            for code in ("ENG", "ECO", "BK", "OC", "HINDI", "MATHS", "EVS", "PE"):
+                m = Mark()
+                m.roll_no = roll
+                m.division = division
+                m.subject_id = self.subjects[code].subject_id
+                m.annual = 40.0 + i % 50
+                db.session.add(m)
+        db.session.commit()
+        ensure_results_current(division)
+
+    def fetch(self, division, path="/admin/results"):
+        db.session.expunge_all()
+        with QueryCounter(db.engine) as counter:
+            response = self.client.get(f"{path}?division={division}", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        return response.get_json(), counter.count
+
+    def test_query_count_independent_of_division_size(self):
+        self.seed_division("A", 3)
+        self.seed_division("B", 40)
+        # warm the auth cache so both requests resolve the admin the same way
+        self.client.get("/admin/divisions", headers=self.headers)
+
+        small, small_queries = self.fetch("A")
+        large, large_queries = self.fetch("B")
+
+        self.assertEqual(len(small), 3)
+        self.assertEqual(len(large), 40)
+        self.assertEqual(small_queries, large_queries)
+
+    def test_complete_table_query_count_independent_of_division_size(self):
+        self.seed_division("A", 3)
+        self.seed_division("B", 40)
+        self.client.get("/admin/divisions", headers=self.headers)
+
+        small, small_queries = self.fetch("A", "/teacher/complete-table")
+        large, large_queries = self.fetch("B", "/teacher/complete-table")
+
+        self.assertEqual([r["roll_no"] for r in large], [f"{i:03d}" for i in range(1, 41)])
+        self.assertEqual([e["code"] for e in large[0]["subjects"]], ["ENG", "ECO", "BK", "OC", "HINDI", "MATHS"])
+        self.assertIsNotNone(large[0]["percentage"])
+        self.assertEqual(small_queries, large_queries)
+
+    def test_rows_include_results_and_mark_details(self):
+        self.seed_division("A", 2)
+        rows, _ = self.fetch("A")
+
+        first = rows[0]
+        self.assertEqual((first["seq"], first["roll_no"]), (1, "001"))
+        codes = [e["code"] for e in first["subjects"]]
+        self.assertEqual(codes, ["ENG", "ECO", "BK", "OC", "HINDI", "MATHS", "EVS", "PE"])
+        eng = first["subjects"][0]
+        self.assertEqual(eng["avg"], 41.0)
+        self.assertEqual(eng["mark"]["annual"], 41.0)
+        self.assertIsNotNone(first["percentage"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+# backend/tests/test_result_service.py
+"""Unit tests for the result generation engine"""
+import unittest
+from app import db
+from models import Student, Mark, Result
+from services.result_service import generate_results_for_division, generate_result_for_student
+from tests.helpers import AppTestCase, QueryCounter, add_subject, add_teacher, allocate
+
+CODES = ["ENG", "ECO", "BK", "OC", "HINDI", "IT", "MATHS", "SP", "EVS", "PE"]
+
+
+class ResultServiceTestCase(AppTestCase):
+    """Test generate_results_for_division"""
+
+    def setUp(self):
+        super().setUp()
+        self.subjects = {}
+        for code in CODES:
+            subject_type = "OPTIONAL" if code in ("HINDI", "IT", "MATHS", "SP") else "CORE"
+            self.subjects[code] = add_subject(code, subject_type=subject_type)
+        teacher = add_teacher("T", "t")
+        for code in ("ENG", "ECO", "BK", "OC"):
+            allocate(teacher, self.subjects[code], "A")
+        db.session.commit()
+
+    def add_student(self, roll, opt="HINDI", opt2="MATHS", annual=60.0, grace=0.0, skip=()):
+        s = Student()
+        s.roll_no = roll
+        s.division = "A"
+        s.name = f"Student {roll}"
+        s.optional_subject = opt
+        s.optional_subject_2 = opt2
+        db.session.add(s)
+        for code in ("ENG", "ECO", "BK", "OC", opt, opt2, "EVS"):
+            if code in skip:
+                continue
+            m = Mark()
+            m.roll_no = roll
+            m.division = "A"
+            m.subject_id = self.subjects[code].subject_id
+            m.annual = annual
+            m.grace = grace
+            db.session.add(m)
+        db.session.commit()
+
+    def test_complete_student_gets_result(self):
+        self.add_student("01", annual=70.0, grace=2.0)
+        generate_results_for_division("A")
+
+        r = Result.query.filter_by(roll_no="01", division="A").one()
+        self.assertEqual(r.name, "Student 01")
+        self.assertEqual(r.eng_avg, 70.0)
+        self.assertEqual(r.hindi_avg, 70.0)
+        self.assertEqual(r.maths_avg, 70.0)
+        self.assertIsNone(r.it_avg)
+        self.assertEqual(r.percentage, 70.0)
+        # ENG, BK, OC, HINDI, MATHS graces (ECO has no Result column)
+        self.assertEqual(r.total_grace, 10.0)
+        self.assertEqual(r.evs_grade, "A")
+        self.assertIsNone(r.pe_grade)
+
+    def test_missing_required_mark_skips_and_clears(self):
+        self.add_student("01", skip=("BK",))
+        generate_results_for_division("A")
+        self.assertIsNone(Result.query.filter_by(roll_no="01").first())
+
+        # once a result exists, a missing mark clears its percentage
+        m = Mark()
+        m.roll_no = "01"
+        m.division = "A"
+        m.subject_id = self.subjects["BK"].subject_id
+        m.annual = 50.0
+        db.session.add(m)
+        db.session.commit()
+        generate_results_for_division("A")
+        self.assertIsNotNone(Result.query.filter_by(roll_no="01").one().percentage)
+
+        db.session.delete(m)
+        db.session.commit()
+        generate_results_for_division("A")
+        self.assertIsNone(Result.query.filter_by(roll_no="01").one().percentage)
+
+    def test_unchanged_results_are_not_rewritten(self):
+        self.add_student("01")
+        self.assertEqual(generate_results_for_division("A"), 1)
+        self.assertEqual(generate_results_for_division("A"), 0)
+
+    def test_query_count_independent_of_division_size(self):
+        self.add_student("01")
+        with QueryCounter(db.engine) as small:
+            generate_results_for_division("A")
+
+        for i in range(2, 41):
+            self.add_student(f"{i:02d}")
+        with QueryCounter(db.engine) as large:
+            generate_results_for_division("A")
+
+        self.assertEqual(Result.query.filter_by(division="A").count(), 40)
+        self.assertEqual(small.count, large.count)
+
+    def test_student_recompute_touches_only_that_student(self):
+        for roll in ("01", "02", "03"):
+            self.add_student(roll, annual=60.0)
+        generate_results_for_division("A")
+
+        for m in Mark.query.filter_by(division="A").all():
+            m.annual = 80.0
+        db.session.commit()
+
+        with QueryCounter(db.engine) as counter:
+            self.assertEqual(generate_result_for_student("02", "A"), 1)
+
+        percentages = {r.roll_no: r.percentage for r in Result.query.filter_by(division="A")}
+        self.assertEqual(percentages, {"01": 60.0, "02": 80.0, "03": 60.0})
+
+        # constant cost regardless of how many students share the division
+        for i in range(4, 31):
+            self.add_student(f"{i:02d}")
+        Mark.query.filter_by(roll_no="02").first().annual = 90.0
+        db.session.commit()
+        with QueryCounter(db.engine) as large:
+            generate_result_for_student("02", "A")
+        self.assertEqual(counter.count, large.count)
+
+    def test_student_recompute_unknown_student(self):
+        self.assertEqual(generate_result_for_student("99", "A"), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+# backend/tests/test_single_flight.py
+"""Unit tests for single-flight coalescing of division recomputes"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+from app import create_app, db
+from services.single_flight import SingleFlight, cross_process_lock, LockTimeout
+from services import result_service
+
+
+class SingleFlightTestCase(unittest.TestCase):
+    """Test SingleFlight and the cross-process lock"""
+
+    def setUp(self):
+        self.lock_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.lock_dir, "test.db")
+        self.app = create_app({
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{self.db_path}",
+            "TESTING": True,
+            "RESULT_RECOMPUTE_ASYNC": False,
+            "RESULT_LOCK_DIR": self.lock_dir,
+        })
+        with self.app.app_context():
+            db.create_all()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.engine.dispose()
+        shutil.rmtree(self.lock_dir, ignore_errors=True)
+
+    def run_threads(self, n, target):
+        barrier = threading.Barrier(n)
+        outcomes = []
+
+        def worker():
+            barrier.wait()
+            try:
+                outcomes.append(target())
+            except Exception as ex:
+                outcomes.append(ex)
+
+        threads = [threading.Thread(target=worker) for _ in range(n)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(5)
+        return outcomes
+
+    def test_concurrent_callers_share_one_call(self):
+        flights = SingleFlight()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.2)
+            return "done"
+
+        outcomes = self.run_threads(8, lambda: flights.do("A", slow))
+        self.assertEqual(outcomes, ["done"] * 8)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flights.in_flight(), [])
+
+    def test_errors_are_shared(self):
+        flights = SingleFlight()
+
+        def failing():
+            time.sleep(0.1)
+            raise RuntimeError("boom")
+
+        outcomes = self.run_threads(4, lambda: flights.do("A", failing))
+        self.assertEqual(len(outcomes), 4)
+        self.assertTrue(all(isinstance(o, RuntimeError) for o in outcomes))
+
+    def test_file_lock_excludes_other_holders(self):
+        with self.app.app_context():
+            with cross_process_lock("results.A"):
+                holder = {}
+
+                def contender():
+                    with self.app.app_context():
+                        try:
+                            with cross_process_lock("results.A", timeout=0.1):
+                                holder["acquired"] = True
+                        except LockTimeout:
+                            holder["acquired"] = False
+
+                t = threading.Thread(target=contender)
+                t.start()
+                t.join(5)
+                self.assertFalse(holder["acquired"])
+
+            # released: can be taken again
+            with cross_process_lock("results.A", timeout=0.1):
+                pass
+
+    def test_stale_readers_trigger_single_recompute(self):
+        state = {"current": False, "calls": 0}
+
+        def fake_recompute(division):
+            state["calls"] += 1
+            time.sleep(0.2)
+            state["current"] = True
+            return 0
+
+        def read():
+            with self.app.app_context():
+                return result_service.ensure_results_current("A")
+
+        with mock.patch.object(result_service, "_recompute", side_effect=fake_recompute), \
+                mock.patch.object(result_service, "results_are_current", side_effect=lambda d: state["current"]):
+            outcomes = self.run_threads(10, read)
+
+        self.assertEqual(state["calls"], 1)
+        self.assertEqual(len(outcomes), 10)
+        self.assertTrue(all(o is True for o in outcomes))
+
+
+if __name__ == "__main__":
+    unittest.main()
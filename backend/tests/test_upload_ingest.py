@@ -0,0 +1,158 @@
+# backend/tests/test_upload_ingest.py
+"""Unit tests for streaming Excel ingestion of marks uploads"""
+import io
+import tempfile
+import types
+import unittest
+from unittest import mock
+import openpyxl
+from werkzeug.datastructures import FileStorage
+from app import db
+from models import Mark
+from services.upload_ingest import UploadError, read_upload_sheet
+from tests.helpers import (
+    AppTestCase, QueryCounter, add_student, add_subject, add_teacher, allocate, auth_headers, workbook_bytes,
+)
+
+
+class UploadIngestTestCase(AppTestCase):
+    """Test upload-apply / from-excel with read-only parsing and limits"""
+
+    def app_config(self):
+        return {"MAX_UPLOAD_ROWS": 5}
+
+    def setUp(self):
+        super().setUp()
+        eng = add_subject("ENG", "English")
+        teacher = add_teacher("T", "t")
+        allocate(teacher, eng, "A")
+        for roll in ("1", "2", "3"):
+            add_student(roll)
+        db.session.commit()
+        self.headers = auth_headers(teacher.teacher_id, "TEACHER")
+
+    def upload(self, url, content):
+        return self.client.post(
+            url,
+            data={"file": (io.BytesIO(content), "marks.xlsx")},
+            headers=self.headers,
+            content_type="multipart/form-data",
+        )
+
+    def test_apply_streams_rows_and_skips_blank_lines(self):
+        content = workbook_bytes([
+            (1, "Student 1", "A", 10, 10, 20, 50, 0),
+            (None, None, None, None, None, None, None, None),
+            (2, "Student 2", "A", 5, 5, 10, 40, 1),
+            (9, "Nobody", "A", 5, 5, 10, 40, 1),
+        ])
+        response = self.upload("/teacher/marks/upload-apply", content)
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual([s["roll_no"] for s in body["saved"]], ["1", "2"])
+        self.assertEqual(body["missing"][0]["reason"], "student not found")
+        self.assertEqual(Mark.query.filter_by(roll_no="1").one().annual, 50.0)
+
+        preview = self.upload("/teacher/marks/from-excel", content)
+        self.assertEqual(preview.status_code, 200)
+        self.assertEqual(len(preview.get_json()["matched"]), 2)
+
+    def test_validation_queries_do_not_grow_with_rows(self):
+        self.app.config["MAX_UPLOAD_ROWS"] = 100
+        for i in range(4, 41):
+            add_student(str(i))
+        db.session.commit()
+        # warm the auth cache so both uploads resolve the teacher the same way
+        self.upload("/teacher/marks/from-excel", workbook_bytes([(1, "S", "A", 1, 1, 1, 1, 0)]))
+
+        counts = []
+        for n in (3, 40):
+            content = workbook_bytes([(i, "S", "A", 1, 1, 1, 1, 0) for i in range(1, n + 1)])
+            with QueryCounter(db.engine) as counter:
+                response = self.upload("/teacher/marks/from-excel", content)
+            self.assertEqual(len(response.get_json()["matched"]), n)
+            counts.append(counter.count)
+        self.assertEqual(counts[0], counts[1])
+
+    def test_subject_cells_resolve_by_code_or_name(self):
+        content = workbook_bytes(
+            [(1, "A", "ENG", 50), (2, "A", "English", 60), (3, "A", "XYZ", 70)],
+            header=("Roll", "Division", "Subject", "Annual"),
+        )
+        body = self.upload("/teacher/marks/from-excel", content).get_json()
+        self.assertEqual([r["subject_id"] for r in body["matched"]], [1, 1, 1])
+
+    def test_limits(self):
+        too_many = workbook_bytes([(1, "S", "A", 1, 1, 1, 1, 0)] * 6)
+        response = self.upload("/teacher/marks/upload-apply", too_many)
+        self.assertEqual(response.status_code, 413)
+
+        self.app.config["MAX_UPLOAD_BYTES"] = 100
+        response = self.upload("/teacher/marks/from-excel", workbook_bytes([(1, "S", "A", 1, 1, 1, 1, 0)]))
+        self.assertEqual(response.status_code, 413)
+
+    def test_rows_are_yielded_while_the_spool_stays_open(self):
+        spools = []
+        real_spool = tempfile.TemporaryFile
+
+        def spool():
+            spools.append(real_spool())
+            return spools[-1]
+
+        content = workbook_bytes([(i, "S", "A", 1, 1, 1, 1, 0) for i in range(1, 7)])
+        with mock.patch("services.upload_ingest.tempfile.TemporaryFile", side_effect=spool):
+            headers, rows = read_upload_sheet(FileStorage(io.BytesIO(content), "marks.xlsx"))
+        self.assertEqual(headers[:3], ["roll", "name", "division"])
+        self.assertIsInstance(rows, types.GeneratorType)
+        self.assertFalse(spools[0].closed)
+
+        # the sixth row goes over MAX_UPLOAD_ROWS while iterating
+        self.assertEqual(next(rows)[0], 1)
+        with self.assertRaises(UploadError) as raised:
+            list(rows)
+        self.assertEqual(raised.exception.status_code, 413)
+        self.assertTrue(spools[0].closed)
+
+    def test_rejects_unreadable_and_empty_files(self):
+        response = self.upload("/teacher/marks/upload-apply", b"PK\x03\x04 truncated workbook")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()["error"], "Failed to read Excel file")
+
+        # not a workbook and not UTF-8 text (e.g. a legacy .xls)
+        response = self.upload("/teacher/marks/upload-apply", b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1\xff")
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.get_json()["error"].startswith("Failed to read CSV file"))
+
+        empty = openpyxl.Workbook()
+        buf = io.BytesIO()
+        empty.save(buf)
+        response = self.upload("/teacher/marks/from-excel", buf.getvalue())
+        self.assertEqual(response.get_json()["error"], "Excel sheet is empty")
+
+    def test_csv_and_tsv_uploads(self):
+        csv_content = (
+            "\ufeffRoll No,Name,Div,Unit 1,Unit 2,Term,Annual,Grace\r\n"
+            "1,Student 1,A,10,10,20,55,0\r\n"
+            ",,,,,,,\r\n"
+            "2,\"Student, Two\",A,5,5,10,,\r\n"
+        ).encode("utf-8")
+        # header aliases differ from the workbook test: "roll no" is not an alias
+        response = self.upload("/teacher/marks/upload-apply", csv_content)
+        self.assertEqual(response.get_json()["error"], "Invalid Excel template. Missing required columns: roll and division")
+
+        csv_content = csv_content.replace(b"Roll No", b"Roll")
+        response = self.upload("/teacher/marks/upload-apply", csv_content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([s["roll_no"] for s in response.get_json()["saved"]], ["1", "2"])
+        self.assertEqual(Mark.query.filter_by(roll_no="1").one().annual, 55.0)
+        self.assertEqual(Mark.query.filter_by(roll_no="2").one().annual, 0)
+
+        tsv_content = b"roll_no\tdivision\tsubject\tannual\n3\tA\tENG\t61\n"
+        body = self.upload("/teacher/marks/from-excel", tsv_content).get_json()
+        self.assertEqual([(r["roll_no"], r["mark"]["annual"]) for r in body["matched"]], [("3", 61.0)])
+
+        self.assertEqual(self.upload("/teacher/marks/from-excel", b"roll;division\n" + b"1;A\n" * 6).status_code, 413)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+# backend/tests/test_upload_jobs.py
+"""Unit tests for background marks upload jobs"""
+import io
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from app import db
+from models import Mark
+from services.upload_jobs import JOB_STALE_SECONDS, JOB_STATUS_TTL_SECONDS, UploadJobQueue
+from tests.helpers import AppTestCase, add_student, add_subject, add_teacher, allocate, auth_headers, workbook_bytes
+
+UPLOAD_HEADER = ("Roll", "Division", "Subject", "Unit1", "Unit2", "Term", "Annual", "Grace")
+
+
+class UploadJobsTestCase(AppTestCase):
+    """Test upload-apply?async=1 and job polling (jobs run inline in tests)"""
+
+    def app_config(self):
+        return {"UPLOAD_JOBS_ASYNC": False, "UPLOAD_JOB_DIR": self.job_dir.name}
+
+    def setUp(self):
+        self.job_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.job_dir.cleanup)
+        super().setUp()
+        eng = add_subject("ENG", "English")
+        t1 = add_teacher("One", "one")
+        t2 = add_teacher("Two", "two")
+        allocate(t1, eng, "A")
+        for i in range(1, 41):
+            add_student(str(i))
+        db.session.commit()
+        self.t1 = auth_headers(t1.teacher_id, "TEACHER")
+        self.t2 = auth_headers(t2.teacher_id, "TEACHER")
+
+    def submit(self, rows):
+        return self.client.post(
+            "/teacher/marks/upload-apply?async=1",
+            headers=self.t1,
+            data={"file": (io.BytesIO(workbook_bytes(rows, UPLOAD_HEADER)), "marks.xlsx")},
+            content_type="multipart/form-data",
+        )
+
+    def test_job_applies_marks_and_reports_progress(self):
+        rows = [[str(i), "A", "ENG", 10, 10, 20, 40, 0] for i in range(1, 41)]
+        rows.append(["99", "A", "ENG", 10, 10, 20, 40, 0])
+        with mock.patch("services.marks_upload.UPLOAD_CHUNK_ROWS", 15):
+            res = self.submit(rows)
+        self.assertEqual(res.status_code, 202)
+        self.assertEqual(res.json["status_url"], f"/teacher/jobs/{res.json['job_id']}")
+
+        job = self.client.get(res.json["status_url"], headers=self.t1).json
+        self.assertEqual(job["status"], "done")
+        self.assertEqual((job["rows_total"], job["rows_processed"]), (41, 41))
+        self.assertEqual((job["saved"], job["missing"], job["inserted"], job["updated"]), (40, 1, 40, 0))
+        self.assertEqual(job["result"]["missing"][0]["reason"], "student not found")
+        self.assertEqual(Mark.query.count(), 40)
+        # stored upload is removed once processed; only the status file is left
+        self.assertEqual(os.listdir(self.job_dir.name), [f"{res.json['job_id']}.json"])
+
+    def test_failed_job_and_other_teachers(self):
+        res = self.submit([["1", "B", "ENG", 10, 10, 20, 40, 0]])
+        url = res.json["status_url"]
+
+        job = self.client.get(url, headers=self.t1).json
+        self.assertEqual(job["status"], "failed")
+        self.assertEqual(job["result"]["error"], "No rows authorized/valid to apply")
+
+        self.assertEqual(self.client.get(url, headers=self.t2).status_code, 404)
+        self.assertEqual(self.client.get("/teacher/jobs/9999", headers=self.t1).status_code, 404)
+        self.assertEqual(self.client.get("/teacher/jobs/1", headers=self.t1).status_code, 404)
+        self.assertEqual(self.client.get("/teacher/jobs/..%2Fetc", headers=self.t1).status_code, 404)
+
+    def test_job_state_is_shared_between_processes(self):
+        res = self.submit([["1", "A", "ENG", 10, 10, 20, 40, 0]])
+        job_id = res.json["job_id"]
+        self.assertGreaterEqual(len(job_id), 16)
+
+        # another worker process: its own queue over the same job dir
+        other = UploadJobQueue()
+        other.init_app(self.app)
+        job = other.get_job(job_id)
+        self.assertEqual((job["status"], job["saved"]), ("done", 1))
+        self.assertIsNone(other.get_job("missing"))
+
+    def test_stale_jobs_fail_and_expired_files_are_purged(self):
+        jobs = UploadJobQueue()
+        jobs.init_app(self.app)
+        jobs._save({"job_id": "stale", "status": "running", "result": None, "finished_at": None})
+        for name in ("stale.upload", "old.upload", "old.json"):
+            with open(os.path.join(self.job_dir.name, name), "w") as fh:
+                fh.write("{}")
+        # the worker holding "stale" stopped reporting; the "old" files are past their TTL
+        stalled = time.time() - JOB_STALE_SECONDS - 1
+        expired = time.time() - JOB_STATUS_TTL_SECONDS - 1
+        os.utime(os.path.join(self.job_dir.name, "stale.json"), (stalled, stalled))
+        for name in ("old.upload", "old.json"):
+            os.utime(os.path.join(self.job_dir.name, name), (expired, expired))
+
+        jobs._purge_expired()
+        self.assertEqual(os.listdir(self.job_dir.name), ["stale.json"])
+        job = jobs.get_job("stale")
+        self.assertEqual((job["status"], job["result"]["error"]), ("failed", "Upload processing was interrupted"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+# backend/tests/test_upload_staging.py
+"""Unit tests for staged uploads (preview once, apply by token)"""
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from app import db
+from models import Mark
+from services.upload_ingest import UploadError
+from services.upload_staging import claim_staged, release_staged
+from tests.helpers import AppTestCase, add_student, add_subject, add_teacher, allocate, auth_headers, workbook_bytes
+
+
+class UploadStagingTestCase(AppTestCase):
+    """Test from-excel staging tokens consumed by upload-apply"""
+
+    def app_config(self):
+        return {"UPLOAD_STAGING_DIR": self.staging_dir.name}
+
+    def setUp(self):
+        self.staging_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.staging_dir.cleanup)
+        super().setUp()
+        eng = add_subject("ENG", "English")
+        t1 = add_teacher("One", "one")
+        t2 = add_teacher("Two", "two")
+        self.alloc = allocate(t1, eng, "A")
+        for roll in ("1", "2", "3"):
+            add_student(roll)
+        db.session.commit()
+        self.t1_id = t1.teacher_id
+        self.t1 = auth_headers(t1.teacher_id, "TEACHER")
+        self.t2 = auth_headers(t2.teacher_id, "TEACHER")
+
+    def preview(self, rows):
+        return self.client.post(
+            "/teacher/marks/from-excel",
+            data={"file": (io.BytesIO(workbook_bytes(rows)), "marks.xlsx")},
+            headers=self.t1,
+            content_type="multipart/form-data",
+        ).get_json()
+
+    def apply(self, token, headers=None):
+        return self.client.post(
+            "/teacher/marks/upload-apply", data={"staging_token": token}, headers=headers or self.t1
+        )
+
+    def test_apply_commits_previewed_rows_without_reparsing(self):
+        preview = self.preview([
+            (1, "Student 1", "A", 10, 10, 20, 50, 0),
+            (2, "Student 2", "A", 5, 5, 10, 140, 0),
+            (9, "Nobody", "A", 5, 5, 10, 40, 0),
+        ])
+        self.assertEqual(preview["staged"], 1)
+        self.assertEqual([r["staged"] for r in preview["matched"]], [True, False])
+        self.assertTrue(preview["staging_token"])
+
+        with mock.patch("routes.teacher_routes.read_upload_sheet") as read:
+            response = self.apply(preview["staging_token"])
+        read.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual(body["saved"], [{"roll_no": "1", "division": "A", "subject_id": 1}])
+        self.assertEqual(
+            sorted(m["reason"] for m in body["missing"]),
+            ["marks out of allowed ranges", "student not found"],
+        )
+        self.assertEqual(Mark.query.one().annual, 50.0)
+
+        # single use
+        self.assertEqual(self.apply(preview["staging_token"]).status_code, 404)
+        self.assertEqual(os.listdir(self.staging_dir.name), [])
+
+    def test_token_is_bound_to_uploader_and_expires(self):
+        token = self.preview([(1, "Student 1", "A", 10, 10, 20, 50, 0)])["staging_token"]
+        self.assertEqual(self.apply(token, self.t2).status_code, 404)
+        self.assertEqual(self.apply("../../etc/passwd").status_code, 404)
+
+        self.app.config["UPLOAD_STAGING_TTL_SECONDS"] = 0
+        self.assertEqual(self.apply(token).status_code, 404)
+        self.assertEqual(Mark.query.count(), 0)
+
+    def test_stages_uploaded_values_not_existing_marks(self):
+        mark = Mark(roll_no="1", division="A", subject_id=1, unit1=5, unit2=20, term=30, annual=60, grace=3)
+        db.session.add(mark)
+        db.session.commit()
+        preview = self.preview([(1, "Student 1", "A", 10, None, 20, 50, None)])
+        row = preview["matched"][0]
+        self.assertTrue(row["staged"])
+        self.assertEqual(row["current"]["unit2"], 20)
+
+        # edited by someone else after the preview
+        mark.unit2 = 22
+        db.session.commit()
+        self.assertEqual(self.apply(preview["staging_token"]).status_code, 200)
+        db.session.refresh(mark)
+        # exactly what the preview showed: blank cells count as 0, as when applying the file
+        self.assertEqual(
+            {f: getattr(mark, f) for f in ("unit1", "unit2", "term", "annual", "grace", "tot", "sub_avg")},
+            {f: v for f, v in row["mark"].items() if f != "mark_id"},
+        )
+        self.assertEqual((mark.unit2, mark.grace), (0, 0))
+
+    def test_apply_validates_staged_rows_again(self):
+        token = self.preview([(1, "Student 1", "A", 10, 10, 20, 50, 0)])["staging_token"]
+        db.session.delete(self.alloc)
+        db.session.commit()
+
+        response = self.apply(token)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [m["reason"] for m in response.get_json()["missing"]],
+            ["not authorized for this subject/division"],
+        )
+        self.assertEqual(Mark.query.count(), 0)
+
+    def test_token_is_claimed_by_one_apply(self):
+        token = self.preview([(1, "Student 1", "A", 10, 10, 20, 50, 0)])["staging_token"]
+        claim_staged(token, self.t1_id, "TEACHER")
+        with self.assertRaises(UploadError) as raised:
+            claim_staged(token, self.t1_id, "TEACHER")
+        self.assertEqual(raised.exception.status_code, 404)
+        self.assertEqual(self.apply(token).status_code, 404)
+
+        # a failed apply hands the token back
+        release_staged(token)
+        self.assertEqual(self.apply(token).status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()